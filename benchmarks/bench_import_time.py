@@ -0,0 +1,72 @@
+"""
+Measures how long ``import route53.connection`` takes in a fresh
+interpreter, using ``python -X importtime``. Each run's report is parsed,
+and the slowest modules of the fastest run are listed.
+
+tests/test_import_time.py checks the same measurement against a budget.
+
+Usage::
+
+    python benchmarks/bench_import_time.py [runs] [module]
+"""
+
+import os
+import subprocess
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+def measure_import(module, python=sys.executable):
+    """
+    Imports ``module`` in a fresh interpreter.
+
+    :rtype: list
+    :returns: A list of ``(self_us, cumulative_us, module_name)`` tuples,
+        one per module imported.
+    """
+
+    output = subprocess.check_output(
+        [python, '-X', 'importtime', '-c', 'import %s' % module],
+        stderr=subprocess.STDOUT, cwd=ROOT,
+    ).decode('utf-8')
+
+    timings = []
+    for line in output.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        fields = line[len('import time:'):].split('|')
+        try:
+            self_us, cumulative_us = int(fields[0]), int(fields[1])
+        except ValueError:
+            # The header line.
+            continue
+        timings.append((self_us, cumulative_us, fields[2].strip()))
+    return timings
+
+def get_cumulative_us(timings, module):
+    for self_us, cumulative_us, name in timings:
+        if name == module:
+            return cumulative_us
+    raise ValueError("%s wasn't imported." % module)
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    module = sys.argv[2] if len(sys.argv) > 2 else 'route53.connection'
+
+    results = []
+    for _ in range(runs):
+        timings = measure_import(module)
+        results.append((get_cumulative_us(timings, module), timings))
+    results.sort(key=lambda result: result[0])
+
+    best, timings = results[0]
+    median = results[len(results) // 2][0]
+    print('import %s (%d runs): best %.1f ms, median %.1f ms' % (
+        module, runs, best / 1000.0, median / 1000.0
+    ))
+    print('%d modules imported. Slowest (self time, best run):' % len(timings))
+    for self_us, cumulative_us, name in sorted(timings, reverse=True)[:10]:
+        print('  %8.2f ms  %s' % (self_us / 1000.0, name))
+
+if __name__ == '__main__':
+    main()
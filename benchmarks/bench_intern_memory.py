@@ -0,0 +1,93 @@
+"""
+Measures the memory held by the ResourceRecordSet objects parsed from a
+large synthetic zone, with and without value interning.
+
+The synthetic zone mimics a typical large zone: most record sets are
+CNAMEs pointing at a handful of load balancers, with A records in a small
+address range, some repeated TXT verification strings, and a few TTLs.
+
+Usage::
+
+    python benchmarks/bench_intern_memory.py [record_count]
+"""
+
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from lxml import etree
+import route53
+from route53.connection import Route53Connection
+from route53.util import StringInterner
+from route53.xml_parsers import list_resource_record_sets_by_zone_id_parser
+
+PAGE_SIZE = 100
+NAMESPACE = 'https://route53.amazonaws.com/doc/%s/' % \
+    Route53Connection.endpoint_version
+
+def make_rrset_xml(i):
+    name = 'host%d.example.com.' % i
+    kind = i % 10
+    if kind < 6:
+        return (
+            '<ResourceRecordSet><Name>%s</Name><Type>CNAME</Type><TTL>300</TTL>'
+            '<ResourceRecords><ResourceRecord><Value>lb-%d.us-east-1.elb.amazonaws.com</Value>'
+            '</ResourceRecord></ResourceRecords></ResourceRecordSet>' % (name, i % 8)
+        )
+    elif kind < 9:
+        return (
+            '<ResourceRecordSet><Name>%s</Name><Type>A</Type><TTL>60</TTL>'
+            '<ResourceRecords><ResourceRecord><Value>10.0.%d.%d</Value>'
+            '</ResourceRecord></ResourceRecords></ResourceRecordSet>' % (name, i % 4, i % 250)
+        )
+    return (
+        '<ResourceRecordSet><Name>%s</Name><Type>TXT</Type><TTL>3600</TTL>'
+        '<ResourceRecords><ResourceRecord><Value>"google-site-verification=%d"</Value>'
+        '</ResourceRecord></ResourceRecords></ResourceRecordSet>' % (name, i % 3)
+    )
+
+def iter_pages(record_count):
+    for start in range(0, record_count, PAGE_SIZE):
+        stop = min(start + PAGE_SIZE, record_count)
+        body = ''.join(make_rrset_xml(i) for i in range(start, stop))
+        yield etree.fromstring(
+            '<ListResourceRecordSetsResponse xmlns="%s"><ResourceRecordSets>%s'
+            '</ResourceRecordSets></ListResourceRecordSetsResponse>' % (NAMESPACE, body)
+        )
+
+def measure(record_count, interner):
+    conn = route53.connect('BLAHBLAH', 'SECRET')
+
+    tracemalloc.start()
+    started = time.time()
+    rrsets = []
+    for root in iter_pages(record_count):
+        rrsets.extend(list_resource_record_sets_by_zone_id_parser(
+            root, conn, 'Z1D633PJN98FT9', interner=interner
+        ))
+        # Pages are thrown away once parsed, as they would be in a listing.
+        del root
+    elapsed = time.time() - started
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    assert len(rrsets) == record_count
+    return current, elapsed
+
+def main():
+    record_count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+
+    print('Parsing %d synthetic record sets...' % record_count)
+    plain, plain_elapsed = measure(record_count, None)
+    print('  without interning: %8.1f MB retained (%.1fs)' % (plain / 1e6, plain_elapsed))
+    interned, interned_elapsed = measure(record_count, StringInterner())
+    print('  with interning:    %8.1f MB retained (%.1fs)' % (interned / 1e6, interned_elapsed))
+    print('  saved:             %8.1f MB (%.0f%%)' % (
+        (plain - interned) / 1e6, 100.0 * (plain - interned) / plain
+    ))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""
+Compares the fast ISO 8601 timestamp parser against the strptime-based
+parser it replaced, for the two formats the Route53 API uses.
+
+Usage::
+
+    python benchmarks/bench_iso_8601.py [iterations]
+"""
+
+import datetime
+import os
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from route53 import util
+
+TIMESTAMPS = [
+    '2013-07-28T01:00:%02dZ' % i for i in range(30)
+] + [
+    '2013-07-28T01:00:%02d.%03dZ' % (i, i * 7) for i in range(30)
+]
+
+def parse_with_strptime(time_str):
+    if re.search(r'\.\d{3}Z$', time_str):
+        submitted_at = datetime.datetime.strptime(time_str, '%Y-%m-%dT%H:%M:%S.%fZ')
+    else:
+        submitted_at = datetime.datetime.strptime(time_str, '%Y-%m-%dT%H:%M:%SZ')
+    return submitted_at.replace(tzinfo=util.UTC_TIMEZONE)
+
+def parse_uncached(time_str):
+    util._ISO_8601_CACHE.clear()
+    return util.parse_iso_8601_time_str(time_str)
+
+def run(label, func, iterations):
+    elapsed = timeit.timeit(
+        lambda: [func(ts) for ts in TIMESTAMPS], number=iterations
+    )
+    per_call = elapsed / (iterations * len(TIMESTAMPS)) * 1e6
+    print('  %-22s %6.2f us/timestamp' % (label, per_call))
+    return per_call
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+
+    for ts in TIMESTAMPS:
+        assert util.parse_iso_8601_time_str(ts) == parse_with_strptime(ts)
+
+    print('Parsing %d timestamps x %d...' % (len(TIMESTAMPS), iterations))
+    baseline = run('strptime:', parse_with_strptime, iterations)
+    uncached = run('fast path (uncached):', parse_uncached, iterations)
+    cached = run('fast path (cached):', util.parse_iso_8601_time_str, iterations)
+    print('  speedup: %.1fx uncached, %.1fx cached' % (
+        baseline / uncached, baseline / cached
+    ))
+
+if __name__ == '__main__':
+    main()
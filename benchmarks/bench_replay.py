@@ -0,0 +1,69 @@
+"""
+Profiles listing every hosted zone and record set in an account, offline.
+Record a cassette once (this needs the AWS_ACCESS_KEY_ID and
+AWS_SECRET_ACCESS_KEY environment variables), then replay it as often as
+needed.
+
+Usage::
+
+    python benchmarks/bench_replay.py record account.jsonl.gz
+    python benchmarks/bench_replay.py replay account.jsonl.gz [--realtime] [--profile]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import route53
+from route53.cassette import RecordingTransport, ReplayTransport
+
+def list_everything(conn):
+    rrset_count = 0
+    zone_count = 0
+    for zone in conn.list_hosted_zones():
+        zone_count += 1
+        for _ in zone.list_record_sets():
+            rrset_count += 1
+    return zone_count, rrset_count
+
+def main():
+    if len(sys.argv) < 3 or sys.argv[1] not in ('record', 'replay'):
+        sys.exit(__doc__)
+    mode, path = sys.argv[1:3]
+    options = sys.argv[3:]
+
+    if mode == 'record':
+        conn = route53.connect(
+            os.environ['AWS_ACCESS_KEY_ID'], os.environ['AWS_SECRET_ACCESS_KEY'],
+            transport=lambda conn: RecordingTransport(conn, path),
+        )
+    else:
+        conn = route53.connect(
+            'BLAHBLAH', 'SECRET',
+            transport=lambda conn: ReplayTransport(
+                conn, path, realtime='--realtime' in options
+            ),
+        )
+
+    started = time.time()
+    if '--profile' in options:
+        import cProfile
+        import pstats
+        profiler = cProfile.Profile()
+        zone_count, rrset_count = profiler.runcall(list_everything, conn)
+        pstats.Stats(profiler).sort_stats('cumulative').print_stats(25)
+    else:
+        zone_count, rrset_count = list_everything(conn)
+    elapsed = time.time() - started
+
+    if mode == 'record':
+        conn._transport.close()
+    print('%sed %d zones, %d record sets in %.3fs (%.0f record sets/s)' % (
+        mode.capitalize(), zone_count, rrset_count, elapsed,
+        rrset_count / elapsed if elapsed else 0,
+    ))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""
+Measures the cost of signing requests, as seen at a steady 1,000 requests
+per second: with AWS3 header caching, every second costs one signature and
+999 cache hits.
+
+Usage::
+
+    python benchmarks/bench_signing.py [requests]
+"""
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import route53
+from route53.auth import AWS3Signer, SigV4Signer
+
+REQUESTS_PER_SECOND = 1000
+
+def per_call_us(func, count):
+    return timeit.timeit(func, number=count) / count * 1e6
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+
+    conn = route53.connect('BLAHBLAH', 'wJalrXUtnFEMI/K7MDENG/bPxRfiCYEXAMPLEKEY')
+    aws3 = AWS3Signer(conn)
+    sigv4 = SigV4Signer(conn)
+
+    def aws3_uncached():
+        aws3._cached_headers = (None, None)
+        return aws3.get_headers('GET', 'hostedzone', {})
+
+    miss = per_call_us(aws3_uncached, count)
+    hit = per_call_us(lambda: aws3.get_headers('GET', 'hostedzone', {}), count)
+    v4 = per_call_us(lambda: sigv4.get_headers('GET', 'hostedzone', {'maxitems': 100}), count)
+
+    # At 1k requests/second, one request per second misses the cache.
+    cached_avg = (miss + hit * (REQUESTS_PER_SECOND - 1)) / REQUESTS_PER_SECOND
+
+    print('Signing cost per request (%d calls each):' % count)
+    print('  AWS3, uncached:       %6.2f us' % miss)
+    print('  AWS3, cached:         %6.2f us' % hit)
+    print('  AWS3 at 1k req/s:     %6.2f us  (%.2f ms of CPU per second)' % (
+        cached_avg, cached_avg * REQUESTS_PER_SECOND / 1000.0
+    ))
+    print('  AWS3 without cache:   %6.2f us  (%.2f ms of CPU per second)' % (
+        miss, miss * REQUESTS_PER_SECOND / 1000.0
+    ))
+    print('  SigV4 (cached key):   %6.2f us' % v4)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""
+Compares the per-request overhead of the HTTP transports, by sending small
+GETs to a local keep-alive server.
+
+Usage::
+
+    python benchmarks/bench_transport.py [requests]
+"""
+
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import route53
+from route53.transport import HTTPClientTransport, RequestsTransport
+
+BODY = b'<GetChangeResponse><ChangeInfo><Id>/change/C1</Id></ChangeInfo></GetChangeResponse>'
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Otherwise the separate header and body writes interact with delayed
+    # ACKs, and every request takes ~40ms.
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/xml')
+        self.send_header('Content-Length', str(len(BODY)))
+        self.end_headers()
+        self.wfile.write(BODY)
+
+def run(transport_class, endpoint, count):
+    conn = route53.connect('BLAHBLAH', 'SECRET')
+    conn._endpoint = endpoint
+    transport = transport_class(conn)
+    # Warm up the connection.
+    transport.send_request('change/C1', {}, 'GET')
+
+    started = time.time()
+    for _ in range(count):
+        transport.send_request('change/C1', {}, 'GET')
+    return (time.time() - started) / count * 1e6
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+
+    server = HTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    endpoint = 'http://127.0.0.1:%d/2013-04-01/' % server.server_address[1]
+
+    print('Sending %d GETs to a local server...' % count)
+    for transport_class in (RequestsTransport, HTTPClientTransport):
+        print('  %-20s %7.1f us/request' % (
+            transport_class.__name__ + ':', run(transport_class, endpoint, count)
+        ))
+    server.shutdown()
+
+if __name__ == '__main__':
+    main()
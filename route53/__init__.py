@@ -16,6 +16,23 @@ def connect(aws_access_key_id=None, aws_secret_access_key=None, **kwargs):
 
     :keyword str aws_access_key_id: Your AWS Access Key ID
     :keyword str aws_secret_access_key: Your AWS Secret Access Key
+    :keyword transport: The HTTP transport to use. Either a
+        :py:class:`BaseTransport <route53.transport.BaseTransport>` sub-class
+        (like :py:class:`HTTPClientTransport <route53.transport.HTTPClientTransport>`),
+        or a callable that takes the connection and returns a transport.
+    :keyword signer: How to sign requests. Either a
+        :py:class:`BaseSigner <route53.auth.BaseSigner>` sub-class (like
+        :py:class:`SigV4Signer <route53.auth.SigV4Signer>`), or a callable
+        that takes the connection and returns a signer.
+    :keyword str aws_session_token: The session token for temporary
+        credentials. Requests are signed with SigV4 when this is given.
+    :keyword timeout: The timeout for each request, in seconds. Either a
+        float, or a ``(connect, read)`` tuple.
+    :keyword bool coalesce_requests: If ``True`` (the default), identical
+        GETs made from several threads at once share a single request.
+
+    Any other keyword arguments are passed on to
+    :py:class:`Route53Connection <route53.connection.Route53Connection>`.
 
     :rtype: :py:class:`route53.connection.Route53Connection`
     :return: A connection to Amazon's Route 53
@@ -0,0 +1,284 @@
+"""
+Request signing. Each connection has a signer, which works out the
+authentication headers for every request. Two schemes are supported:
+
+* :py:class:`AWS3Signer`, Route53's original ``AWS3-HTTPS`` scheme. This is
+  the default, for compatibility.
+* :py:class:`SigV4Signer`, AWS Signature Version 4. This is needed for
+  temporary credentials (session tokens), and is what AWS recommends.
+
+Pick one with the ``signer`` argument to :py:func:`route53.connect`,
+which takes a signer class, or a callable that takes the connection and
+returns a signer.
+"""
+
+import base64
+import hashlib
+import hmac
+import time
+
+try:
+    from urllib.parse import quote
+except ImportError:
+    # Python 2.x.
+    from urllib import quote
+
+# SHA256 of an empty request body.
+EMPTY_PAYLOAD_HASH = hashlib.sha256(b'').hexdigest()
+
+def encode_query(params):
+    """
+    Encodes request params as a query string, the way SigV4 expects them:
+    sorted, with RFC 3986 percent-encoding. Transports send GET params
+    encoded this way, so that the query that is signed is exactly the
+    query that is sent.
+
+    :param dict params: Key/value pairs.
+    :rtype: str
+    """
+
+    if not params:
+        return ''
+    return '&'.join(
+        '%s=%s' % (quote(str(key), safe='-_.~'), quote(str(value), safe='-_.~'))
+        for key, value in sorted(params.items())
+    )
+
+def _encode_body(method, data):
+    """
+    :rtype: bytes
+    :returns: The request body as it will be sent.
+    """
+
+    if method != 'POST' or not data:
+        return b''
+    if isinstance(data, dict):
+        data = encode_query(data)
+    if not isinstance(data, bytes):
+        data = data.encode('utf-8')
+    return data
+
+
+class BaseSigner(object):
+    """
+    Base class for request signers. Signers must be safe to call from
+    multiple threads at once.
+    """
+
+    def __init__(self, connection):
+        """
+        :param Route53Connection connection: The connection whose requests
+            are being signed. This holds the credentials.
+        """
+
+        self.connection = connection
+
+    def get_headers(self, method, path, data):
+        """
+        Works out the authentication headers for a request.
+
+        :param str method: One of 'GET', 'POST', or 'DELETE'.
+        :param str path: The path being tacked on to the endpoint URL.
+        :param data: The request params (for GETs), or body (for POSTs).
+        :rtype: dict
+        :returns: The headers to send with the request.
+        """
+
+        raise NotImplementedError
+
+
+class AWS3Signer(BaseSigner):
+    """
+    Signs requests with the legacy ``AWS3-HTTPS`` scheme. Only the date is
+    signed, so the headers don't depend on the request itself.
+    """
+
+    def __init__(self, connection):
+        super(AWS3Signer, self).__init__(connection)
+        # Keying an HMAC is the expensive part, so it's done once, and
+        # copied for each signature.
+        self._hmac = hmac.new(
+            connection._aws_secret_access_key.encode('utf-8'),
+            digestmod=hashlib.sha256
+        )
+        # ((access key ID, UNIX second), headers) for the last request.
+        self._cached_headers = (None, None)
+
+    def sign_string(self, string_to_sign):
+        """
+        :param str string_to_sign: The string to sign.
+        :rtype: str
+        :returns: The base64 encoded HMAC-SHA256 signature of the string.
+        """
+
+        new_hmac = self._hmac.copy()
+        new_hmac.update(string_to_sign.encode('utf-8'))
+        return base64.b64encode(new_hmac.digest()).decode('utf-8')
+
+    def get_headers(self, method=None, path=None, data=None):
+        now = int(time.time())
+        access_key_id = self.connection._aws_access_key_id
+
+        # Every request within the same second signs the same date string,
+        # so the headers are re-used until the second changes. The cache is
+        # a single tuple, swapped out as a whole, so that concurrent readers
+        # always see a matching key and headers without needing a lock.
+        cached_key, cached_headers = self._cached_headers
+        if cached_key == (access_key_id, now):
+            return dict(cached_headers)
+
+        date_header = time.asctime(time.gmtime(now))
+
+        # We sign the time string above with the user's AWS secret access key
+        # in order to authenticate our request.
+        signing_key = self.sign_string(date_header)
+
+        # Amazon's super fun auth token.
+        auth_header = "AWS3-HTTPS AWSAccessKeyId=%s,Algorithm=HmacSHA256,Signature=%s" % (
+            access_key_id,
+            signing_key,
+        )
+
+        headers = {
+            'X-Amzn-Authorization': auth_header,
+            'x-amz-date': date_header,
+            'Host': 'route53.amazonaws.com',
+        }
+        session_token = getattr(self.connection, '_aws_session_token', None)
+        if session_token:
+            headers['x-amz-security-token'] = session_token
+
+        self._cached_headers = ((access_key_id, now), headers)
+        return dict(headers)
+
+
+class SigV4Signer(BaseSigner):
+    """
+    Signs requests with AWS Signature Version 4.
+
+    The signing key is derived from the secret key, the date, the region
+    and the service, through four rounds of HMAC. It is cached until the
+    date (UTC) rolls over. The parts of the canonical request that are the
+    same for every request on the connection are worked out up front.
+    """
+
+    algorithm = 'AWS4-HMAC-SHA256'
+
+    def __init__(self, connection, region='us-east-1', service='route53',
+                 host=None):
+        """
+        :param Route53Connection connection: The connection whose requests
+            are being signed.
+        :keyword str region: The region to sign for. Route53 is a global
+            service, signed for ``us-east-1``.
+        :keyword str service: The service to sign for.
+        :keyword str host: The ``Host`` header to sign. Defaults to the
+            host in the connection's endpoint.
+        """
+
+        super(SigV4Signer, self).__init__(connection)
+        self.region = region
+        self.service = service
+
+        location = connection._endpoint.partition('://')[2]
+        host_from_endpoint, _, base_path = location.partition('/')
+        self.host = host or host_from_endpoint
+        self._base_path = '/' + base_path
+        self._scope_suffix = '%s/%s/aws4_request' % (region, service)
+
+        self._session_token = getattr(connection, '_aws_session_token', None)
+        if self._session_token:
+            self._signed_headers = 'host;x-amz-date;x-amz-security-token'
+        else:
+            self._signed_headers = 'host;x-amz-date'
+        self._canonical_host = 'host:%s\n' % self.host
+        self._secret = ('AWS4' + connection._aws_secret_access_key).encode('utf-8')
+
+        # A (date_stamp, signing_key) tuple. Swapped out as a whole, so
+        # readers in other threads always see a matching pair.
+        self._signing_key = (None, None)
+
+    def _get_signing_key(self, date_stamp):
+        """
+        :param str date_stamp: The request date, as ``YYYYMMDD``.
+        :rtype: bytes
+        :returns: The derived signing key for the date.
+        """
+
+        cached_date_stamp, signing_key = self._signing_key
+        if cached_date_stamp == date_stamp:
+            return signing_key
+
+        signing_key = self._secret
+        for part in (date_stamp, self.region, self.service, 'aws4_request'):
+            signing_key = hmac.new(
+                signing_key, part.encode('utf-8'), hashlib.sha256
+            ).digest()
+        self._signing_key = (date_stamp, signing_key)
+        return signing_key
+
+    def sign(self, method, uri, query, body, timestamp=None):
+        """
+        Signs a request.
+
+        :param str method: The HTTP method.
+        :param str uri: The request path, starting with ``/``.
+        :param str query: The query string, from :py:func:`encode_query`.
+        :param bytes body: The request body.
+        :keyword float timestamp: The request time, as a UNIX timestamp.
+            Defaults to now.
+        :rtype: dict
+        :returns: The headers to send with the request.
+        """
+
+        now = time.gmtime(timestamp)
+        amz_date = time.strftime('%Y%m%dT%H%M%SZ', now)
+        date_stamp = amz_date[:8]
+
+        payload_hash = hashlib.sha256(body).hexdigest() if body else EMPTY_PAYLOAD_HASH
+        canonical_headers = self._canonical_host + 'x-amz-date:%s\n' % amz_date
+        if self._session_token:
+            canonical_headers += 'x-amz-security-token:%s\n' % self._session_token
+
+        canonical_request = '\n'.join([
+            method,
+            quote(uri, safe='/-_.~'),
+            query,
+            canonical_headers,
+            self._signed_headers,
+            payload_hash,
+        ])
+
+        scope = '%s/%s' % (date_stamp, self._scope_suffix)
+        string_to_sign = '\n'.join([
+            self.algorithm,
+            amz_date,
+            scope,
+            hashlib.sha256(canonical_request.encode('utf-8')).hexdigest(),
+        ])
+        signature = hmac.new(
+            self._get_signing_key(date_stamp),
+            string_to_sign.encode('utf-8'),
+            hashlib.sha256
+        ).hexdigest()
+
+        headers = {
+            'Authorization': '%s Credential=%s/%s, SignedHeaders=%s, Signature=%s' % (
+                self.algorithm,
+                self.connection._aws_access_key_id,
+                scope,
+                self._signed_headers,
+                signature,
+            ),
+            'Host': self.host,
+            'x-amz-date': amz_date,
+        }
+        if self._session_token:
+            headers['x-amz-security-token'] = self._session_token
+        return headers
+
+    def get_headers(self, method, path, data):
+        query = encode_query(data) if method == 'GET' else ''
+        return self.sign(
+            method, self._base_path + path, query, _encode_body(method, data)
+        )
@@ -0,0 +1,165 @@
+"""
+Record-and-replay transports. A :py:class:`RecordingTransport` wraps a
+real transport, and writes every request it sends (along with the
+response, and how long it took) to a cassette file. A
+:py:class:`ReplayTransport` serves those responses back, without any
+network access, either as fast as possible or with the recorded
+latencies. Anything built on a connection can then be run (and profiled)
+offline, repeatably::
+
+    conn = route53.connect(
+        ...,
+        transport=lambda conn: RecordingTransport(conn, 'zones.jsonl.gz'),
+    )
+    list(conn.list_hosted_zones())
+    conn._transport.close()
+
+    conn = route53.connect(
+        'BLAHBLAH', 'SECRET',
+        transport=lambda conn: ReplayTransport(conn, 'zones.jsonl.gz'),
+    )
+
+Cassettes are gzipped JSON lines, one request per line. Requests are
+matched by their method, path, and (for GETs) query string. Request
+bodies aren't stored or matched, since they contain generated values like
+caller references. Instead, POSTs and DELETEs to the same path are
+replayed in the order they were recorded.
+"""
+
+import gzip
+import json
+import threading
+import time
+from route53.auth import encode_query
+from route53.exceptions import CassetteMissError, Route53HTTPError
+from route53.transport import BaseTransport, RequestsTransport
+
+CASSETTE_VERSION = 1
+
+
+def _get_request_key(method, path, data):
+    query = encode_query(data) if method == 'GET' else ''
+    return '%s %s?%s' % (method, path, query)
+
+def read_cassette(path):
+    """
+    Reads the entries from a cassette. If the cassette was cut short (the
+    recording process was killed, say), the entries up to that point are
+    returned.
+
+    :param str path: The cassette's path.
+    :rtype: list
+    :returns: A list of dicts, one per recorded request.
+    """
+
+    entries = []
+    with gzip.open(path, 'rt') as cassette:
+        try:
+            for line in cassette:
+                entry = json.loads(line)
+                if 'key' in entry:
+                    entries.append(entry)
+        except (EOFError, ValueError):
+            pass
+    return entries
+
+
+class RecordingTransport(BaseTransport):
+    """
+    Sends requests through another transport, and records them to a
+    cassette. Call :py:meth:`close` when done, to finish off the file.
+    """
+
+    def __init__(self, connection, path, transport=None):
+        """
+        :param Route53Connection connection: The connection being used with
+            the transport.
+        :param str path: The cassette file to write. An existing file is
+            replaced.
+        :keyword transport: The transport to record. Either a
+            :py:class:`BaseTransport <route53.transport.BaseTransport>`
+            sub-class, or a callable that takes the connection and returns a
+            transport instance. Defaults to
+            :py:class:`RequestsTransport <route53.transport.RequestsTransport>`.
+        """
+
+        super(RecordingTransport, self).__init__(connection)
+        self.transport = (transport or RequestsTransport)(connection)
+        self.path = path
+        self._lock = threading.Lock()
+        self._cassette = gzip.open(path, 'wt')
+        self._write({'version': CASSETTE_VERSION, 'endpoint': connection._endpoint})
+
+    def _write(self, entry):
+        line = json.dumps(entry, separators=(',', ':')) + '\n'
+        with self._lock:
+            self._cassette.write(line)
+
+    def send_request(self, path, data, method):
+        started_at = time.time()
+        entry = {'key': _get_request_key(method, path, data)}
+        try:
+            response = self.transport.send_request(path, data, method)
+        except Route53HTTPError as exc:
+            entry['error'] = [exc.status_code, exc.reason, exc.body]
+            raise
+        else:
+            entry['body'] = response
+            return response
+        finally:
+            # Errors other than HTTP ones (like timeouts) aren't responses,
+            # so they aren't recorded.
+            if 'body' in entry or 'error' in entry:
+                entry['elapsed'] = round(time.time() - started_at, 6)
+                self._write(entry)
+
+    def close(self):
+        """
+        Finishes writing the cassette.
+        """
+
+        with self._lock:
+            self._cassette.close()
+
+
+class ReplayTransport(BaseTransport):
+    """
+    Serves responses from a cassette recorded by
+    :py:class:`RecordingTransport`. Requests that were recorded several
+    times get the responses in the order they were recorded, starting over
+    from the first once they run out.
+    """
+
+    def __init__(self, connection, path, realtime=False):
+        """
+        :param Route53Connection connection: The connection being used with
+            the transport.
+        :param str path: The cassette file to read.
+        :keyword bool realtime: If ``True``, each response takes as long as
+            it did when it was recorded.
+        """
+
+        super(ReplayTransport, self).__init__(connection)
+        self.path = path
+        self.realtime = realtime
+        self._lock = threading.Lock()
+        # Request key -> (list of entries, index of the next one to serve).
+        self._entries = {}
+        for entry in read_cassette(path):
+            self._entries.setdefault(entry['key'], [[], 0])[0].append(entry)
+
+    def send_request(self, path, data, method):
+        key = _get_request_key(method, path, data)
+        with self._lock:
+            recorded = self._entries.get(key)
+            if recorded is None:
+                raise CassetteMissError('Not in the cassette: %s' % key)
+            entries, index = recorded
+            entry = entries[index]
+            recorded[1] = (index + 1) % len(entries)
+
+        if self.realtime:
+            time.sleep(entry['elapsed'])
+        if 'error' in entry:
+            raise Route53HTTPError(*entry['error'])
+        return entry['body']
@@ -1,4 +1,15 @@
-from route53.exceptions import Route53Error
+import collections
+from route53.deadline import bind_deadline
+from route53.exceptions import Route53Error, ChangeSetValidationError
+from route53.validation import SINGLE_VALUE_RECORD_TYPES, _check_values, \
+    validate_change_set
+from route53.xml_generators.change_resource_record_set import get_change_values
+
+# Route53 rejects change batches with more than this many ResourceRecord
+# values in them, across all of the batch's changes.
+MAX_BATCH_RECORD_VALUES = 1000
+# ... or with more than this many characters in those values.
+MAX_BATCH_VALUE_CHARACTERS = 32000
 
 class ChangeSet(object):
     """
@@ -18,24 +29,331 @@ class ChangeSet(object):
         self.hosted_zone_id = hosted_zone_id
         self.creations = []
         self.deletions = []
+        self.upserts = []
+        # Every change, in the order it was added. normalize() needs this to
+        # tell a CREATE followed by a DELETE from the reverse.
+        self._added = []
+
+    def __len__(self):
+        return len(self.deletions) + len(self.upserts) + len(self.creations)
 
     def add_change(self, action, record_set):
         """
         Adds a change to this change set.
 
-        :param str action: Must be one of either 'CREATE' or 'DELETE'.
+        :param str action: Must be one of 'CREATE', 'DELETE', or 'UPSERT'.
+            An UPSERT creates the record set if it doesn't exist, and
+            replaces it with the given values if it does.
         :param resource_record_set.ResourceRecordSet record_set: The
-            ResourceRecordSet object that was created or deleted.
+            ResourceRecordSet object that was created, deleted, or upserted.
+        :raises: :py:exc:`Route53Error <route53.exceptions.Route53Error>` if
+            a record set is to be created or upserted that was retrieved
+            with settings this library doesn't support, since writing it
+            back would drop those settings.
         """
 
         action = action.upper()
 
-        if action not in ['CREATE', 'DELETE']:
-            raise Route53Error("action must be one of 'CREATE' or 'DELETE'")
+        if action not in ['CREATE', 'DELETE', 'UPSERT']:
+            raise Route53Error("action must be one of 'CREATE', 'DELETE', or 'UPSERT'")
+        if action != 'DELETE' and record_set._unrecognized_tags:
+            raise Route53Error(
+                "Can't %s %s: it has settings that would be lost (%s)" % (
+                    action, record_set.name,
+                    ', '.join(sorted(record_set._unrecognized_tags)),
+                )
+            )
 
         change_tuple = (action, record_set)
+        self._added.append(change_tuple)
 
         if action == 'CREATE':
             self.creations.append(change_tuple)
+        elif action == 'UPSERT':
+            self.upserts.append(change_tuple)
         else:
-            self.deletions.append(change_tuple)
\ No newline at end of file
+            self.deletions.append(change_tuple)
+
+    def get_changes(self):
+        """
+        :rtype: list
+        :returns: All of the ``(action, record_set)`` change tuples, in the
+            order they are sent to Route53. Deletions come first, so that
+            record sets may be replaced within a single change set.
+        """
+
+        return self.deletions + self.upserts + self.creations
+
+    def validate(self, snapshot=None):
+        """
+        Checks this change set for problems that would get it rejected by
+        Route53, without sending it. Every problem found is reported at
+        once.
+
+        :keyword ZoneSnapshot snapshot: An optional
+            :py:class:`ZoneSnapshot <route53.validation.ZoneSnapshot>` of the
+            zone, which enables the checks against existing record sets. See
+            :py:func:`validate_change_set <route53.validation.validate_change_set>`.
+        :raises: :py:exc:`ChangeSetValidationError <route53.exceptions.ChangeSetValidationError>`
+            if any problems were found.
+        """
+
+        problems = validate_change_set(self, snapshot=snapshot)
+        if problems:
+            raise ChangeSetValidationError(problems)
+
+    def normalize(self):
+        """
+        Cancels out and merges redundant changes, in place. Changes are
+        grouped by the record set they apply to (name, type and set
+        identifier), and each group is reduced in the order it was added:
+
+        * A CREATE followed by a matching DELETE cancels out.
+        * A DELETE followed by a CREATE of the same values is a no-op, and
+          is dropped. With different values, the pair becomes an UPSERT.
+        * CREATEs with the same TTL and routing settings have their values
+          merged into a single CREATE, as long as the result is valid.
+          Alias record sets, and types that only hold one value (CNAME,
+          SOA), are never merged.
+        * A CREATE or UPSERT followed by an UPSERT becomes the latter's
+          CREATE or UPSERT, and a DELETE followed by an UPSERT becomes the
+          UPSERT.
+
+        Anything else is left alone, for Route53 to judge. Record sets
+        produced by merging are new instances; the record sets that were
+        added to the change set aren't modified.
+
+        :rtype: int
+        :returns: The number of changes removed.
+        """
+
+        groups = {}
+        group_order = []
+        for action, rrset in self._added:
+            values = get_change_values((action, rrset))
+            key = (
+                values['name'].lower().rstrip('.'),
+                rrset.rrset_type,
+                values.get('set_identifier'),
+            )
+            if key not in groups:
+                groups[key] = []
+                group_order.append(key)
+            _reduce_change(groups[key], action, rrset, values)
+
+        before = len(self._added)
+        self.creations = []
+        self.deletions = []
+        self.upserts = []
+        self._added = []
+        for key in group_order:
+            for action, rrset, values in groups[key]:
+                self.add_change(action, rrset)
+        return before - len(self._added)
+
+
+def _same_values(values, other):
+    """
+    :rtype: bool
+    :returns: ``True`` if two sets of change values describe identical
+        record sets.
+    """
+
+    for field in ('ttl', 'weight', 'region', 'failover', 'geolocation',
+                  'health_check_id', 'alias_hosted_zone_id', 'alias_dns_name',
+                  'alias_evaluate_target_health'):
+        if values.get(field) != other.get(field):
+            return False
+    return sorted(values['records'] or []) == sorted(other['records'] or [])
+
+def _can_merge(rrset_type, values, other):
+    """
+    :rtype: bool
+    :returns: ``True`` if the record values of two CREATEs can be combined
+        into one record set.
+    """
+
+    if rrset_type in SINGLE_VALUE_RECORD_TYPES:
+        return False
+    for field in ('alias_dns_name', 'alias_hosted_zone_id'):
+        if values.get(field) or other.get(field):
+            return False
+    for field in ('ttl', 'weight', 'region', 'failover', 'geolocation',
+                  'health_check_id'):
+        if values.get(field) != other.get(field):
+            return False
+    return True
+
+def _merge_creations(rrset, values, other_values):
+    """
+    Builds a new record set holding the record values of two CREATEs.
+
+    :rtype: tuple
+    :returns: A tuple in the form of ``(rrset, values)``.
+    """
+
+    records = list(values['records'])
+    for record in other_values['records']:
+        if record not in records:
+            records.append(record)
+
+    merged = rrset.__class__(
+        connection=values['connection'],
+        zone_id=values['zone_id'],
+        name=values['name'],
+        ttl=values['ttl'],
+        records=records,
+        weight=values.get('weight'),
+        region=values.get('region'),
+        set_identifier=values.get('set_identifier'),
+        failover=values.get('failover'),
+        geolocation=values.get('geolocation'),
+        health_check_id=values.get('health_check_id'),
+    )
+    return merged, get_change_values(('CREATE', merged))
+
+def _reduce_change(group, action, rrset, values):
+    """
+    Folds a change into the list of changes pending for a record set.
+
+    :param list group: ``(action, rrset, values)`` tuples, for changes to
+        the same record set. Modified in place.
+    :param str action: The new change's action.
+    :param ResourceRecordSet rrset: The new change's record set.
+    :param dict values: The new change's values.
+    """
+
+    if not group:
+        group.append((action, rrset, values))
+        return
+
+    last_action, last_rrset, last_values = group[-1]
+
+    if last_action == 'CREATE' and action == 'DELETE':
+        if _same_values(last_values, values):
+            group.pop()
+            return
+    elif last_action == 'DELETE' and action == 'CREATE':
+        group.pop()
+        if not _same_values(last_values, values):
+            group.append(('UPSERT', rrset, values))
+        return
+    elif last_action == 'CREATE' and action == 'CREATE':
+        if _can_merge(rrset.rrset_type, last_values, values):
+            merged, merged_values = _merge_creations(last_rrset, last_values, values)
+            # Two changes that Route53 would judge one at a time shouldn't
+            # be turned into a single change that's bound to fail.
+            if not _check_values(rrset.rrset_type, merged_values):
+                group[-1] = ('CREATE', merged, merged_values)
+                return
+    elif action == 'UPSERT' and last_action in ('CREATE', 'UPSERT', 'DELETE'):
+        # The record set ends up with the UPSERT's values either way. After
+        # a CREATE, it stays a CREATE, so that Route53 still rejects the
+        # change if the record set already exists.
+        new_action = 'CREATE' if last_action == 'CREATE' else 'UPSERT'
+        group[-1] = (new_action, rrset, values)
+        return
+
+    group.append((action, rrset, values))
+
+
+def batch_changes(connection, hosted_zone_id, changes, batch_size=100):
+    """
+    Groups changes into ChangeSets of at most ``batch_size`` changes, that
+    stay within Route53's limits on record values (and their characters)
+    per batch. UPSERTs count their values twice towards those limits, as
+    Route53 counts them.
+
+    :param Route53Connection connection: The connection to send with.
+    :param str hosted_zone_id: The ID of the zone being changed.
+    :param iterable changes: ``(action, record_set)`` tuples.
+    :keyword int batch_size: The maximum number of changes per ChangeSet.
+    :rtype: generator
+    :returns: A generator of ChangeSets, filled as ``changes`` is consumed.
+    """
+
+    change_set = ChangeSet(connection=connection, hosted_zone_id=hosted_zone_id)
+    value_count = 0
+    character_count = 0
+    for action, record_set in changes:
+        # The values that are sent, which for DELETEs are the initial ones.
+        records = get_change_values((action, record_set))['records'] or []
+        rrset_value_count = max(1, len(records))
+        rrset_character_count = sum(len(record) for record in records)
+        if action.upper() == 'UPSERT':
+            rrset_value_count *= 2
+            rrset_character_count *= 2
+        if len(change_set) and (
+            len(change_set) >= batch_size or
+            value_count + rrset_value_count > MAX_BATCH_RECORD_VALUES or
+            character_count + rrset_character_count > MAX_BATCH_VALUE_CHARACTERS
+        ):
+            yield change_set
+            change_set = ChangeSet(connection=connection, hosted_zone_id=hosted_zone_id)
+            value_count = 0
+            character_count = 0
+
+        change_set.add_change(action, record_set)
+        value_count += rrset_value_count
+        character_count += rrset_character_count
+
+    if len(change_set):
+        yield change_set
+
+def send_change_sets(connection, change_sets, max_workers=1, send=None,
+                     callback=None):
+    """
+    Sends ChangeSets, with up to ``max_workers`` of them in flight at once.
+    ``change_sets`` is consumed as batches are sent, so a generator (like
+    :py:func:`batch_changes`) is never read far ahead of what's been sent.
+
+    Batches are finished in the order they were sent. If one fails, no more
+    are sent, the ones in flight are waited on, and the error is raised.
+
+    :param Route53Connection connection: The connection to send with.
+    :param iterable change_sets: The ChangeSets to send.
+    :keyword int max_workers: The maximum number of batches in flight.
+        With ``1``, batches are sent one at a time, from the calling thread.
+    :keyword callable send: Sends a ChangeSet, and returns its result.
+        Defaults to sending it as is, returning the change info.
+    :keyword callable callback: Called with each ChangeSet and its result,
+        from the calling thread, as each batch finishes.
+    :rtype: int
+    :returns: The number of batches sent.
+    """
+
+    if send is None:
+        send = connection._change_resource_record_sets
+
+    def finish(change_set, result):
+        if callback is not None:
+            callback(change_set, result)
+
+    batch_count = 0
+    if max_workers <= 1:
+        for change_set in change_sets:
+            finish(change_set, send(change_set))
+            batch_count += 1
+        return batch_count
+
+    from concurrent.futures import ThreadPoolExecutor
+
+    send = bind_deadline(send)
+    # (change_set, future) tuples, oldest first.
+    in_flight = collections.deque()
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        for change_set in change_sets:
+            if len(in_flight) >= max_workers:
+                # Waiting on the oldest batch also surfaces its errors.
+                oldest, future = in_flight.popleft()
+                finish(oldest, future.result())
+            in_flight.append((change_set, executor.submit(send, change_set)))
+            batch_count += 1
+
+        while in_flight:
+            oldest, future = in_flight.popleft()
+            finish(oldest, future.result())
+    finally:
+        executor.shutdown(wait=True)
+    return batch_count
@@ -0,0 +1,486 @@
+"""
+The ``route53`` command line tool. It lists hosted zones, dumps a zone's
+record sets, and diffs or applies a dump against a live zone::
+
+    route53 list
+    route53 dump example.com. -o example.com.jsonl
+    route53 diff example.com. example.com.jsonl
+    route53 apply example.com. example.com.jsonl --prune
+
+Dumps are JSON lines, one record set per line. Listings are streamed, so
+a dump starts writing as soon as the first page comes back, and diffs
+only hold the desired state in memory, not the live zone.
+
+Credentials are read from the ``AWS_ACCESS_KEY_ID``,
+``AWS_SECRET_ACCESS_KEY`` and (optionally) ``AWS_SESSION_TOKEN``
+environment variables. Progress and request counts are written to stderr.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+# Record set fields, in the order they're written to dumps.
+RECORD_FIELDS = (
+    'name', 'type', 'ttl', 'records', 'weight', 'region', 'set_identifier',
+    'failover', 'geolocation', 'health_check_id',
+    'alias_hosted_zone_id', 'alias_dns_name', 'alias_evaluate_target_health',
+)
+
+# Label prefixes to split zones at for partitioned dumps.
+PARTITION_PREFIXES = '0123456789abcdefghijklmnopqrstuvwxyz'
+
+
+class CommandError(Exception):
+    """
+    Raised for problems that end a command with an error message.
+    """
+
+    pass
+
+
+class RequestCounter(object):
+    """
+    Counts the requests sent over a connection, by wrapping its transport
+    in a :py:class:`CountingTransport <route53.transport.CountingTransport>`.
+    """
+
+    def __init__(self, connection):
+        """
+        :param Route53Connection connection: The connection to count
+            requests on.
+        """
+
+        from route53.transport import CountingTransport
+
+        self._transport = CountingTransport(connection, connection._transport)
+        connection._transport = self._transport
+
+    @property
+    def count(self):
+        """
+        :rtype: int
+        :returns: The number of requests sent so far.
+        """
+
+        return self._transport.count
+
+
+class ProgressReporter(object):
+    """
+    Writes progress lines to stderr, at most once per ``interval`` seconds.
+    """
+
+    def __init__(self, command, request_counter, quiet=False, interval=1.0,
+                 stream=None):
+        self.command = command
+        self.request_counter = request_counter
+        self.quiet = quiet
+        self.interval = interval
+        self.stream = stream or sys.stderr
+        self.started_at = time.time()
+        self._last_report = self.started_at
+
+    def report(self, message, final=False):
+        """
+        :param str message: What has been done so far.
+        :keyword bool final: If ``True``, always write the line, with the
+            total elapsed time.
+        """
+
+        if self.quiet:
+            return
+        now = time.time()
+        if not final and now - self._last_report < self.interval:
+            return
+        self._last_report = now
+        line = '%s: %s, %d requests' % (
+            self.command, message, self.request_counter.count
+        )
+        if final:
+            line += ' in %.1fs' % (now - self.started_at)
+        self.stream.write(line + '\n')
+        self.stream.flush()
+
+
+def get_connection_from_environment(transport_name='requests'):
+    """
+    :param str transport_name: ``requests`` or ``httpclient``.
+    :rtype: Route53Connection
+    :returns: A connection using the credentials in the environment.
+    """
+
+    try:
+        access_key_id = os.environ['AWS_ACCESS_KEY_ID']
+        secret_access_key = os.environ['AWS_SECRET_ACCESS_KEY']
+    except KeyError as exc:
+        raise CommandError('%s is not set' % exc.args[0])
+
+    import route53
+    kwargs = {}
+    if os.environ.get('AWS_SESSION_TOKEN'):
+        kwargs['aws_session_token'] = os.environ['AWS_SESSION_TOKEN']
+    if transport_name == 'httpclient':
+        from route53.transport import HTTPClientTransport
+        kwargs['transport'] = HTTPClientTransport
+    return route53.connect(access_key_id, secret_access_key, **kwargs)
+
+def get_zone(connection, zone):
+    """
+    :param str zone: A hosted zone ID, or a name (anything with a dot).
+    :rtype: HostedZone
+    """
+
+    if '.' in zone:
+        hosted_zone = connection.get_hosted_zone_by_name(zone)
+        if hosted_zone is None:
+            raise CommandError('no hosted zone named %s' % zone)
+        return hosted_zone
+    return connection.get_hosted_zone_by_id(zone)
+
+def record_to_json(rrset_type, values):
+    """
+    :param str rrset_type: The record set's type.
+    :param dict values: The record set's values.
+    :rtype: dict
+    :returns: The record set as written to dumps. Unset fields are left
+        out.
+    """
+
+    values = dict(values, type=rrset_type)
+    record = {}
+    for field in RECORD_FIELDS:
+        value = values.get(field)
+        if value is None or value is False or value in ([], {}):
+            continue
+        record[field] = value
+    for field in ('ttl', 'weight'):
+        if field in record:
+            record[field] = int(record[field])
+    return record
+
+def iter_zone_records(connection, hosted_zone, partitions=1, max_workers=4,
+                      page_chunks=100):
+    """
+    Streams a zone's record sets, as dicts of values with a ``type`` key.
+
+    :keyword int partitions: If more than one, the zone is split into this
+        many name ranges, listed concurrently.
+    :rtype: generator
+    """
+
+    from route53.xml_generators.change_resource_record_set import get_change_values
+
+    if partitions > 1:
+        from route53.partitioning import (
+            list_record_sets_partitioned, split_points_from_prefixes
+        )
+        step = len(PARTITION_PREFIXES) / float(partitions)
+        prefixes = sorted(set(
+            PARTITION_PREFIXES[int(step * i)] for i in range(1, partitions)
+        ))
+        rrsets = list_record_sets_partitioned(
+            connection, hosted_zone.id,
+            split_points_from_prefixes(hosted_zone.name, prefixes),
+            max_workers=max_workers, page_chunks=page_chunks,
+        )
+    else:
+        rrsets = hosted_zone.list_record_sets(page_chunks=page_chunks)
+
+    for rrset in rrsets:
+        if rrset._unrecognized_tags:
+            # Dumping it would lose these, and applying the dump would then
+            # strip them from the zone.
+            raise CommandError('%s %s has settings that dumps don\'t support (%s)' % (
+                rrset.name, rrset.rrset_type, ', '.join(sorted(rrset._unrecognized_tags)),
+            ))
+        values = get_change_values(('DELETE', rrset))
+        yield record_to_json(rrset.rrset_type, values)
+
+def iter_dump_records(lines):
+    """
+    Reads records back from a dump. Blank lines are skipped.
+
+    :param iterable lines: The dump's lines.
+    :rtype: generator
+    """
+
+    for line_number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+            record['name'], record['type']
+        except (ValueError, KeyError, TypeError):
+            raise CommandError('line %d is not a valid record' % line_number)
+        unknown_fields = set(record) - set(RECORD_FIELDS)
+        if unknown_fields:
+            raise CommandError('line %d has unsupported fields: %s' % (
+                line_number, ', '.join(sorted(unknown_fields)),
+            ))
+        yield record
+
+def iter_changes(current_records, desired, zone_name, prune=False):
+    """
+    Works out the changes that turn a zone into the desired state. Only
+    the desired state is held in memory; the zone's current record sets
+    are streamed past it.
+
+    :param iterable current_records: The zone's current records.
+    :param ZoneSnapshot desired: The desired records.
+    :param str zone_name: The zone's name, to recognize its apex.
+    :keyword bool prune: If ``True``, delete records that aren't in the
+        desired state. The SOA and NS records at the apex are never
+        deleted.
+    :rtype: generator
+    :returns: A generator of ``(action, record)`` tuples. Records that are
+        new or changed are UPSERTed.
+    """
+
+    from route53.util import is_apex_record_set
+    from route53.validation import get_comparable_values, get_record_set_key
+
+    seen = set()
+    for record in current_records:
+        key = get_record_set_key(record['name'], record['type'], record.get('set_identifier'))
+        seen.add(key)
+        wanted = desired.get(key)
+        if wanted is None:
+            if prune and not is_apex_record_set(record['type'], record['name'], zone_name):
+                yield 'DELETE', record
+        elif get_comparable_values(wanted) != get_comparable_values(record):
+            yield 'UPSERT', record_to_json(wanted['type'], wanted)
+
+    for key in desired:
+        if key not in seen:
+            wanted = desired.get(key)
+            yield 'UPSERT', record_to_json(wanted['type'], wanted)
+
+def _open_output(path):
+    if path in (None, '-'):
+        return sys.stdout, False
+    return open(path, 'w'), True
+
+def _load_desired(path):
+    from route53.validation import ZoneSnapshot
+
+    if path == '-':
+        return ZoneSnapshot.from_values(iter_dump_records(sys.stdin))
+    with open(path) as dump_file:
+        return ZoneSnapshot.from_values(iter_dump_records(dump_file))
+
+def command_list(connection, args, progress):
+    zone_count = 0
+    for zone in connection.list_hosted_zones(with_nameservers=args.with_nameservers):
+        columns = [zone.id, zone.name, str(zone.resource_record_set_count)]
+        if args.with_nameservers:
+            columns.append(','.join(zone.nameservers))
+        sys.stdout.write('\t'.join(columns) + '\n')
+        zone_count += 1
+    progress.report('%d zones' % zone_count, final=True)
+
+def command_dump(connection, args, progress):
+    hosted_zone = get_zone(connection, args.zone)
+    output, should_close = _open_output(args.output)
+    record_count = 0
+    try:
+        for record in iter_zone_records(
+            connection, hosted_zone, partitions=args.partitions,
+            max_workers=args.max_workers, page_chunks=args.page_chunks,
+        ):
+            output.write(json.dumps(record, sort_keys=True) + '\n')
+            record_count += 1
+            progress.report('%d record sets' % record_count)
+    finally:
+        if should_close:
+            output.close()
+    progress.report('%d record sets' % record_count, final=True)
+
+def _iter_zone_changes(connection, args):
+    hosted_zone = get_zone(connection, args.zone)
+    desired = _load_desired(args.file)
+    current_records = iter_zone_records(
+        connection, hosted_zone, partitions=args.partitions,
+        max_workers=args.max_workers, page_chunks=args.page_chunks,
+    )
+    changes = iter_changes(current_records, desired, hosted_zone.name, prune=args.prune)
+    return hosted_zone, changes
+
+def command_diff(connection, args, progress):
+    hosted_zone, changes = _iter_zone_changes(connection, args)
+    change_count = 0
+    for action, record in changes:
+        sys.stdout.write(json.dumps({'action': action, 'record': record}, sort_keys=True) + '\n')
+        change_count += 1
+        progress.report('%d changes' % change_count)
+    progress.report('%d changes' % change_count, final=True)
+    return 1 if change_count and args.exit_code else 0
+
+def command_apply(connection, args, progress):
+    if args.dry_run:
+        return command_diff(connection, args, progress)
+
+    from route53.change_set import batch_changes, send_change_sets
+    from route53.resource_record_set import record_set_from_dict
+
+    hosted_zone, changes = _iter_zone_changes(connection, args)
+    # Changes are sent while the zone is still being listed. That's safe,
+    # since changes to listed record sets are behind the listing's cursor,
+    # and record sets that are new to the zone only come once the listing
+    # is done.
+    rrset_changes = (
+        (action, record_set_from_dict(connection, hosted_zone.id, record))
+        for action, record in changes
+    )
+
+    journal = None
+    if args.journal:
+        from route53.journal import ChangeJournal
+        journal = ChangeJournal(args.journal)
+
+    def send(change_set):
+        if journal is not None:
+            return journal.submit(connection, change_set, comment=args.comment)
+        return connection._change_resource_record_sets(change_set, comment=args.comment)
+
+    counts = {'changes': 0, 'batches': 0}
+
+    def report(change_set, change_info, final=False):
+        if change_set is not None:
+            counts['changes'] += len(change_set)
+            counts['batches'] += 1
+        progress.report('%d changes in %d batches' % (
+            counts['changes'], counts['batches']
+        ), final=final)
+
+    try:
+        send_change_sets(
+            connection,
+            batch_changes(connection, hosted_zone.id, rrset_changes, args.batch_size),
+            max_workers=args.max_workers, send=send, callback=report,
+        )
+    finally:
+        if journal is not None:
+            journal.close()
+
+    report(None, None, final=True)
+
+def get_parser():
+    """
+    :rtype: argparse.ArgumentParser
+    """
+
+    parser = argparse.ArgumentParser(
+        prog='route53', description='Work with Route53 hosted zones.'
+    )
+    parser.add_argument(
+        '--transport', choices=['requests', 'httpclient'], default='requests',
+        help='The HTTP transport to use (default: requests).',
+    )
+    parser.add_argument(
+        '-q', '--quiet', action='store_true',
+        help="Don't write progress to stderr.",
+    )
+    subparsers = parser.add_subparsers(dest='command')
+    subparsers.required = True
+
+    list_parser = subparsers.add_parser('list', help='List hosted zones.')
+    list_parser.add_argument(
+        '--with-nameservers', action='store_true',
+        help="Include each zone's nameservers (one extra request per zone).",
+    )
+    list_parser.set_defaults(func=command_list)
+
+    def add_listing_arguments(subparser):
+        subparser.add_argument('zone', help='A hosted zone ID or name.')
+        subparser.add_argument(
+            '--partitions', type=int, default=1,
+            help='Split the zone into this many name ranges, listed concurrently.',
+        )
+        subparser.add_argument(
+            '--max-workers', type=int, default=4,
+            help='The maximum number of concurrent requests.',
+        )
+        subparser.add_argument(
+            '--page-chunks', type=int, default=100,
+            help='The number of record sets per listing request.',
+        )
+
+    dump_parser = subparsers.add_parser(
+        'dump', help="Write a zone's record sets as JSON lines."
+    )
+    add_listing_arguments(dump_parser)
+    dump_parser.add_argument('-o', '--output', help='Write to this file, not stdout.')
+    dump_parser.set_defaults(func=command_dump)
+
+    def add_diff_arguments(subparser):
+        add_listing_arguments(subparser)
+        subparser.add_argument('file', help="A dump of the desired record sets ('-' for stdin).")
+        subparser.add_argument(
+            '--prune', action='store_true',
+            help="Delete record sets that aren't in the dump.",
+        )
+
+    diff_parser = subparsers.add_parser(
+        'diff', help='Show the changes needed to make a zone match a dump.'
+    )
+    add_diff_arguments(diff_parser)
+    diff_parser.add_argument(
+        '--exit-code', action='store_true',
+        help='Exit with 1 if there are changes.',
+    )
+    diff_parser.set_defaults(func=command_diff)
+
+    apply_parser = subparsers.add_parser('apply', help='Make a zone match a dump.')
+    add_diff_arguments(apply_parser)
+    apply_parser.add_argument(
+        '--batch-size', type=int, default=100,
+        help='The maximum number of changes per request.',
+    )
+    apply_parser.add_argument(
+        '--dry-run', action='store_true',
+        help='Show the changes instead of making them.',
+    )
+    apply_parser.add_argument(
+        '--journal', help='Journal batches to this file, so that an interrupted apply can be re-run safely.',
+    )
+    apply_parser.add_argument('--comment', help='A comment to send with each batch.')
+    apply_parser.set_defaults(func=command_apply, exit_code=False)
+
+    return parser
+
+def main(argv=None, connection=None):
+    """
+    Runs the command line tool.
+
+    :keyword list argv: The arguments. Defaults to ``sys.argv[1:]``.
+    :keyword Route53Connection connection: The connection to use. By
+        default, one is made from the credentials in the environment.
+    :rtype: int
+    :returns: The exit code.
+    """
+
+    args = get_parser().parse_args(argv)
+
+    from route53.exceptions import Route53Error
+
+    try:
+        if connection is None:
+            connection = get_connection_from_environment(args.transport)
+        progress = ProgressReporter(
+            args.command, RequestCounter(connection), quiet=args.quiet
+        )
+        return args.func(connection, args, progress) or 0
+    except (CommandError, Route53Error, IOError) as exc:
+        sys.stderr.write('route53: error: %s\n' % exc)
+        if getattr(exc, 'outcome_unknown', False) and args.command == 'apply':
+            sys.stderr.write(
+                'route53: the changes in flight may or may not have been '
+                'applied; run diff to see what is left\n'
+            )
+        return 1
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,9 +1,13 @@
-from lxml import etree
+import threading
 from route53 import xml_parsers, xml_generators
-from route53.exceptions import Route53Error
+from route53.auth import AWS3Signer, SigV4Signer, encode_query
+from route53.deadline import bind_deadline, get_current_deadline
+from route53.exceptions import DeadlineExceededError, Route53APIError, Route53Error
+from route53.pagination import PaginatedListing, ListingPage, HostedZoneCursor, RecordSetCursor, iter_listing_pages
 from route53.transport import RequestsTransport
+from route53.util import SingleFlight, StringInterner
+from route53.zone_index import ZoneSuffixIndex
 #from route53.util import prettyprint_xml
-from route53.xml_parsers.common_change_info import parse_change_info
 
 class Route53Connection(object):
     """
@@ -13,23 +17,67 @@ class Route53Connection(object):
     instances will probably be creating, deleting, and retrieving
     :py:class:`HostedZone <route53.hosted_zone.HostedZone>` instances.
 
+    Instances are thread-safe. A single connection may be shared between
+    any number of threads: the transport keeps its HTTP state per-thread,
+    and the connection's caches are lock-protected.
+
     .. warning:: Do not instantiate instances of this class yourself.
     """
 
-    endpoint_version = '2012-02-29'
+    endpoint_version = '2013-04-01'
     """The date-based API version. Mostly visible for your reference."""
 
-    def __init__(self, aws_access_key_id, aws_secret_access_key):
+    def __init__(self, aws_access_key_id, aws_secret_access_key,
+                 string_interner=None, transport=None, signer=None,
+                 aws_session_token=None, timeout=None,
+                 coalesce_requests=True):
         """
         :param str aws_access_key_id: An account's access key ID.
         :param str aws_secret_access_key: An account's secret access key.
+        :keyword StringInterner string_interner: Repeated values in record
+            set listings are de-duplicated to save memory. By default, each
+            listing gets its own
+            :py:class:`StringInterner <route53.util.StringInterner>`. Pass
+            one in to share it between all listings on this connection.
+        :keyword transport: The HTTP transport to use. Either a
+            :py:class:`BaseTransport <route53.transport.BaseTransport>`
+            sub-class, or a callable that takes this connection and returns
+            a transport instance. Defaults to
+            :py:class:`RequestsTransport <route53.transport.RequestsTransport>`.
+        :keyword signer: How to sign requests. Either a
+            :py:class:`BaseSigner <route53.auth.BaseSigner>` sub-class, or a
+            callable that takes this connection and returns a signer.
+            Defaults to :py:class:`AWS3Signer <route53.auth.AWS3Signer>`, or
+            :py:class:`SigV4Signer <route53.auth.SigV4Signer>` if a session
+            token is given.
+        :keyword str aws_session_token: The session token that goes with
+            temporary credentials.
+        :keyword timeout: The timeout for each request, in seconds. Either
+            a float, which applies to connecting and to each read, or a
+            ``(connect, read)`` tuple. By default, there is none. See
+            :py:mod:`route53.deadline` for bounding a whole call instead.
+        :keyword bool coalesce_requests: If ``True``, identical GETs made
+            from several threads at once share a single request, and its
+            parsed response. Other requests are always sent as they are.
         """
 
         self._endpoint = 'https://route53.amazonaws.com/%s/' % self.endpoint_version
         self._xml_namespace = 'https://route53.amazonaws.com/doc/%s/' % self.endpoint_version
         self._aws_access_key_id = aws_access_key_id
         self._aws_secret_access_key = aws_secret_access_key
-        self._transport = RequestsTransport(self)
+        self._aws_session_token = aws_session_token
+        self._timeout = timeout
+        # Shares identical GETs that are in flight at the same time.
+        self._single_flight = SingleFlight() if coalesce_requests else None
+        if signer is None:
+            signer = SigV4Signer if aws_session_token else AWS3Signer
+        self._signer = signer(self)
+        self._transport = (transport or RequestsTransport)(self)
+        self._string_interner = string_interner
+        # Lazily built by _get_zone_index(), used for name-based zone lookups.
+        self._zone_index = None
+        # Guards (re-)building the zone index.
+        self._zone_index_lock = threading.Lock()
 
     def _send_request(self, path, data, method):
         """
@@ -45,72 +93,135 @@ class Route53Connection(object):
         :returns: An lxml Element root.
         """
 
-        response_body = self._transport.send_request(path, data, method)
+        deadline = get_current_deadline()
+        if deadline is not None:
+            deadline.check()
+
+        if method != 'GET' or self._single_flight is None:
+            return self._send_and_parse_request(path, data, method, deadline)
+
+        # GETs are safe to share, so threads asking for the same thing at
+        # the same time share one request (and its parsed response).
+        key = (path, encode_query(data))
+        send = lambda: self._send_and_parse_request(path, data, method, deadline)
+        while True:
+            try:
+                return self._single_flight.do(key, send, deadline=deadline)
+            except DeadlineExceededError:
+                if deadline is not None and deadline.expired:
+                    raise
+                # The request was cut short by the deadline of the thread
+                # that sent it, not ours. Try again.
+
+    def _send_and_parse_request(self, path, data, method, deadline):
+        """
+        Does the work for :py:meth:`_send_request`.
+
+        :rtype: lxml.etree._Element
+        :returns: An lxml Element root.
+        """
+
+        # lxml is only loaded once the first request is made, to keep
+        # importing this module cheap.
+        from lxml import etree
+
+        try:
+            response_body = self._transport.send_request(path, data, method)
+        except Exception:
+            # The transport's timeouts were cut short to meet the deadline.
+            if deadline is not None and deadline.expired:
+                raise DeadlineExceededError(deadline.timeout)
+            raise
         root = etree.fromstring(response_body)
         #print(prettyprint_xml(root))
+        if root.tag.endswith('ErrorResponse'):
+            e_error = root.find('./{*}Error')
+            raise Route53APIError(
+                e_error.findtext('./{*}Code'), e_error.findtext('./{*}Message')
+            )
         return root
 
     def _do_autopaginating_api_call(self, path, params, method, parser_func,
-        next_marker_xpath, next_marker_param_name,
-        next_type_xpath=None, parser_kwargs=None):
+                                    cursor_class, cursor=None,
+                                    parser_kwargs=None, page_hook=None,
+                                    by_page=False):
         """
         Given an API method, the arguments passed to it, and a function to
         hand parsing off to, loop through the record sets in the API call
         until all records have been yielded.
 
-
-        :param str method: The API method on the endpoint.
+        :param str path: The RESTful path to tack on to the :py:attr:`endpoint`.
         :param dict params: The kwargs from the top-level API method.
+        :param str method: The API method on the endpoint.
         :param callable parser_func: A callable that is used for parsing the
             output from the API call.
-        :param str next_marker_param_name: The XPath to the marker tag that
-            will determine whether we continue paginating.
-        :param str next_marker_param_name: The parameter name to manipulate
-            in the request data to bring up the next page on the next
-            request loop.
-        :keyword str next_type_xpath: For the
-            py:meth:`list_resource_record_sets_by_zone_id` method, there's
-            an additional paginator token. Specifying this XPath looks for it.
+        :param type cursor_class: The
+            :py:class:`ListingCursor <route53.pagination.ListingCursor>`
+            sub-class that knows how to find the next page's position in the
+            response, and how to request it.
+        :keyword ListingCursor cursor: Where to start the listing. If not
+            specified, we start at the beginning.
         :keyword dict parser_kwargs: Optional dict of additional kwargs to pass
             on to the parser function.
-        :rtype: generator
-        :returns: Returns a generator that may be returned by the top-level
-            API method.
+        :keyword callable page_hook: If specified, each page's parsed objects
+            are handed to this callable as a list before any of them are
+            yielded. Useful for per-page bulk work.
+        :keyword bool by_page: If ``True``, iterate over whole
+            :py:class:`ListingPage <route53.pagination.ListingPage>`
+            instances instead of individual objects.
+        :rtype: :py:class:`PaginatedListing <route53.pagination.PaginatedListing>`
+        :returns: Returns an iterator that may be returned by the top-level
+            API method. If ``by_page`` is ``True``, this is a generator of
+            :py:class:`ListingPage <route53.pagination.ListingPage>`
+            instances instead.
         """
 
         if not parser_kwargs:
             parser_kwargs = {}
 
-        # We loop indefinitely since we have no idea how many "pages" of
-        # results we're going to have to go through.
-        while True:
-            # An lxml Element node.
-            root = self._send_request(path, params, method)
-
-            # Individually yield HostedZone instances after parsing/instantiating.
-            for record in parser_func(root, connection=self, **parser_kwargs):
-                yield record
-
-            # This will determine at what offset we start the next query.
-            next_marker = root.find(next_marker_xpath)
-            if next_marker is None:
-                # If the NextMarker tag is absent, we know we've hit the
-                # last page.
-                break
-
-            # if NextMarker is present, we'll adjust our API request params
-            # and query again for the next page.
-            params[next_marker_param_name] = next_marker.text
-
-            if next_type_xpath:
-                # This is a _list_resource_record_sets_by_zone_id call. Look
-                # for the given tag via XPath and adjust our type arg for
-                # the next request. Without specifying this, we loop
-                # infinitely.
-                next_type = root.find(next_type_xpath)
-                params['type'] = next_type.text
+        def fetch_page(page_cursor):
+            # The cursor determines at what offset we start this page.
+            page_params = dict(params)
+            page_params.update(page_cursor.to_params())
 
-    def list_hosted_zones(self, page_chunks=100):
+            # An lxml Element node.
+            try:
+                root = self._send_request(path, page_params, method)
+            except DeadlineExceededError as exc:
+                # This page is where the listing can be resumed from.
+                exc.cursor = page_cursor
+                raise
+
+            records = list(parser_func(root, connection=self, **parser_kwargs))
+            if page_hook:
+                page_hook(records)
+
+            # If the next page's marker tags are absent, we know we've hit
+            # the last page, and this is None.
+            next_cursor = cursor_class.from_response(root)
+            e_is_truncated = root.find('./{*}IsTruncated')
+            if e_is_truncated is not None:
+                is_truncated = e_is_truncated.text == 'true'
+            else:
+                is_truncated = next_cursor is not None
+
+            return ListingPage(
+                items=records,
+                item_count=len(records),
+                is_truncated=is_truncated,
+                next_cursor=next_cursor,
+            )
+
+        # The listing is held to the deadline it was created under, even if
+        # it's iterated over after leaving it.
+        fetch_page = bind_deadline(fetch_page)
+
+        if by_page:
+            return iter_listing_pages(fetch_page, cursor_class, cursor=cursor)
+        return PaginatedListing(fetch_page, cursor_class, cursor=cursor)
+
+    def list_hosted_zones(self, page_chunks=100, with_nameservers=False,
+                          max_workers=8, cursor=None):
         """
         List all hosted zones associated with this connection's account. Since
         this method returns a generator, you can pull as many or as few
@@ -123,21 +234,118 @@ class Route53Connection(object):
             :py:class:`HostedZone <route53.hosted_zone.HostedZone>`
             instances to retrieve per request. The default is fine for almost
             everyone.
+        :keyword bool with_nameservers: ListHostedZones doesn't return
+            nameservers. If ``True``, each page of zones is handed to
+            :py:meth:`hydrate_hosted_zones` before being yielded, so that
+            reading :py:attr:`HostedZone.nameservers <route53.hosted_zone.HostedZone.nameservers>`
+            doesn't cost a request per zone.
+        :keyword int max_workers: When ``with_nameservers`` is ``True``, the
+            maximum number of concurrent GetHostedZone requests per page.
+        :keyword HostedZoneCursor cursor: Resume a listing from this
+            :py:class:`HostedZoneCursor <route53.pagination.HostedZoneCursor>`,
+            as previously found on a listing's ``cursor`` attribute.
+
+        :rtype: :py:class:`PaginatedListing <route53.pagination.PaginatedListing>`
+        :returns: An iterator of :py:class:`HostedZone <route53.hosted_zone.HostedZone>`
+            instances. Its ``cursor`` attribute holds the position of the
+            next zone, and may be used to resume the listing later.
+        """
+
+        return self._list_hosted_zones(
+            page_chunks=page_chunks,
+            with_nameservers=with_nameservers,
+            max_workers=max_workers,
+            cursor=cursor,
+        )
 
+    def iter_hosted_zone_pages(self, page_chunks=100, with_nameservers=False,
+                               max_workers=8, cursor=None):
+        """
+        Like :py:meth:`list_hosted_zones`, but yields whole pages of hosted
+        zones at a time. This suits batch consumers, who can hand each page
+        off (to a thread pool, or a bulk database insert) as it arrives.
+
+        :keyword int page_chunks: The maximum number of hosted zones per page.
+        :keyword bool with_nameservers: If ``True``, fill in the nameservers
+            on each page's zones before yielding it. See
+            :py:meth:`list_hosted_zones`.
+        :keyword int max_workers: When ``with_nameservers`` is ``True``, the
+            maximum number of concurrent GetHostedZone requests per page.
+        :keyword HostedZoneCursor cursor: Where to start the listing. If not
+            specified, we start at the beginning.
         :rtype: generator
-        :returns: A generator of :py:class:`HostedZone <route53.hosted_zone.HostedZone>`
-            instances.
+        :returns: A generator of
+            :py:class:`ListingPage <route53.pagination.ListingPage>`
+            instances, each holding a list of
+            :py:class:`HostedZone <route53.hosted_zone.HostedZone>` instances.
         """
 
+        return self._list_hosted_zones(
+            page_chunks=page_chunks,
+            with_nameservers=with_nameservers,
+            max_workers=max_workers,
+            cursor=cursor,
+            by_page=True,
+        )
+
+    def _list_hosted_zones(self, page_chunks, with_nameservers, max_workers,
+                           cursor, by_page=False):
+        """
+        Does the work for :py:meth:`list_hosted_zones` and
+        :py:meth:`iter_hosted_zone_pages`.
+        """
+
+        page_hook = None
+        if with_nameservers:
+            page_hook = lambda zones: self.hydrate_hosted_zones(
+                zones, max_workers=max_workers
+            )
+
         return  self._do_autopaginating_api_call(
             path='hostedzone',
             params={'maxitems': page_chunks},
             method='GET',
             parser_func=xml_parsers.list_hosted_zones_parser,
-            next_marker_xpath="./{*}NextMarker",
-            next_marker_param_name="marker",
+            cursor_class=HostedZoneCursor,
+            cursor=cursor,
+            page_hook=page_hook,
+            by_page=by_page,
         )
 
+    def hydrate_hosted_zones(self, zones, max_workers=8):
+        """
+        Fills in the fields that only GetHostedZone returns (currently, the
+        nameservers) on a batch of
+        :py:class:`HostedZone <route53.hosted_zone.HostedZone>` instances.
+        Zones that already have their nameservers are skipped, and the rest
+        are fetched concurrently.
+
+        :param iterable zones: The HostedZone instances to hydrate. They are
+            modified in place.
+        :keyword int max_workers: The maximum number of GetHostedZone
+            requests to have in flight at once.
+        :rtype: list
+        :returns: A list of the given zones.
+        """
+
+        zones = list(zones)
+        pending = [zone for zone in zones if not zone._nameservers]
+        if not pending:
+            return zones
+
+        from concurrent.futures import ThreadPoolExecutor
+
+        def hydrate(zone):
+            hosted_zone = self.get_hosted_zone_by_id(zone.id)
+            zone._nameservers = hosted_zone._nameservers
+
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(pending))) as executor:
+            # Consuming the results re-raises the first exception, if any.
+            for _ in executor.map(bind_deadline(hydrate), pending):
+                pass
+
+        return zones
+
     def create_hosted_zone(self, name, caller_reference=None, comment=None):
         """
         Creates and returns a new hosted zone. Once a hosted zone is created,
@@ -170,11 +378,20 @@ class Route53Connection(object):
             method='POST',
         )
 
-        return xml_parsers.created_hosted_zone_parser(
+        hosted_zone, change_info = xml_parsers.created_hosted_zone_parser(
             root=root,
             connection=self
         )
 
+        # Keep the name index current without re-listing everything. The
+        # lock makes us wait for any index build that is in progress, which
+        # may have listed the zones before this one existed.
+        with self._zone_index_lock:
+            if self._zone_index is not None:
+                self._zone_index.add(hosted_zone)
+
+        return hosted_zone, change_info
+
     def get_hosted_zone_by_id(self, id):
         """
         Retrieves a hosted zone, by hosted zone ID (not name).
@@ -222,14 +439,80 @@ class Route53Connection(object):
             method='DELETE',
         )
 
-        return xml_parsers.delete_hosted_zone_by_id_parser(
+        change_info = xml_parsers.delete_hosted_zone_by_id_parser(
             root=root,
             connection=self,
         )
 
+        with self._zone_index_lock:
+            if self._zone_index is not None:
+                self._zone_index.remove(id)
+
+        return change_info
+
+    def _get_zone_index(self, refresh=False):
+        """
+        Returns the name index of this account's hosted zones, building it
+        from a single zone listing the first time around. The index is kept
+        up to date as zones are created and deleted through this connection.
+
+        :keyword bool refresh: If ``True``, throw away the current index and
+            re-build it from a fresh zone listing. Use this to pick up zones
+            created or deleted elsewhere.
+        :rtype: :py:class:`ZoneSuffixIndex <route53.zone_index.ZoneSuffixIndex>`
+        """
+
+        zone_index = self._zone_index
+        if zone_index is not None and not refresh:
+            return zone_index
+
+        with self._zone_index_lock:
+            # Another thread may have built the index while we waited.
+            if self._zone_index is None or \
+               (refresh and self._zone_index is zone_index):
+                self._zone_index = ZoneSuffixIndex(self.list_hosted_zones())
+            return self._zone_index
+
+    def get_hosted_zone_by_name(self, name, refresh=False):
+        """
+        Retrieves a hosted zone by its exact name. The first call lists all
+        hosted zones to build an in-memory index. Subsequent lookups are
+        served from that index, without any API requests.
+
+        :param str name: The name of the hosted zone. The trailing dot is
+            optional.
+        :keyword bool refresh: If ``True``, re-list the hosted zones before
+            looking the name up.
+        :rtype: :py:class:`HostedZone <route53.hosted_zone.HostedZone>`
+        :returns: The matching hosted zone, or ``None`` if there is no zone
+            with this name.
+        """
+
+        return self._get_zone_index(refresh=refresh).get(name)
+
+    def find_owning_zone(self, fqdn, refresh=False):
+        """
+        Finds the hosted zone that a fully qualified domain name belongs to.
+        This is the zone with the longest name that is a suffix of ``fqdn``.
+        For example, ``api.eu.example.com.`` belongs to ``eu.example.com.``
+        if such a zone exists, and to ``example.com.`` otherwise.
+
+        Like :py:meth:`get_hosted_zone_by_name`, this is served from an
+        in-memory index after the first call.
+
+        :param str fqdn: The fully qualified domain name to look up.
+        :keyword bool refresh: If ``True``, re-list the hosted zones before
+            looking the name up.
+        :rtype: :py:class:`HostedZone <route53.hosted_zone.HostedZone>`
+        :returns: The owning hosted zone, or ``None`` if no zone matches.
+        """
+
+        return self._get_zone_index(refresh=refresh).longest_match(fqdn)
+
     def _list_resource_record_sets_by_zone_id(self, id, rrset_type=None,
                                              identifier=None, name=None,
-                                             page_chunks=100):
+                                             page_chunks=100, cursor=None,
+                                             by_page=False):
         """
         Lists a hosted zone's resource record sets by Zone ID, if you
         already know it.
@@ -248,31 +531,47 @@ class Route53Connection(object):
             only: If results were truncated for a given DNS name and type,
             the value of SetIdentifier for the next resource record set
             that has the current DNS name and type.
-        :keyword str name: Not really sure what this does.
+        :keyword str name: The DNS name of the record set to begin the
+            record listing from.
         :keyword int page_chunks: This API call is paginated behind-the-scenes
             by this many ResourceRecordSet instances. The default should be
             fine for just about everybody, aside from those with tons of RRS.
-
-        :rtype: generator
-        :returns: A generator of ResourceRecordSet instances.
+        :keyword RecordSetCursor cursor: Resume a listing from this
+            :py:class:`RecordSetCursor <route53.pagination.RecordSetCursor>`,
+            as previously found on a listing's ``cursor`` attribute. Takes
+            precedence over ``name``, ``rrset_type`` and ``identifier``.
+        :keyword bool by_page: If ``True``, iterate over whole
+            :py:class:`ListingPage <route53.pagination.ListingPage>`
+            instances instead of individual record sets.
+
+        :rtype: :py:class:`PaginatedListing <route53.pagination.PaginatedListing>`
+        :returns: An iterator of ResourceRecordSet instances. Its ``cursor``
+            attribute holds the position of the next record set, and may be
+            used to resume the listing later. If ``by_page`` is ``True``,
+            a generator of pages instead.
         """
 
-        params = {
-            'name': name,
-            'type': rrset_type,
-            'identifier': identifier,
-            'maxitems': page_chunks,
-        }
+        if cursor is None:
+            cursor = RecordSetCursor(
+                name=name,
+                rrset_type=rrset_type,
+                identifier=identifier,
+            )
+
+        # Repeated values within the listing share storage.
+        interner = self._string_interner
+        if interner is None:
+            interner = StringInterner()
 
         return  self._do_autopaginating_api_call(
             path='hostedzone/%s/rrset' % id,
-            params=params,
+            params={'maxitems': page_chunks},
             method='GET',
             parser_func=xml_parsers.list_resource_record_sets_by_zone_id_parser,
-            parser_kwargs={'zone_id': id},
-            next_marker_xpath="./{*}NextRecordName",
-            next_marker_param_name="name",
-            next_type_xpath="./{*}NextRecordType"
+            cursor_class=RecordSetCursor,
+            cursor=cursor,
+            parser_kwargs={'zone_id': id, 'interner': interner},
+            by_page=by_page,
         )
 
     def _change_resource_record_sets(self, change_set, comment=None):
@@ -305,8 +604,66 @@ class Route53Connection(object):
 
         #print(prettyprint_xml(root))
 
+        from route53.xml_parsers.common_change_info import parse_change_info
+
         e_change_info = root.find('./{*}ChangeInfo')
         if e_change_info is None:
             error = root.find('./{*}Error').find('./{*}Message').text
             raise Route53Error(error)
         return parse_change_info(e_change_info)
+
+    def apply_change_sets(self, change_sets, comment=None, journal=None):
+        """
+        Sends a series of ChangeSets, in order.
+
+        With a :py:class:`ChangeJournal <route53.journal.ChangeJournal>`,
+        each batch is journaled before it is sent. If the pipeline is
+        interrupted, re-running it with the same journal skips the batches
+        that were applied, and checks the zone before re-sending the ones
+        that were in flight.
+
+        :param iterable change_sets: The ChangeSets to send.
+        :keyword str comment: An optional comment to go along with each
+            request.
+        :keyword ChangeJournal journal: An optional journal to record the
+            batches in.
+        :rtype: list
+        :returns: A list of change info dicts, one per ChangeSet. See
+            :py:meth:`ChangeJournal.submit <route53.journal.ChangeJournal.submit>`
+            for when these can be ``None``.
+        """
+
+        results = []
+        for change_set in change_sets:
+            if journal is None:
+                change_info = self._change_resource_record_sets(
+                    change_set, comment=comment
+                )
+            else:
+                change_info = journal.submit(self, change_set, comment=comment)
+            results.append(change_info)
+        return results
+
+    def get_change(self, id):
+        """
+        Gets the current status of a change, such as one returned by
+        :py:meth:`apply_change_sets`.
+
+        :param str id: The change's ID (the ``request_id`` in a change
+            info dict).
+        :rtype: dict
+        :returns: A dict of change info. ``request_status`` is ``PENDING``
+            until the change has propagated to all Route53 servers, and
+            ``INSYNC`` after that.
+        """
+
+        root = self._send_request(
+            path='change/%s' % id,
+            data={},
+            method='GET',
+        )
+
+        return xml_parsers.get_change_parser(
+            root=root,
+            connection=self,
+        )
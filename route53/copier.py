@@ -0,0 +1,309 @@
+"""
+Copies a hosted zone's record sets into another zone, which may be in
+another account (through another connection). This is handy for standing
+up a staging copy of a zone, or mirroring zones for disaster recovery::
+
+    from route53.copier import ZoneCopier
+
+    source = prod_conn.get_hosted_zone_by_name('example.com.')
+    destination = dr_conn.get_hosted_zone_by_name('example.com.')
+    progress = ZoneCopier(source, destination).copy()
+
+The copy is pipelined. A reader thread lists the source zone, while
+batches of UPSERTs are sent to the destination, several at once. Record
+set names (and alias targets) under the source zone's name are moved
+under the destination zone's name. The SOA and NS records at the apex are
+left alone, since each zone has its own. Record sets with settings this
+library doesn't support are skipped too, rather than copied without them,
+and listed on the :py:class:`CopyProgress`.
+
+Copies are resumable. Each :py:class:`CopyProgress` holds a ``cursor``,
+before which everything has been copied. Passing it back to
+:py:meth:`ZoneCopier.copy` picks up from there. Record sets are UPSERTed,
+so anything copied twice is simply overwritten with the same values.
+"""
+
+import collections
+import threading
+import time
+try:
+    import queue
+except ImportError:
+    # Python 2.x.
+    import Queue as queue
+from route53.change_set import batch_changes, send_change_sets
+from route53.deadline import bind_deadline
+from route53.resource_record_set import record_set_from_dict
+from route53.util import is_apex_record_set, normalize_dns_name
+from route53.xml_generators.change_resource_record_set import get_change_values
+
+# Marks the end of the listing on the reader's queue.
+_DONE = object()
+
+
+def _move_name(name, source_name, destination_name):
+    """
+    Moves a name under the source zone to the same place under the
+    destination zone. Names outside of the source zone are left alone.
+    """
+
+    normalized = normalize_dns_name(name)
+    if normalized == source_name:
+        return destination_name
+    if normalized.endswith('.' + source_name):
+        return normalized[:-len(source_name)] + destination_name
+    return name
+
+
+class CopyProgress(object):
+    """
+    How far a copy has got. It's updated after each batch, and handed to
+    the progress callback.
+    """
+
+    def __init__(self, read_count=0, copied_count=0, skipped_count=0,
+                 batch_count=0, cursor=None, done=False, started_at=None,
+                 unsupported=None):
+        #: The number of record sets read from the source.
+        self.read_count = read_count
+        #: The number of record sets copied to the destination.
+        self.copied_count = copied_count
+        #: The number of record sets that were skipped (the apex SOA/NS,
+        #: and the unsupported ones).
+        self.skipped_count = skipped_count
+        #: ``(name, type, set_identifier)`` tuples for the record sets that
+        #: weren't copied, since they have settings this library doesn't
+        #: support.
+        self.unsupported = unsupported if unsupported is not None else []
+        #: The number of batches sent.
+        self.batch_count = batch_count
+        #: A :py:class:`RecordSetCursor <route53.pagination.RecordSetCursor>`
+        #: that the copy can be resumed from. Everything before it has been
+        #: copied.
+        self.cursor = cursor
+        #: ``True`` once the whole zone has been copied.
+        self.done = done
+        self.started_at = started_at or time.time()
+
+    def __repr__(self):
+        return '<CopyProgress: %d read, %d copied, %d batches%s>' % (
+            self.read_count, self.copied_count, self.batch_count,
+            ', done' if self.done else '',
+        )
+
+    @property
+    def elapsed(self):
+        """
+        :rtype: float
+        :returns: Seconds since the copy started.
+        """
+
+        return time.time() - self.started_at
+
+
+class ZoneCopier(object):
+    """
+    Copies the record sets in one hosted zone to another.
+    """
+
+    def __init__(self, source_zone, destination_zone, rename=None,
+                 zone_id_map=None, health_check_id_map=None, batch_size=100,
+                 max_workers=4,
+                 page_chunks=100, queue_size=1000, callback=None):
+        """
+        :param HostedZone source_zone: The zone to copy from.
+        :param HostedZone destination_zone: The zone to copy to. Its
+            connection is used to make the changes.
+        :keyword callable rename: Takes a source record set name, and
+            returns the name to use in the destination. By default, names
+            under the source zone's name are moved under the destination
+            zone's name.
+        :keyword dict zone_id_map: Maps the hosted zone IDs of alias targets
+            in the source to those to use in the destination. Aliases to the
+            source zone itself always point to the destination zone.
+        :keyword dict health_check_id_map: Maps the health check IDs used
+            in the source to those to use in the destination. Health checks
+            belong to an account, so copies to another account need this.
+            Unmapped IDs are copied as is.
+        :keyword int batch_size: The maximum number of record sets per
+            change batch.
+        :keyword int max_workers: The maximum number of batches in flight.
+        :keyword int page_chunks: The number of record sets per listing
+            request.
+        :keyword int queue_size: The maximum number of record sets the
+            reader gets ahead of the batches being sent.
+        :keyword callable callback: Called with a :py:class:`CopyProgress`
+            after each batch is sent, and when the copy is done.
+        """
+
+        self.source_zone = source_zone
+        self.destination_zone = destination_zone
+        self.batch_size = batch_size
+        self.max_workers = max_workers
+        self.page_chunks = page_chunks
+        self.queue_size = queue_size
+        self.callback = callback
+
+        self._source_name = normalize_dns_name(source_zone.name)
+        self._destination_name = normalize_dns_name(destination_zone.name)
+        self.rename = rename or (
+            lambda name: _move_name(name, self._source_name, self._destination_name)
+        )
+        self.zone_id_map = dict(zone_id_map or {})
+        self.zone_id_map.setdefault(source_zone.id, destination_zone.id)
+        self.health_check_id_map = dict(health_check_id_map or {})
+        #: The :py:class:`CopyProgress` of the current (or last) copy.
+        self.progress = None
+
+    def _is_skipped(self, rrset):
+        return is_apex_record_set(rrset.rrset_type, rrset.name, self._source_name)
+
+    def _rewrite(self, rrset):
+        """
+        :rtype: ResourceRecordSet
+        :returns: A copy of a source record set, for the destination zone.
+        """
+
+        # A copy, so that the source record set's values are left alone.
+        values = dict(get_change_values(('DELETE', rrset)))
+        values['type'] = rrset.rrset_type
+        values['name'] = self.rename(values['name'])
+        if values.get('alias_hosted_zone_id'):
+            values['alias_hosted_zone_id'] = self.zone_id_map.get(
+                values['alias_hosted_zone_id'], values['alias_hosted_zone_id']
+            )
+            values['alias_dns_name'] = self.rename(values['alias_dns_name'])
+        if values.get('health_check_id'):
+            values['health_check_id'] = self.health_check_id_map.get(
+                values['health_check_id'], values['health_check_id']
+            )
+        return record_set_from_dict(
+            self.destination_zone.connection, self.destination_zone.id, values
+        )
+
+    def _read(self, cursor, output, stop_event):
+        """
+        Lists the source zone onto ``output``, as ``(rrset, cursor)``
+        tuples. The cursor is the position after the record set. Runs in
+        the reader thread.
+        """
+
+        def put(item):
+            # Gives up if the copy has been abandoned, rather than waiting
+            # forever on a queue no one is reading.
+            while not stop_event.is_set():
+                try:
+                    output.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        try:
+            listing = self.source_zone.connection._list_resource_record_sets_by_zone_id(
+                self.source_zone.id, page_chunks=self.page_chunks, cursor=cursor
+            )
+            for rrset in listing:
+                if not put((rrset, listing.cursor)):
+                    return
+            put(_DONE)
+        except Exception as exc:
+            put(exc)
+
+    def _iter_source(self, cursor, progress, cursors, stop_event):
+        """
+        Starts the reader thread, and yields the changes to make as it
+        reads. The cursor after each yielded change is appended to
+        ``cursors``.
+        """
+
+        records = queue.Queue(maxsize=max(1, self.queue_size))
+        reader = threading.Thread(
+            target=bind_deadline(self._read), args=(cursor, records, stop_event)
+        )
+        reader.daemon = True
+        reader.start()
+
+        while True:
+            item = records.get()
+            if item is _DONE:
+                break
+            if isinstance(item, Exception):
+                raise item
+
+            rrset, next_cursor = item
+            progress.read_count += 1
+            if self._is_skipped(rrset):
+                progress.skipped_count += 1
+                continue
+            if rrset._unrecognized_tags:
+                # The copy would be missing these settings.
+                progress.skipped_count += 1
+                progress.unsupported.append(
+                    (rrset.name, rrset.rrset_type, rrset.set_identifier)
+                )
+                continue
+            cursors.append(next_cursor)
+            yield 'UPSERT', self._rewrite(rrset)
+
+    def copy(self, cursor=None):
+        """
+        Copies the zone, or the rest of it.
+
+        :keyword RecordSetCursor cursor: Resume from this cursor, as found
+            on a previous copy's :py:class:`CopyProgress`.
+        :rtype: CopyProgress
+        :returns: The final progress. If the copy fails, the progress so far
+            is on :py:attr:`progress`.
+        """
+
+        progress = self.progress = CopyProgress(cursor=cursor)
+        connection = self.destination_zone.connection
+        # Cursors after each change that has been read, but not yet sent.
+        cursors = collections.deque()
+        stop_event = threading.Event()
+
+        def finish(change_set, change_info):
+            # Batches are finished in the order they were read, so that the
+            # cursor only ever moves past record sets that were copied.
+            change_count = len(change_set)
+            for _ in range(change_count - 1):
+                cursors.popleft()
+            batch_cursor = cursors.popleft()
+            progress.copied_count += change_count
+            progress.batch_count += 1
+            if batch_cursor is not None:
+                # None means the end of the listing, which isn't a position
+                # to resume from. The copy is done soon after, anyway.
+                progress.cursor = batch_cursor
+            if self.callback is not None:
+                self.callback(progress)
+
+        try:
+            send_change_sets(
+                connection,
+                batch_changes(
+                    connection, self.destination_zone.id,
+                    self._iter_source(cursor, progress, cursors, stop_event),
+                    self.batch_size,
+                ),
+                max_workers=self.max_workers, callback=finish,
+            )
+        finally:
+            stop_event.set()
+
+        progress.done = True
+        progress.cursor = None
+        if self.callback is not None:
+            self.callback(progress)
+        return progress
+
+def copy_zone(source_zone, destination_zone, cursor=None, **kwargs):
+    """
+    Copies a hosted zone's record sets into another zone. See
+    :py:class:`ZoneCopier` for the keyword arguments.
+
+    :rtype: CopyProgress
+    """
+
+    return ZoneCopier(source_zone, destination_zone, **kwargs).copy(cursor=cursor)
@@ -0,0 +1,121 @@
+"""
+Overall deadlines for API calls. Per-request timeouts bound how long any
+one request can take, but a listing may be made up of any number of
+requests. A :py:class:`Deadline` bounds the whole thing::
+
+    from route53.deadline import Deadline
+
+    with Deadline(5):
+        zones = list(conn.list_hosted_zones())
+
+Every request made inside the block (including by worker threads started
+for it, and by listings created in it, wherever they're iterated) has its
+timeouts cut down to the time that's left. Once the deadline passes,
+:py:class:`DeadlineExceededError <route53.exceptions.DeadlineExceededError>`
+is raised. For listings, it carries the cursor of the page that wasn't
+fetched, so the listing can be resumed from there.
+
+Deadlines nest. Inside another deadline, the earlier of the two applies.
+"""
+
+import threading
+import time
+from route53.exceptions import DeadlineExceededError
+
+# Holds a per-thread stack of the deadlines in effect.
+_local = threading.local()
+
+# Deadlines are measured on a clock that wall clock adjustments (NTP steps,
+# and so on) can't move. Python 2.x has no such clock in the standard
+# library.
+_clock = getattr(time, 'monotonic', time.time)
+
+def get_current_deadline():
+    """
+    :rtype: Deadline
+    :returns: The deadline in effect for the calling thread, or ``None``
+        if there isn't one.
+    """
+
+    stack = getattr(_local, 'stack', None)
+    return stack[-1] if stack else None
+
+def bind_deadline(func):
+    """
+    Binds a callable to the calling thread's current deadline, so that it
+    still applies when the callable is run later, or in another thread.
+
+    :param callable func: The callable to bind.
+    :rtype: callable
+    """
+
+    deadline = get_current_deadline()
+    if deadline is None:
+        return func
+
+    def bound(*args, **kwargs):
+        with deadline:
+            return func(*args, **kwargs)
+    return bound
+
+
+class Deadline(object):
+    """
+    A point in time by which a call must be finished. Use it as a context
+    manager to apply it to everything called within. A single instance
+    may be entered by several threads at once.
+    """
+
+    def __init__(self, timeout):
+        """
+        :param float timeout: The number of seconds from now until the
+            deadline.
+        """
+
+        self.timeout = timeout
+        self.expires_at = _clock() + timeout
+
+    def __repr__(self):
+        return '<Deadline: %.3fs remaining>' % self.remaining()
+
+    def remaining(self):
+        """
+        :rtype: float
+        :returns: The number of seconds left, which is negative once the
+            deadline has passed.
+        """
+
+        return self.expires_at - _clock()
+
+    @property
+    def expired(self):
+        """
+        :rtype: bool
+        :returns: ``True`` if the deadline has passed.
+        """
+
+        return self.remaining() <= 0
+
+    def check(self, cursor=None):
+        """
+        :keyword ListingCursor cursor: The position to report, if the
+            deadline has passed.
+        :raises: DeadlineExceededError if the deadline has passed.
+        """
+
+        if self.expired:
+            raise DeadlineExceededError(self.timeout, cursor=cursor)
+
+    def __enter__(self):
+        stack = getattr(_local, 'stack', None)
+        if stack is None:
+            stack = _local.stack = []
+        # An outer deadline that's sooner stays in effect.
+        if stack and stack[-1].expires_at <= self.expires_at:
+            stack.append(stack[-1])
+        else:
+            stack.append(self)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        _local.stack.pop()
@@ -3,9 +3,16 @@ class Route53Error(Exception):
     """
     Base class for all Route53 API exceptions. Mostly here to allow end
     users to catch all Route53 exceptions.
+
+    Most of these mean that the request was turned down (or never sent),
+    so nothing was changed. Those where the request may have been acted on
+    before it failed (a timeout after it was sent, say) have
+    ``outcome_unknown`` set. Check before re-sending a change after one of
+    those.
     """
 
-    pass
+    #: ``True`` if the failed request may still have been carried out.
+    outcome_unknown = False
 
 
 class AlreadyDeletedError(Route53Error):
@@ -14,4 +21,83 @@ class AlreadyDeletedError(Route53Error):
     has been deleted in Route53.
     """
 
-    pass
\ No newline at end of file
+    pass
+
+class ChangeSetValidationError(Route53Error):
+    """
+    Raised when a change set fails local validation, before it is sent.
+    ``problems`` holds a description of each of the problems that were
+    found.
+    """
+
+    def __init__(self, problems):
+        self.problems = problems
+        super(ChangeSetValidationError, self).__init__(
+            'Change set has %d problem(s):\n  %s' % (
+                len(problems), '\n  '.join(problems)
+            )
+        )
+
+
+class Route53APIError(Route53Error):
+    """
+    Raised when the Route53 API responds with an error. ``code`` holds
+    the error code (``NoSuchHostedZone``, ``Throttling``, etc).
+    """
+
+    #: Error codes for failures on Route53's side, which may come after the
+    #: request was carried out.
+    SERVER_ERROR_CODES = frozenset(['InternalFailure', 'InternalError', 'ServiceUnavailable'])
+
+    def __init__(self, code, message):
+        self.code = code
+        self.message = message
+        self.outcome_unknown = code in self.SERVER_ERROR_CODES
+        super(Route53APIError, self).__init__(message)
+
+
+class Route53HTTPError(Route53Error):
+    """
+    Raised by transports when the Route53 API responds with an HTTP error
+    status to a request that has no error body for us to parse.
+    """
+
+    def __init__(self, status_code, reason, body=None):
+        self.status_code = status_code
+        self.reason = reason
+        self.body = body
+        # Server errors may come after the request was carried out.
+        self.outcome_unknown = status_code >= 500
+        super(Route53HTTPError, self).__init__(
+            'HTTP %d: %s' % (status_code, reason)
+        )
+
+
+class DeadlineExceededError(Route53Error):
+    """
+    Raised when a call runs past its
+    :py:class:`Deadline <route53.deadline.Deadline>`. For listings,
+    ``cursor`` holds the position of the first item that wasn't fetched,
+    which a new listing can be resumed from. Otherwise, it's ``None``.
+
+    The deadline may pass after a request was sent, so whether a change
+    that was in flight was applied is unknown.
+    """
+
+    outcome_unknown = True
+
+    def __init__(self, timeout, cursor=None):
+        self.timeout = timeout
+        self.cursor = cursor
+        super(DeadlineExceededError, self).__init__(
+            'Deadline of %gs exceeded' % timeout
+        )
+
+
+class CassetteMissError(Route53Error):
+    """
+    Raised by :py:class:`ReplayTransport <route53.cassette.ReplayTransport>`
+    for a request that isn't in its cassette.
+    """
+
+    pass
@@ -1,6 +1,8 @@
-from route53.change_set import ChangeSet
+from route53.change_set import ChangeSet, batch_changes, send_change_sets
 from route53.exceptions import AlreadyDeletedError
+from route53.partitioning import list_record_sets_partitioned
 from route53.resource_record_set import AResourceRecordSet, AAAAResourceRecordSet, CNAMEResourceRecordSet, MXResourceRecordSet, NSResourceRecordSet, PTRResourceRecordSet, SOAResourceRecordSet, SPFResourceRecordSet, SRVResourceRecordSet, TXTResourceRecordSet
+from route53.util import is_apex_record_set
 
 class HostedZone(object):
     """
@@ -77,25 +79,105 @@ class HostedZone(object):
         .. warning:: This result set can get pretty large if you have a ton
             of records.
 
+        :rtype: :py:class:`PaginatedListing <route53.pagination.PaginatedListing>`
+        :returns: An iterator of ResourceRecordSet sub-classes.
+        """
+
+        return self.list_record_sets()
+
+    def list_record_sets(self, cursor=None, page_chunks=100):
+        """
+        Like :py:attr:`record_sets`, but allows resuming an earlier listing.
+        The returned iterator's ``cursor`` attribute always holds the
+        position of the next record set. It may be serialized with
+        :py:meth:`RecordSetCursor.serialize <route53.pagination.ListingCursor.serialize>`
+        and handed back to this method (after
+        :py:meth:`RecordSetCursor.deserialize <route53.pagination.ListingCursor.deserialize>`)
+        to pick up exactly where the listing stopped.
+
+        :keyword RecordSetCursor cursor: Where to start the listing. If not
+            specified, we start at the beginning.
+        :keyword int page_chunks: The maximum number of record sets to
+            retrieve per request.
+        :rtype: :py:class:`PaginatedListing <route53.pagination.PaginatedListing>`
+        :returns: An iterator of ResourceRecordSet sub-classes.
+        """
+
+        return self.connection._list_resource_record_sets_by_zone_id(
+            self.id,
+            page_chunks=page_chunks,
+            cursor=cursor,
+        )
+
+    def list_record_sets_partitioned(self, split_points, max_workers=4,
+                                     page_chunks=100, queue_size=1000):
+        """
+        Lists this zone's record sets with the zone split into name ranges,
+        which are listed concurrently. Record sets come out in the same
+        order as :py:attr:`record_sets`, with no duplicates or gaps. See
+        :py:func:`list_record_sets_partitioned <route53.partitioning.list_record_sets_partitioned>`
+        for details.
+
+        :param iterable split_points: Names to split the zone at.
+        :keyword int max_workers: The maximum number of ranges to list at once.
+        :keyword int page_chunks: The maximum number of record sets per request.
+        :keyword int queue_size: The maximum number of record sets each
+            range gets ahead of the consumer.
         :rtype: generator
         :returns: A generator of ResourceRecordSet sub-classes.
         """
 
-        for rrset in self.connection._list_resource_record_sets_by_zone_id(self.id):
-            yield rrset
+        return list_record_sets_partitioned(
+            self.connection, self.id, split_points,
+            max_workers=max_workers,
+            page_chunks=page_chunks,
+            queue_size=queue_size,
+        )
+
+    def iter_record_set_pages(self, cursor=None, page_chunks=100):
+        """
+        Like :py:meth:`list_record_sets`, but yields whole pages of record
+        sets at a time. Each page carries the cursor of the page after it,
+        so batch consumers can checkpoint between pages.
+
+        :keyword RecordSetCursor cursor: Where to start the listing. If not
+            specified, we start at the beginning.
+        :keyword int page_chunks: The maximum number of record sets per page.
+        :rtype: generator
+        :returns: A generator of
+            :py:class:`ListingPage <route53.pagination.ListingPage>`
+            instances, each holding a list of ResourceRecordSet sub-classes.
+        """
+
+        return self.connection._list_resource_record_sets_by_zone_id(
+            self.id,
+            page_chunks=page_chunks,
+            cursor=cursor,
+            by_page=True,
+        )
 
-    def delete(self, force=False):
+    def delete(self, force=False, batch_size=100, max_workers=1):
         """
         Deletes this hosted zone. After this method is ran, you won't be able
         to add records, or do anything else with the zone. You'd need to
         re-create it, as zones are read-only after creation.
 
+        When forcing deletion, record sets are streamed out of the zone and
+        deleted in batches as they are listed, so memory use stays flat no
+        matter how big the zone is. If this gets interrupted part way
+        through, just call it again: the record sets that were already
+        deleted are gone, and the rest are picked up from there.
+
         :keyword bool force: If ``True``, delete the
             :py:class:`HostedZone <route53.hosted_zone.HostedZone>`, even if it
             means nuking all associated record sets. If ``False``, an
             exception is raised if this
             :py:class:`HostedZone <route53.hosted_zone.HostedZone>`
             has record sets.
+        :keyword int batch_size: When forcing, the maximum number of record
+            sets to delete per change request.
+        :keyword int max_workers: When forcing, the maximum number of change
+            requests to have in flight at once.
         :rtype: dict
         :returns: A dict of change info, which contains some details about
             the request.
@@ -104,19 +186,8 @@ class HostedZone(object):
         self._halt_if_already_deleted()
 
         if force:
-            # Forcing deletion by cleaning up all record sets first. We'll
-            # do it all in one change set.
-            cset = ChangeSet(connection=self.connection, hosted_zone_id=self.id)
-
-            for rrset in self.record_sets:
-                # You can delete a HostedZone if there are only SOA and NS
-                # entries left. So delete everything but SOA/NS entries.
-                if rrset.rrset_type not in ['SOA', 'NS']:
-                    cset.add_change('DELETE', rrset)
-
-            if cset.deletions or cset.creations:
-                # Bombs away.
-                self.connection._change_resource_record_sets(cset)
+            # Forcing deletion by cleaning up all record sets first.
+            self._delete_record_sets(batch_size, max_workers)
 
         # Now delete the HostedZone.
         retval = self.connection.delete_hosted_zone_by_id(self.id)
@@ -126,6 +197,29 @@ class HostedZone(object):
 
         return retval
 
+    def _delete_record_sets(self, batch_size, max_workers):
+        """
+        Deletes every record set that stands in the way of deleting this
+        zone, in bounded batches. Batches are sent while the listing is
+        still running, with up to ``max_workers`` in flight at once.
+
+        :param int batch_size: The maximum number of record sets per batch.
+        :param int max_workers: The maximum number of batches in flight.
+        """
+
+        # You can delete a HostedZone if there are only the SOA and NS
+        # entries at its apex left. So delete everything else, including NS
+        # delegations to sub-domains.
+        changes = (
+            ('DELETE', rrset) for rrset in self.record_sets
+            if not is_apex_record_set(rrset.rrset_type, rrset.name, self.name)
+        )
+        send_change_sets(
+            self.connection,
+            batch_changes(self.connection, self.id, changes, batch_size),
+            max_workers=max_workers,
+        )
+
     def _halt_if_already_deleted(self):
         """
         Convenience method used to raise an AlreadyDeletedError exception if
@@ -0,0 +1,473 @@
+"""
+A crash-safe, append-only journal for large change pipelines. Every change
+batch is written to the journal (and synced to disk) before it is sent to
+Route53, and the outcome is written once the response comes back.
+
+If the process dies part way through, re-running the same pipeline with
+the same journal skips the batches that were applied, and checks the
+zone to find out whether the batches that were in flight at the time of
+the crash made it or not. That costs a request or two per uncertain
+record set, rather than a full re-diff of the zone.
+
+Journal files hold one JSON document per line. A torn final line (from a
+crash mid-write) is discarded when the journal is loaded.
+"""
+
+import collections
+import hashlib
+import json
+import os
+import threading
+from route53.exceptions import Route53APIError
+from route53.util import normalize_dns_name, parse_iso_8601_time_str
+from route53.validation import get_comparable_values
+from route53.xml_generators.change_resource_record_set import get_change_values
+
+# The values we journal for each change, and compare when verifying.
+JOURNALED_CHANGE_FIELDS = (
+    'name', 'ttl', 'records', 'weight', 'region', 'set_identifier',
+    'failover', 'geolocation', 'health_check_id',
+    'alias_hosted_zone_id', 'alias_dns_name', 'alias_evaluate_target_health',
+)
+
+# Batch states.
+BATCH_PENDING = 'pending'
+BATCH_APPLIED = 'applied'
+BATCH_FAILED = 'failed'
+
+def serialize_change_set(change_set):
+    """
+    Turns a ChangeSet into plain data that can be journaled.
+
+    :param ChangeSet change_set: The change set to serialize.
+    :rtype: list
+    :returns: A list of change dicts, in the order they are sent.
+    """
+
+    changes = []
+    for change in change_set.get_changes():
+        action, rrset = change
+        values = get_change_values(change)
+        serialized = dict(
+            (field, values.get(field)) for field in JOURNALED_CHANGE_FIELDS
+        )
+        serialized['records'] = list(serialized['records'] or [])
+        if serialized['weight'] is not None:
+            serialized['weight'] = str(serialized['weight'])
+        serialized['action'] = action
+        serialized['type'] = rrset.rrset_type
+        changes.append(serialized)
+    return changes
+
+def get_batch_id(zone_id, changes, occurrence=0):
+    """
+    Computes a stable ID for a change batch. Re-running a pipeline produces
+    the same batches, and therefore the same IDs.
+
+    :param str zone_id: The hosted zone the batch applies to.
+    :param list changes: The batch's changes, from
+        :py:func:`serialize_change_set`.
+    :keyword int occurrence: How many identical batches came before this
+        one in the pipeline. This keeps a batch that is legitimately sent
+        twice (say, re-creating a record after deleting it) from being
+        mistaken for one that was already applied.
+    :rtype: str
+    """
+
+    document = json.dumps([zone_id, changes, occurrence], sort_keys=True)
+    return hashlib.sha1(document.encode('utf-8')).hexdigest()
+
+
+class ChangeJournal(object):
+    """
+    An on-disk journal of change batches. Pass one to
+    :py:meth:`Route53Connection.apply_change_sets <route53.connection.Route53Connection.apply_change_sets>`
+    to make a pipeline resumable.
+
+    Journals are thread-safe. Concurrent submitters share fsync calls: a
+    batch's entry only needs to be on disk before the batch is sent, and
+    one fsync covers every entry written before it started.
+    """
+
+    def __init__(self, path, sync_results_every=100):
+        """
+        :param str path: Where to keep the journal. An existing journal at
+            this path is loaded, and appended to.
+        :keyword int sync_results_every: Results are synced to disk after
+            this many have been written (and when the journal is closed).
+            Losing a result in a crash is safe, since the batch is verified
+            against the zone on the next run.
+        """
+
+        self.path = path
+        self.sync_results_every = sync_results_every
+        self._batches = {}
+        self._write_lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        # Sequence numbers of the last entry written, and the last synced.
+        self._written_seq = 0
+        self._synced_seq = 0
+        self._unsynced_results = 0
+        # How many times each batch's contents have been submitted in this
+        # run. See get_batch_id().
+        self._occurrences = collections.Counter()
+
+        self._load()
+        self._file = open(path, 'a')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _load(self):
+        """
+        Replays an existing journal file into the batch state table.
+        """
+
+        if not os.path.exists(self.path):
+            return
+
+        good_length = 0
+        with open(self.path, 'rb') as fobj:
+            for line in fobj:
+                try:
+                    if not line.endswith(b'\n'):
+                        raise ValueError("Incomplete entry.")
+                    entry = json.loads(line.decode('utf-8'))
+                except ValueError:
+                    # A torn write from a crash. Anything after it is
+                    # suspect too.
+                    break
+                self._apply_entry(entry)
+                good_length += len(line)
+
+        if good_length != os.path.getsize(self.path):
+            # Chop off the torn write, so that new entries don't get glued
+            # on to the end of it.
+            with open(self.path, 'r+b') as fobj:
+                fobj.truncate(good_length)
+
+    def _apply_entry(self, entry):
+        """
+        Updates the batch state table with a journal entry.
+
+        :param dict entry: A journal entry.
+        """
+
+        event = entry['event']
+        if event == 'intent':
+            self._batches[entry['batch_id']] = {
+                'state': BATCH_PENDING,
+                'zone_id': entry['zone_id'],
+                'changes': entry['changes'],
+                'change_info': None,
+            }
+            return
+
+        batch = self._batches.get(entry['batch_id'])
+        if batch is None:
+            return
+        if event in ('applied', 'verified'):
+            batch['state'] = BATCH_APPLIED
+            batch['change_info'] = entry.get('change_info')
+        elif event == 'failed':
+            batch['state'] = BATCH_FAILED
+
+    def _write(self, entry):
+        """
+        Appends an entry to the journal file, without syncing it.
+
+        :param dict entry: The entry to write.
+        :rtype: int
+        :returns: The entry's sequence number.
+        """
+
+        line = json.dumps(entry, sort_keys=True) + '\n'
+        with self._write_lock:
+            self._apply_entry(entry)
+            self._file.write(line)
+            self._file.flush()
+            self._written_seq += 1
+            return self._written_seq
+
+    def _sync(self, seq):
+        """
+        Makes sure everything up to and including entry ``seq`` is on disk.
+        If another thread's fsync already covered it, this returns right
+        away.
+
+        :param int seq: An entry sequence number.
+        """
+
+        if self._synced_seq >= seq:
+            return
+        with self._sync_lock:
+            if self._synced_seq >= seq:
+                return
+            # Everything written so far is covered by this fsync.
+            target = self._written_seq
+            os.fsync(self._file.fileno())
+            self._synced_seq = target
+
+    def get_batch(self, batch_id):
+        """
+        :param str batch_id: A batch ID, from :py:func:`get_batch_id`.
+        :rtype: dict
+        :returns: The batch's journaled state, or ``None`` if it isn't in
+            the journal. The ``state`` key is one of ``'pending'``
+            (sent, with an unknown outcome), ``'applied'`` or ``'failed'``.
+        """
+
+        return self._batches.get(batch_id)
+
+    def get_pending_batch_ids(self):
+        """
+        :rtype: list
+        :returns: The IDs of the batches whose outcome is unknown.
+        """
+
+        return [
+            batch_id for batch_id, batch in self._batches.items()
+            if batch['state'] == BATCH_PENDING
+        ]
+
+    def record_intent(self, batch_id, zone_id, changes):
+        """
+        Journals a batch that is about to be sent. This is synced to disk
+        before returning.
+
+        :param str batch_id: The batch's ID.
+        :param str zone_id: The hosted zone the batch applies to.
+        :param list changes: The batch's serialized changes.
+        """
+
+        seq = self._write({
+            'event': 'intent',
+            'batch_id': batch_id,
+            'zone_id': zone_id,
+            'changes': changes,
+        })
+        self._sync(seq)
+
+    def record_applied(self, batch_id, change_info, verified=False):
+        """
+        Journals a batch that Route53 accepted.
+
+        :param str batch_id: The batch's ID.
+        :param dict change_info: The change info returned by Route53, or
+            ``None`` if the batch was verified against the zone instead.
+        :keyword bool verified: ``True`` if we found out that the batch was
+            applied by checking the zone.
+        """
+
+        if change_info is not None:
+            change_info = dict(change_info)
+            submitted_at = change_info.get('request_submitted_at')
+            if submitted_at is not None:
+                change_info['request_submitted_at'] = \
+                    submitted_at.strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + 'Z'
+
+        self._write_result({
+            'event': 'verified' if verified else 'applied',
+            'batch_id': batch_id,
+            'change_info': change_info,
+        })
+
+    def record_failed(self, batch_id, error):
+        """
+        Journals a batch that Route53 rejected.
+
+        :param str batch_id: The batch's ID.
+        :param str error: The error message.
+        """
+
+        self._write_result({
+            'event': 'failed',
+            'batch_id': batch_id,
+            'error': error,
+        })
+
+    def _write_result(self, entry):
+        seq = self._write(entry)
+        with self._write_lock:
+            self._unsynced_results += 1
+            should_sync = self._unsynced_results >= self.sync_results_every
+            if should_sync:
+                self._unsynced_results = 0
+        if should_sync:
+            self._sync(seq)
+
+    def get_change_info(self, batch_id):
+        """
+        :param str batch_id: The ID of an applied batch.
+        :rtype: dict
+        :returns: The change info journaled for the batch, in the same form
+            ``_change_resource_record_sets`` returns it.
+        """
+
+        change_info = self._batches[batch_id]['change_info']
+        if change_info is None:
+            return None
+        change_info = dict(change_info)
+        if change_info.get('request_submitted_at'):
+            change_info['request_submitted_at'] = parse_iso_8601_time_str(
+                change_info['request_submitted_at']
+            )
+        return change_info
+
+    def submit(self, connection, change_set, comment=None):
+        """
+        Sends a change set, journaling it before it goes out and recording
+        the outcome once it comes back.
+
+        If the journal already shows this batch as applied (from an earlier,
+        interrupted run), nothing is sent. If the earlier run crashed while
+        the batch was in flight, the zone is checked first, and the batch
+        is only sent again if it didn't make it.
+
+        :param Route53Connection connection: The connection to send with.
+        :param ChangeSet change_set: The change set to send.
+        :keyword str comment: An optional comment to go along with the request.
+        :rtype: dict
+        :returns: A dict of change info. This is ``None`` if the batch was
+            found to be applied by checking the zone, since the original
+            response was lost.
+        """
+
+        zone_id = change_set.hosted_zone_id
+        changes = serialize_change_set(change_set)
+        content_id = get_batch_id(zone_id, changes)
+        with self._write_lock:
+            occurrence = self._occurrences[content_id]
+            self._occurrences[content_id] += 1
+        batch_id = get_batch_id(zone_id, changes, occurrence)
+
+        batch = self.get_batch(batch_id)
+        if batch is not None:
+            if batch['state'] == BATCH_APPLIED:
+                return self.get_change_info(batch_id)
+            if batch['state'] == BATCH_PENDING and \
+               self.verify_batch(connection, batch_id):
+                return None
+
+        self.record_intent(batch_id, zone_id, changes)
+        try:
+            change_info = connection._change_resource_record_sets(
+                change_set, comment=comment
+            )
+        except Route53APIError as exc:
+            # Route53 turned the batch down, so it definitely wasn't
+            # applied. Anything else (a timeout, a transport error, or an
+            # internal failure on Route53's side) may have struck after the
+            # batch was applied, so it's left pending, to be verified on
+            # the next run.
+            if not exc.outcome_unknown:
+                self.record_failed(batch_id, str(exc))
+            raise
+        self.record_applied(batch_id, change_info)
+        return change_info
+
+    def verify_pending(self, connection):
+        """
+        Checks each batch with an unknown outcome against the current state
+        of its zone, and journals the batches that turn out to have been
+        applied. Batches that weren't applied are left pending, and will be
+        sent again when the pipeline re-submits them.
+
+        :param Route53Connection connection: The connection to check with.
+        :rtype: tuple
+        :returns: A tuple in the form of ``(applied, not_applied)``, each a
+            list of batch IDs.
+        """
+
+        applied = []
+        not_applied = []
+        for batch_id in self.get_pending_batch_ids():
+            if self.verify_batch(connection, batch_id):
+                applied.append(batch_id)
+            else:
+                not_applied.append(batch_id)
+        return applied, not_applied
+
+    def verify_batch(self, connection, batch_id):
+        """
+        Checks whether a batch has been applied, by looking up each of the
+        record sets it touches. Journals the batch as applied if so.
+
+        :param Route53Connection connection: The connection to check with.
+        :param str batch_id: The ID of a batch in the journal.
+        :rtype: bool
+        :returns: ``True`` if the zone reflects the batch's changes.
+        """
+
+        batch = self._batches[batch_id]
+
+        # Batches are applied atomically and in order, so the last change
+        # to each record set determines what the zone should look like.
+        expected = {}
+        for change in batch['changes']:
+            expected[_change_key(change)] = change
+
+        for change in expected.values():
+            current = _lookup_record_set(connection, batch['zone_id'], change)
+            if change['action'] == 'DELETE':
+                is_applied = current is None or not _values_match(change, current)
+            else:
+                is_applied = current is not None and _values_match(change, current)
+            if not is_applied:
+                return False
+
+        self.record_applied(batch_id, None, verified=True)
+        return True
+
+    def close(self):
+        """
+        Syncs any outstanding entries to disk, and closes the journal file.
+        """
+
+        if self._file.closed:
+            return
+        self._sync(self._written_seq)
+        self._file.close()
+
+
+def _change_key(change):
+    return (
+        normalize_dns_name(change['name']),
+        change['type'],
+        change.get('set_identifier'),
+    )
+
+def _lookup_record_set(connection, zone_id, change):
+    """
+    Fetches the record set a journaled change applies to.
+
+    :rtype: ResourceRecordSet
+    :returns: The record set, or ``None`` if it doesn't exist.
+    """
+
+    listing = connection._list_resource_record_sets_by_zone_id(
+        zone_id,
+        name=change['name'],
+        rrset_type=change['type'],
+        identifier=change.get('set_identifier'),
+        page_chunks=1,
+    )
+    for rrset in listing:
+        if normalize_dns_name(rrset.name) == normalize_dns_name(change['name']) and \
+           rrset.rrset_type == change['type'] and \
+           rrset.set_identifier == change.get('set_identifier'):
+            return rrset
+        return None
+    return None
+
+def _values_match(change, rrset):
+    """
+    :rtype: bool
+    :returns: ``True`` if the record set holds the change's values.
+    """
+
+    return get_comparable_values(change) == \
+        get_comparable_values(get_change_values(('DELETE', rrset)))
@@ -0,0 +1,288 @@
+"""
+Pagination helpers for the Route53 API's list calls. A cursor captures a
+position within a listing, and can be serialized so that an interrupted
+listing can be resumed later (even from another process) exactly where it
+stopped.
+"""
+
+class ListingCursor(object):
+    """
+    Base class for listing cursors. A cursor identifies the next item a
+    listing will return. Sub-classes list the fields that make up the
+    position in ``fields``, and know how to turn them into request params.
+    """
+
+    # Override this in your sub-class.
+    fields = ()
+
+    def __init__(self, **kwargs):
+        for field in self.fields:
+            setattr(self, field, kwargs.pop(field, None))
+        if kwargs:
+            raise TypeError("Unexpected cursor fields: %s" % ', '.join(kwargs))
+
+    def __repr__(self):
+        return '<%s: %s>' % (
+            self.__class__.__name__,
+            ', '.join('%s=%r' % (field, getattr(self, field)) for field in self.fields),
+        )
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.to_dict() == other.to_dict()
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash(tuple(getattr(self, field) for field in self.fields))
+
+    def is_start(self):
+        """
+        :rtype: bool
+        :returns: ``True`` if this cursor points at the start of a listing.
+        """
+
+        return all(getattr(self, field) is None for field in self.fields)
+
+    def to_dict(self):
+        """
+        :rtype: dict
+        :returns: A dict representation of the cursor.
+        """
+
+        return dict((field, getattr(self, field)) for field in self.fields)
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        :param dict data: A dict, as returned by :py:meth:`to_dict`.
+        :rtype: ListingCursor
+        """
+
+        return cls(**data)
+
+    def serialize(self):
+        """
+        :rtype: str
+        :returns: A JSON representation of the cursor, suitable for storing
+            and handing to :py:meth:`deserialize` later.
+        """
+
+        import json
+
+        return json.dumps(self.to_dict(), sort_keys=True)
+
+    @classmethod
+    def deserialize(cls, data):
+        """
+        :param str data: A string, as returned by :py:meth:`serialize`.
+        :rtype: ListingCursor
+        """
+
+        import json
+
+        return cls.from_dict(json.loads(data))
+
+    def to_params(self):
+        """
+        :rtype: dict
+        :returns: The request params that start a listing at this cursor.
+        """
+
+        raise NotImplementedError
+
+    @classmethod
+    def from_item(cls, item):
+        """
+        :param item: An object returned by the listing.
+        :rtype: ListingCursor
+        :returns: A cursor that starts a listing at ``item``.
+        """
+
+        raise NotImplementedError
+
+    @classmethod
+    def from_response(cls, root):
+        """
+        :param lxml.etree._Element root: The root node of a list response.
+        :rtype: ListingCursor
+        :returns: The cursor for the next page, or ``None`` if this was the
+            last page.
+        """
+
+        raise NotImplementedError
+
+
+class HostedZoneCursor(ListingCursor):
+    """
+    A position within a ListHostedZones listing. ``marker`` is the ID of
+    the next hosted zone.
+    """
+
+    fields = ('marker',)
+
+    def to_params(self):
+        return {'marker': self.marker} if self.marker else {}
+
+    @classmethod
+    def from_item(cls, zone):
+        return cls(marker=zone.id)
+
+    @classmethod
+    def from_response(cls, root):
+        e_marker = root.find('./{*}NextMarker')
+        if e_marker is None:
+            return None
+        return cls(marker=e_marker.text)
+
+
+class RecordSetCursor(ListingCursor):
+    """
+    A position within a ListResourceRecordSets listing. This is the name,
+    type and (for weighted and latency record sets) set identifier of the
+    next record set.
+    """
+
+    fields = ('name', 'rrset_type', 'identifier')
+
+    def to_params(self):
+        params = {}
+        if self.name:
+            params['name'] = self.name
+        if self.rrset_type:
+            params['type'] = self.rrset_type
+        if self.identifier:
+            params['identifier'] = self.identifier
+        return params
+
+    @classmethod
+    def from_item(cls, rrset):
+        return cls(
+            name=rrset.name,
+            rrset_type=rrset.rrset_type,
+            identifier=rrset.set_identifier,
+        )
+
+    @classmethod
+    def from_response(cls, root):
+        e_name = root.find('./{*}NextRecordName')
+        if e_name is None:
+            return None
+        e_type = root.find('./{*}NextRecordType')
+        e_identifier = root.find('./{*}NextRecordIdentifier')
+        return cls(
+            name=e_name.text,
+            rrset_type=e_type.text if e_type is not None else None,
+            identifier=e_identifier.text if e_identifier is not None else None,
+        )
+
+
+class ListingPage(object):
+    """
+    A single page of results from a paginated list call. Iterating over a
+    page yields its items.
+    """
+
+    def __init__(self, items, item_count, is_truncated, next_cursor):
+        """
+        :param list items: The objects parsed from the page.
+        :param int item_count: The number of items in the raw response.
+        :param bool is_truncated: ``True`` if there are more pages after
+            this one.
+        :param ListingCursor next_cursor: The position of the first item on
+            the next page, or ``None`` if this is the last page.
+        """
+
+        self.items = items
+        self.item_count = item_count
+        self.is_truncated = is_truncated
+        self.next_cursor = next_cursor
+
+    def __repr__(self):
+        return '<ListingPage: %d items, is_truncated=%s>' % (
+            self.item_count, self.is_truncated
+        )
+
+    def __len__(self):
+        return len(self.items)
+
+    def __iter__(self):
+        return iter(self.items)
+
+
+def iter_listing_pages(fetch_page, cursor_class, cursor=None):
+    """
+    Iterates over the pages of a paginated list call.
+
+    :param callable fetch_page: Given a cursor, returns the
+        :py:class:`ListingPage` starting there.
+    :param type cursor_class: The :py:class:`ListingCursor` sub-class
+        used by this listing.
+    :keyword ListingCursor cursor: Where to start the listing. If not
+        specified, we start at the beginning.
+    :rtype: generator
+    :returns: A generator of :py:class:`ListingPage` instances.
+    """
+
+    cursor = cursor or cursor_class()
+    while cursor is not None:
+        page = fetch_page(cursor)
+        yield page
+        cursor = page.next_cursor
+
+
+class PaginatedListing(object):
+    """
+    An iterator over the items of a paginated list call. Pages are fetched
+    lazily, as the items are consumed.
+
+    At any point, :py:attr:`cursor` holds the position of the next item
+    to be returned. Starting a new listing from that cursor picks up
+    exactly where this one left off, without repeating or skipping items.
+    """
+
+    def __init__(self, fetch_page, cursor_class, cursor=None):
+        """
+        :param callable fetch_page: Given a cursor, returns the
+            :py:class:`ListingPage` starting there.
+        :param type cursor_class: The :py:class:`ListingCursor` sub-class
+            used by this listing.
+        :keyword ListingCursor cursor: Where to start the listing. If not
+            specified, we start at the beginning.
+        """
+
+        self._fetch_page = fetch_page
+        self._cursor_class = cursor_class
+        self._page = []
+        self._page_pos = 0
+        self._next_cursor = cursor or cursor_class()
+
+    def __iter__(self):
+        return self
+
+    @property
+    def cursor(self):
+        """
+        :rtype: ListingCursor
+        :returns: The position of the next item in the listing, or ``None``
+            once the listing has been exhausted.
+        """
+
+        if self._page_pos < len(self._page):
+            return self._cursor_class.from_item(self._page[self._page_pos])
+        return self._next_cursor
+
+    def __next__(self):
+        while self._page_pos >= len(self._page):
+            if self._next_cursor is None:
+                raise StopIteration
+            page = self._fetch_page(self._next_cursor)
+            self._page, self._next_cursor = page.items, page.next_cursor
+            self._page_pos = 0
+
+        item = self._page[self._page_pos]
+        self._page_pos += 1
+        return item
+
+    # Python 2.x compatibility.
+    next = __next__
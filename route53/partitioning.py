@@ -0,0 +1,187 @@
+"""
+Parallel listing of a single hosted zone. ListResourceRecordSets can only
+be paginated serially, since each page starts where the previous one
+ended. However, a listing may start at any name. By splitting a zone into
+name ranges at a few split points, each range can be listed concurrently
+and the results stitched back together in Route53's canonical order.
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+try:
+    import queue
+except ImportError:
+    # Python 2.x.
+    import Queue as queue
+from route53.deadline import bind_deadline
+from route53.util import canonical_name_key
+
+# Marks the end of a range on its queue.
+_DONE = object()
+
+def split_points_from_prefixes(zone_name, prefixes):
+    """
+    Builds split points from label prefixes under a zone. For example,
+    ``['g', 'n', 't']`` under ``example.com.`` splits the zone into
+    four ranges.
+
+    :param str zone_name: The name of the hosted zone.
+    :param list prefixes: A list of label prefixes.
+    :rtype: list
+    :returns: A list of split point names.
+    """
+
+    zone_name = zone_name.rstrip('.') + '.'
+    return ['%s.%s' % (prefix, zone_name) for prefix in prefixes]
+
+def split_points_from_names(names, partitions):
+    """
+    Picks split points that divide a set of record names (typically from a
+    previous listing of the same zone) into evenly sized ranges.
+
+    :param iterable names: Record set names, in any order.
+    :param int partitions: The number of ranges to split into.
+    :rtype: list
+    :returns: A list of at most ``partitions - 1`` split point names.
+    """
+
+    names_by_key = {}
+    for name in names:
+        names_by_key.setdefault(canonical_name_key(name), name)
+
+    keys = sorted(names_by_key)
+    if partitions < 2 or len(keys) < 2:
+        return []
+
+    partitions = min(partitions, len(keys))
+    split_keys = []
+    for i in range(1, partitions):
+        key = keys[len(keys) * i // partitions]
+        if not split_keys or key != split_keys[-1]:
+            split_keys.append(key)
+    return [names_by_key[key] for key in split_keys]
+
+def _normalize_split_points(split_points):
+    """
+    Sorts split points in canonical order and drops duplicates.
+
+    :param iterable split_points: Split point names.
+    :rtype: list
+    :returns: A list of ``(name, canonical_key)`` tuples.
+    """
+
+    seen = set()
+    normalized = []
+    for name in split_points:
+        key = canonical_name_key(name)
+        if key not in seen:
+            seen.add(key)
+            normalized.append((name, key))
+    normalized.sort(key=lambda point: point[1])
+    return normalized
+
+def _list_name_range(connection, zone_id, start_name, stop_key, page_chunks,
+                     output, stop_event):
+    """
+    Lists the record sets from ``start_name`` (inclusive) up to the first
+    name whose canonical key is ``stop_key`` or greater, onto ``output``.
+    The listing is followed by ``_DONE``, or by the exception that ended it.
+    Runs in a worker thread.
+    """
+
+    def put(item):
+        # Gives up if the listing has been abandoned, rather than waiting
+        # forever on a queue no one is reading.
+        while not stop_event.is_set():
+            try:
+                output.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    try:
+        listing = connection._list_resource_record_sets_by_zone_id(
+            zone_id,
+            name=start_name,
+            page_chunks=page_chunks,
+        )
+        for rrset in listing:
+            if stop_key is not None and canonical_name_key(rrset.name) >= stop_key:
+                # The rest of the zone belongs to the next range.
+                break
+            if not put(rrset):
+                return
+        put(_DONE)
+    except Exception as exc:
+        put(exc)
+
+def list_record_sets_partitioned(connection, zone_id, split_points,
+                                 max_workers=4, page_chunks=100,
+                                 queue_size=1000):
+    """
+    Lists all of a hosted zone's record sets, with the zone split into
+    name ranges that are listed concurrently. The record sets are yielded
+    in the same order, and exactly once each, as a serial listing would.
+
+    The first range starts at the beginning of the zone, each split point
+    starts another range, and each range stops where the next one begins.
+    Split points don't need to be the names of existing record sets.
+
+    Record sets are yielded as they're listed. Ranges that are ahead of the
+    one being yielded hold up to ``queue_size`` record sets each, and then
+    wait, so memory use doesn't grow with the size of the zone.
+
+    :param Route53Connection connection: The connection to list with.
+    :param str zone_id: The ID of the hosted zone to list.
+    :param iterable split_points: Names to split the zone at. See
+        :py:func:`split_points_from_prefixes` and
+        :py:func:`split_points_from_names`.
+    :keyword int max_workers: The maximum number of ranges to list at once.
+    :keyword int page_chunks: The maximum number of record sets per request.
+    :keyword int queue_size: The maximum number of record sets each range
+        gets ahead of the consumer.
+    :rtype: generator
+    :returns: A generator of ResourceRecordSet sub-class instances.
+    """
+
+    points = _normalize_split_points(split_points)
+
+    ranges = []
+    start_name = None
+    for name, key in points:
+        ranges.append((start_name, key))
+        start_name = name
+    ranges.append((start_name, None))
+
+    stop_event = threading.Event()
+    executor = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(ranges))))
+    futures = []
+    try:
+        outputs = []
+        for range_start, range_stop_key in ranges:
+            output = queue.Queue(maxsize=max(1, queue_size))
+            futures.append(executor.submit(
+                bind_deadline(_list_name_range), connection, zone_id,
+                range_start, range_stop_key, page_chunks, output, stop_event
+            ))
+            outputs.append(output)
+
+        # Ranges are yielded in order, so the output is in canonical order
+        # even though the ranges complete in any order. A range that hasn't
+        # started yet gets a worker once an earlier one is drained.
+        for output in outputs:
+            while True:
+                item = output.get()
+                if item is _DONE:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+    finally:
+        # If the consumer stops early, stop the ranges still being listed,
+        # and don't bother with unstarted ones.
+        stop_event.set()
+        for future in futures:
+            future.cancel()
+        executor.shutdown(wait=False)
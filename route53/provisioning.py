@@ -0,0 +1,235 @@
+"""
+Bulk creation of hosted zones, along with their initial record sets::
+
+    from route53.provisioning import ZoneSpec, provision_zones
+
+    results = provision_zones(conn, [
+        ZoneSpec('tenant1.example.com.', record_sets=[
+            {'name': 'www', 'type': 'A', 'ttl': 300, 'records': ['10.0.0.1']},
+        ]),
+        ZoneSpec('tenant2.example.com.'),
+    ], salt='onboarding-1234')
+
+Zones are provisioned concurrently. Each zone's caller reference is
+derived from its name and the ``salt``, so running the same provisioning
+again (after a crash, or a failure part way through) doesn't create
+duplicate zones: zones that were already created are looked up instead,
+and their record sets are UPSERTed again, which is harmless.
+
+.. note:: Route53 won't accept a caller reference twice, even after the
+    zone it created has been deleted. Use a new ``salt`` for each
+    provisioning run that is meant to create new zones.
+"""
+
+import hashlib
+from route53.change_set import batch_changes
+from route53.deadline import bind_deadline
+from route53.exceptions import Route53APIError
+from route53.resource_record_set import record_set_from_dict
+
+
+def get_caller_reference(name, salt=''):
+    """
+    :param str name: The hosted zone's name.
+    :keyword str salt: Distinguishes this provisioning run from others
+        that create zones with the same names.
+    :rtype: str
+    :returns: A caller reference that is always the same for the same
+        name and salt.
+    """
+
+    key = '%s\n%s' % (salt, name.lower().rstrip('.'))
+    return 'provision-%s' % hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+def _qualify_name(name, zone_name):
+    """
+    Makes a record set name relative to a zone fully qualified. Names that
+    end with a dot are left alone, and ``@`` is the zone's apex.
+    """
+
+    if name == '@':
+        return zone_name
+    if name.endswith('.'):
+        return name
+    return '%s.%s' % (name, zone_name)
+
+def _find_zone(connection, name, caller_reference):
+    """
+    Finds the hosted zone that was created with a caller reference.
+
+    :rtype: HostedZone
+    :returns: The zone, or ``None`` if it can't be found.
+    """
+
+    # Usually, the only zone with this name is the one we're after, and
+    # the name index finds it without a request.
+    hosted_zone = connection.get_hosted_zone_by_name(name)
+    if hosted_zone is not None and hosted_zone.caller_reference == caller_reference:
+        return hosted_zone
+
+    for hosted_zone in connection.list_hosted_zones():
+        if hosted_zone.caller_reference == caller_reference:
+            return hosted_zone
+    return None
+
+
+class ZoneSpec(object):
+    """
+    Describes a hosted zone to provision.
+    """
+
+    def __init__(self, name, record_sets=None, comment=None,
+                 caller_reference=None):
+        """
+        :param str name: The name of the hosted zone.
+        :keyword list record_sets: The zone's initial record sets, as dicts
+            of values (like the lines of a ``route53 dump``). Names that
+            don't end with a dot are relative to the zone, and ``@`` is
+            the zone's apex.
+        :keyword str comment: An optional comment to attach to the zone.
+        :keyword str caller_reference: Overrides the caller reference
+            derived from the name.
+        """
+
+        self.name = name.rstrip('.') + '.'
+        self.record_sets = list(record_sets or [])
+        self.comment = comment
+        self.caller_reference = caller_reference
+
+    def __repr__(self):
+        return '<ZoneSpec: %s, %d record sets>' % (self.name, len(self.record_sets))
+
+
+class ProvisioningResult(object):
+    """
+    The outcome of provisioning one hosted zone.
+    """
+
+    def __init__(self, spec):
+        """
+        :param ZoneSpec spec: The zone that was provisioned.
+        """
+
+        self.spec = spec
+        #: The :py:class:`HostedZone <route53.hosted_zone.HostedZone>`, if
+        #: it was created or found.
+        self.hosted_zone = None
+        #: ``True`` if the zone was created by this run, ``False`` if it
+        #: had already been created with the same caller reference.
+        self.created = False
+        #: The change info dict for the zone's creation, if it was created.
+        self.change_info = None
+        #: The change info dicts for the batches of initial record sets.
+        self.record_change_infos = []
+        #: The exception that stopped provisioning, if any. If its
+        #: ``outcome_unknown`` is set, the request that failed may still
+        #: have gone through; running the provisioning again sorts it out.
+        self.error = None
+
+    def __repr__(self):
+        if self.error is not None:
+            status = 'failed: %s' % self.error
+        else:
+            status = 'created' if self.created else 'already existed'
+        return '<ProvisioningResult: %s, %s>' % (self.spec.name, status)
+
+    @property
+    def ok(self):
+        """
+        :rtype: bool
+        :returns: ``True`` if the zone and all its record sets were
+            provisioned.
+        """
+
+        return self.error is None
+
+    @property
+    def change_ids(self):
+        """
+        :rtype: list
+        :returns: The IDs of all of the changes made, which may be checked
+            with :py:meth:`Route53Connection.get_change <route53.connection.Route53Connection.get_change>`.
+        """
+
+        change_infos = [self.change_info] + self.record_change_infos
+        return [info['request_id'] for info in change_infos if info]
+
+
+def provision_zone(connection, spec, salt='', batch_size=100):
+    """
+    Provisions a single hosted zone. See :py:func:`provision_zones`.
+
+    :rtype: ProvisioningResult
+    """
+
+    result = ProvisioningResult(spec)
+    caller_reference = spec.caller_reference or get_caller_reference(spec.name, salt)
+
+    try:
+        try:
+            result.hosted_zone, result.change_info = connection.create_hosted_zone(
+                spec.name, caller_reference=caller_reference, comment=spec.comment
+            )
+            result.created = True
+        except Route53APIError as exc:
+            if exc.code != 'HostedZoneAlreadyExists':
+                raise
+            # An earlier run created it.
+            result.hosted_zone = _find_zone(connection, spec.name, caller_reference)
+            if result.hosted_zone is None:
+                raise
+
+        zone_id = result.hosted_zone.id
+        changes = (
+            ('UPSERT', record_set_from_dict(
+                connection, zone_id,
+                dict(values, name=_qualify_name(values['name'], spec.name))
+            ))
+            for values in spec.record_sets
+        )
+        for change_set in batch_changes(connection, zone_id, changes, batch_size):
+            result.record_change_infos.append(
+                connection._change_resource_record_sets(change_set)
+            )
+    except Exception as exc:
+        # Transport errors (a dropped connection, say) are caught too, so
+        # that one zone's failure doesn't stop the others.
+        result.error = exc
+    return result
+
+def provision_zones(connection, specs, salt='', max_workers=8,
+                    batch_size=100, callback=None):
+    """
+    Creates hosted zones and their initial record sets, with up to
+    ``max_workers`` zones being provisioned at once. A zone that fails
+    doesn't stop the others; its result holds the error.
+
+    :param Route53Connection connection: The connection to use.
+    :param iterable specs: The :py:class:`ZoneSpec` instances to provision.
+    :keyword str salt: Mixed into each zone's caller reference. See
+        :py:func:`get_caller_reference`.
+    :keyword int max_workers: The maximum number of zones to provision at
+        once.
+    :keyword int batch_size: The maximum number of record sets per change
+        batch.
+    :keyword callable callback: Called with each
+        :py:class:`ProvisioningResult` as its zone finishes, from the
+        worker thread.
+    :rtype: list
+    :returns: A list of :py:class:`ProvisioningResult` instances, in the
+        same order as ``specs``.
+    """
+
+    from concurrent.futures import ThreadPoolExecutor
+
+    def provision(spec):
+        result = provision_zone(connection, spec, salt=salt, batch_size=batch_size)
+        if callback is not None:
+            callback(result)
+        return result
+
+    specs = list(specs)
+    if not specs:
+        return []
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(specs)))) as executor:
+        return list(executor.map(bind_deadline(provision), specs))
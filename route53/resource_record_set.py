@@ -1,6 +1,124 @@
 from route53.change_set import ChangeSet
 from route53.exceptions import Route53Error
 
+class TrackedField(object):
+    """
+    A descriptor for the editable fields on
+    :py:class:`ResourceRecordSet` instances. Assigning to the field marks
+    it as dirty (or clean again, if the original value is put back), which
+    makes :py:meth:`ResourceRecordSet.is_modified` a constant time check.
+    """
+
+    def __init__(self, name):
+        """
+        :param str name: The attribute name this field is stored under.
+        """
+
+        self.name = name
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        return instance.__dict__[self.name]
+
+    def __set__(self, instance, value):
+        instance.__dict__[self.name] = value
+        instance._update_dirty_state(self.name, value)
+
+
+class TrackedRecordsField(TrackedField):
+    """
+    The ``records`` field holds a list, which may be modified in place.
+    Lists assigned to this field are wrapped in a :py:class:`TrackedList`,
+    which marks the field as dirty whenever it is changed.
+    """
+
+    def __set__(self, instance, value):
+        super(TrackedRecordsField, self).__set__(
+            instance, TrackedList(instance, self.name, value)
+        )
+
+
+class TrackedList(list):
+    """
+    A list that marks a :py:class:`ResourceRecordSet` field as dirty when it
+    is modified in place.
+    """
+
+    __slots__ = ('_owner', '_field_name')
+
+    def __init__(self, owner, field_name, iterable=()):
+        super(TrackedList, self).__init__(iterable)
+        self._owner = owner
+        self._field_name = field_name
+
+    def _touch(self):
+        self._owner._mark_dirty(self._field_name)
+
+    def append(self, value):
+        super(TrackedList, self).append(value)
+        self._touch()
+
+    def extend(self, values):
+        super(TrackedList, self).extend(values)
+        self._touch()
+
+    def insert(self, index, value):
+        super(TrackedList, self).insert(index, value)
+        self._touch()
+
+    def remove(self, value):
+        super(TrackedList, self).remove(value)
+        self._touch()
+
+    def pop(self, *args):
+        value = super(TrackedList, self).pop(*args)
+        self._touch()
+        return value
+
+    def sort(self, *args, **kwargs):
+        super(TrackedList, self).sort(*args, **kwargs)
+        self._touch()
+
+    def reverse(self):
+        super(TrackedList, self).reverse()
+        self._touch()
+
+    def clear(self):
+        # list.clear() is Python 3 only, and slice deletion goes through
+        # __delitem__, which marks the field dirty.
+        del self[:]
+
+    def __setitem__(self, index, value):
+        super(TrackedList, self).__setitem__(index, value)
+        self._touch()
+
+    def __delitem__(self, index):
+        super(TrackedList, self).__delitem__(index)
+        self._touch()
+
+    def __iadd__(self, values):
+        super(TrackedList, self).__iadd__(values)
+        self._touch()
+        return self
+
+    def __imul__(self, count):
+        super(TrackedList, self).__imul__(count)
+        self._touch()
+        return self
+
+    # Python 2.x routes slice assignment through these.
+    def __setslice__(self, i, j, values):
+        self.__setitem__(slice(i, j), values)
+
+    def __delslice__(self, i, j):
+        self.__delitem__(slice(i, j))
+
+    def __reduce__(self):
+        # Pickle/copy as a plain list, without the owner back-reference.
+        return list, (list(self),)
+
+
 class ResourceRecordSet(object):
     """
     A Resource Record Set is an entry within a Hosted Zone. These can be
@@ -13,8 +131,31 @@ class ResourceRecordSet(object):
     # Override this in your sub-class.
     rrset_type = None
 
+    name = TrackedField('name')
+    ttl = TrackedField('ttl')
+    records = TrackedRecordsField('records')
+    region = TrackedField('region')
+    weight = TrackedField('weight')
+    set_identifier = TrackedField('set_identifier')
+    failover = TrackedField('failover')
+    geolocation = TrackedField('geolocation')
+    health_check_id = TrackedField('health_check_id')
+
+    # Changing any of these fields makes this a different record set.
+    _key_fields = frozenset(['name', 'set_identifier'])
+
+    # Replaced by a per-instance set the first time a field is modified, so
+    # that unmodified record sets don't each carry an empty set around.
+    _dirty = frozenset()
+
+    # The names of any ResourceRecordSet tags the parser didn't recognize,
+    # for features this library doesn't support. Record sets that have any
+    # can't be written back without losing those settings.
+    _unrecognized_tags = frozenset()
+
     def __init__(self, connection, zone_id, name, ttl, records, weight=None,
-                 region=None, set_identifier=None):
+                 region=None, set_identifier=None, failover=None,
+                 geolocation=None, health_check_id=None):
         """
         :param Route53Connection connection: The connection instance that
             was used to query the Route53 API, leading to this object's
@@ -37,33 +178,108 @@ class ResourceRecordSet(object):
             sets only. An identifier that differentiates among multiple
             resource record sets that have the same combination of DNS name
             and type. 1-128 chars.
+        :keyword str failover: For failover record sets only. Either
+            ``PRIMARY`` or ``SECONDARY``.
+        :keyword dict geolocation: For geolocation record sets only. A dict
+            with any of the ``continent_code``, ``country_code`` and
+            ``subdivision_code`` keys. To change it, assign a new dict;
+            changes made in place aren't tracked.
+        :keyword str health_check_id: The ID of the health check that
+            Route53 uses to decide whether this record set is healthy.
         """
 
         self.connection = connection
         self.zone_id = zone_id
-        self.name = name
-        self.ttl = int(ttl) if ttl else None
-        self.records = records
-        self.region = region
-        self.weight = weight
-        self.set_identifier = set_identifier
 
         # Keep track of the initial values for this record set. We use this
-        # to detect changes that need saving.
+        # to build DELETE requests, which must match what's in Route53.
         self._initial_vals = dict(
             connection=connection,
             zone_id=zone_id,
-            name=name,
-            ttl=ttl,
-            records=records[:],
-            region=region,
-            weight=weight,
-            set_identifier=set_identifier,
         )
+        self._init_field('name', name)
+        self._init_field('ttl', int(ttl) if ttl is not None else None)
+        self._init_field('records', records)
+        self._init_field('region', region)
+        self._init_field('weight', weight)
+        self._init_field('set_identifier', set_identifier)
+        self._init_field('failover', failover)
+        self._init_field('geolocation', geolocation)
+        self._init_field('health_check_id', health_check_id)
 
     def __str__(self):
         return '<%s: %s>' % (self.__class__.__name__, self.name)
 
+    def _init_field(self, key, value):
+        """
+        Sets the initial value of a tracked field, without marking it dirty.
+
+        :param str key: The field's name.
+        :param value: The field's value.
+        """
+
+        if key == 'records':
+            self.__dict__[key] = TrackedList(self, key, value)
+            self._initial_vals[key] = list(value)
+        elif key == 'geolocation' and value is not None:
+            # Copied, so that DELETEs still match what's in Route53 if the
+            # dict is changed in place.
+            self.__dict__[key] = value
+            self._initial_vals[key] = dict(value)
+        else:
+            self.__dict__[key] = value
+            self._initial_vals[key] = value
+
+    def _mark_dirty(self, key):
+        """
+        Flags a field as modified since the last retrieval or save.
+
+        :param str key: The field's name.
+        """
+
+        if not self._dirty:
+            self._dirty = set()
+        self._dirty.add(key)
+
+    def _update_dirty_state(self, key, value):
+        """
+        Called by :py:class:`TrackedField` when a field is assigned to. Marks
+        the field dirty, or clean if it has been set back to its initial
+        value.
+
+        :param str key: The field's name.
+        :param value: The field's new value.
+        """
+
+        if value != self._initial_vals[key]:
+            self._mark_dirty(key)
+        elif key in self._dirty:
+            self._dirty.discard(key)
+
+    def _mark_clean(self):
+        """
+        Makes the current field values the new initial values, and resets
+        the modification tracking. Called after a successful save.
+        """
+
+        for key in self._dirty:
+            value = getattr(self, key)
+            if key == 'records':
+                value = list(value)
+            elif key == 'geolocation' and value is not None:
+                value = dict(value)
+            self._initial_vals[key] = value
+        self._dirty = frozenset()
+
+    def get_dirty_fields(self):
+        """
+        :rtype: frozenset
+        :returns: The names of the fields that have been modified since the
+            last retrieval or save.
+        """
+
+        return frozenset(self._dirty)
+
     @property
     def hosted_zone(self):
         """
@@ -89,13 +305,7 @@ class ResourceRecordSet(object):
             and ``False`` if not.
         """
 
-        for key, val in self._initial_vals.items():
-            if getattr(self, key) != val:
-                # One of the initial values doesn't match, we know
-                # this object has been touched.
-                return True
-
-        return False
+        return bool(self._dirty)
 
     def delete(self):
         """
@@ -109,22 +319,33 @@ class ResourceRecordSet(object):
 
     def save(self):
         """
-        Saves any changes to this record set.
+        Saves any changes to this record set. If nothing has been modified
+        since the last retrieval or save, no request is sent.
+
+        :rtype: dict
+        :returns: A dict of change info, which contains some details about
+            the request, or ``None`` if there was nothing to save.
         """
 
+        if not self._dirty:
+            return None
+
         cset = ChangeSet(connection=self.connection, hosted_zone_id=self.zone_id)
-        # Record sets can't actually be modified. You have to delete the
-        # existing one and create a new one. Since this happens within a single
-        # change set, it appears that the values were modified, when instead
-        # the whole thing is replaced.
-        cset.add_change('DELETE', self)
-        cset.add_change('CREATE', self)
+        if self._dirty & self._key_fields:
+            # The record set is being renamed (or re-identified), so it's a
+            # different record set as far as Route53 is concerned. Delete the
+            # existing one and create the new one within a single change set.
+            cset.add_change('DELETE', self)
+            cset.add_change('CREATE', self)
+        else:
+            # An UPSERT replaces the values in place. Unlike a DELETE, it
+            # doesn't need to match the values currently in Route53.
+            cset.add_change('UPSERT', self)
         retval = self.connection._change_resource_record_sets(cset)
 
         # Now copy the current attribute values on this instance to
         # the initial_vals dict. This will re-set the modification tracking.
-        for key, val in self._initial_vals.items():
-            self._initial_vals[key] = getattr(self, key)
+        self._mark_clean()
 
         return retval
 
@@ -156,27 +377,27 @@ class AResourceRecordSet(ResourceRecordSet):
 
     rrset_type = 'A'
 
-    def __init__(self, alias_hosted_zone_id=None, alias_dns_name=None, *args, **kwargs):
+    alias_hosted_zone_id = TrackedField('alias_hosted_zone_id')
+    alias_dns_name = TrackedField('alias_dns_name')
+    alias_evaluate_target_health = TrackedField('alias_evaluate_target_health')
+
+    def __init__(self, alias_hosted_zone_id=None, alias_dns_name=None,
+                 alias_evaluate_target_health=False, *args, **kwargs):
         """
         :keyword str alias_hosted_zone_id: Alias A records have this specified.
             It appears to be the hosted zone ID for the ELB the Alias points at.
         :keyword str alias_dns_name: Alias A records have this specified. It is
             the DNS name for the ELB that the Alias points to.
+        :keyword bool alias_evaluate_target_health: For Alias A records.
+            Whether the Alias inherits the health of the record sets it
+            points to.
         """
 
         super(AResourceRecordSet, self).__init__(*args, **kwargs)
 
-        self.alias_hosted_zone_id = alias_hosted_zone_id
-        self.alias_dns_name = alias_dns_name
-
-        # Keep track of the initial values for this record set. We use this
-        # to detect changes that need saving.
-        self._initial_vals.update(
-            dict(
-                alias_hosted_zone_id=alias_hosted_zone_id,
-                alias_dns_name=alias_dns_name,
-            )
-        )
+        self._init_field('alias_hosted_zone_id', alias_hosted_zone_id)
+        self._init_field('alias_dns_name', alias_dns_name)
+        self._init_field('alias_evaluate_target_health', alias_evaluate_target_health)
 
     def is_alias_record_set(self):
         """
@@ -211,27 +432,27 @@ class CNAMEResourceRecordSet(ResourceRecordSet):
 
     rrset_type = 'CNAME'
 
-    def __init__(self, alias_hosted_zone_id=None, alias_dns_name=None, *args, **kwargs):
+    alias_hosted_zone_id = TrackedField('alias_hosted_zone_id')
+    alias_dns_name = TrackedField('alias_dns_name')
+    alias_evaluate_target_health = TrackedField('alias_evaluate_target_health')
+
+    def __init__(self, alias_hosted_zone_id=None, alias_dns_name=None,
+                 alias_evaluate_target_health=False, *args, **kwargs):
         """
         :keyword str alias_hosted_zone_id: Alias CNAME records have this specified.
             It appears to be the hosted zone ID for the ELB the Alias points at.
         :keyword str alias_dns_name: Alias CNAME records have this specified. It is
             the DNS name for the ELB that the Alias points to.
+        :keyword bool alias_evaluate_target_health: For Alias CNAME records.
+            Whether the Alias inherits the health of the record sets it
+            points to.
         """
 
         super(CNAMEResourceRecordSet, self).__init__(*args, **kwargs)
 
-        self.alias_hosted_zone_id = alias_hosted_zone_id
-        self.alias_dns_name = alias_dns_name
-
-        # Keep track of the initial values for this record set. We use this
-        # to detect changes that need saving.
-        self._initial_vals.update(
-            dict(
-                alias_hosted_zone_id=alias_hosted_zone_id,
-                alias_dns_name=alias_dns_name,
-            )
-        )
+        self._init_field('alias_hosted_zone_id', alias_hosted_zone_id)
+        self._init_field('alias_dns_name', alias_dns_name)
+        self._init_field('alias_evaluate_target_health', alias_evaluate_target_health)
 
     def is_alias_record_set(self):
         """
@@ -326,3 +547,49 @@ class TXTResourceRecordSet(ResourceRecordSet):
     """
 
     rrset_type = 'TXT'
+
+
+def record_set_from_dict(connection, zone_id, values):
+    """
+    Builds a record set from a dict of its values, such as a line of a
+    ``route53 dump``.
+
+    :param Route53Connection connection: The connection to use.
+    :param str zone_id: The ID of the zone the record set belongs to.
+    :param dict values: The record set's values. ``name`` and ``type`` are
+        required. ``ttl``, ``records``, ``weight``, ``region``,
+        ``set_identifier``, ``failover``, ``geolocation``,
+        ``health_check_id``, ``alias_hosted_zone_id``, ``alias_dns_name``
+        and ``alias_evaluate_target_health`` are optional.
+    :rtype: ResourceRecordSet
+    :returns: An instance of the ResourceRecordSet sub-class for the type.
+    """
+
+    # Imported here, since the parser module imports this one.
+    from route53.xml_parsers.list_resource_record_sets_by_zone_id import \
+        RRSET_TYPE_TO_RSET_SUBCLASS_MAP
+
+    try:
+        rrset_class = RRSET_TYPE_TO_RSET_SUBCLASS_MAP[values['type']]
+    except KeyError:
+        raise Route53Error('Unsupported record set type: %s' % values['type'])
+
+    kwargs = dict(
+        connection=connection,
+        zone_id=zone_id,
+        name=values['name'],
+        ttl=values.get('ttl'),
+        records=list(values.get('records') or []),
+        weight=values.get('weight'),
+        region=values.get('region'),
+        set_identifier=values.get('set_identifier'),
+        failover=values.get('failover'),
+        geolocation=values.get('geolocation'),
+        health_check_id=values.get('health_check_id'),
+    )
+    if issubclass(rrset_class, (AResourceRecordSet, CNAMEResourceRecordSet)):
+        kwargs['alias_hosted_zone_id'] = values.get('alias_hosted_zone_id')
+        kwargs['alias_dns_name'] = values.get('alias_dns_name')
+        kwargs['alias_evaluate_target_health'] = \
+            bool(values.get('alias_evaluate_target_health'))
+    return rrset_class(**kwargs)
@@ -3,18 +3,28 @@ This module contains HTTP transports used for communicating with the
 Route53 API endpoint.
 """
 
-import time
-import base64
-import hmac
-import hashlib
-import requests
-from route53.exceptions import Route53Error
+import threading
+from route53.auth import AWS3Signer, encode_query
+from route53.deadline import get_current_deadline
+from route53.exceptions import Route53Error, Route53HTTPError
+
+# The shortest timeout a request is given when a deadline is close, so
+# that a nearly expired deadline doesn't mean a zero (blocking) timeout.
+MIN_TIMEOUT = 0.001
+
+def _min_timeout(timeout, remaining):
+    return remaining if timeout is None else min(timeout, remaining)
+
 
 class BaseTransport(object):
     """
     This serves as an interface for HTTP transports. It provides a really
     simple blueprint for what is involved in working with the Route53
     API.
+
+    A single transport instance is shared by every thread using its
+    connection, so sub-classes must be safe to call concurrently. Keep any
+    HTTP state (sessions, sockets) per-thread or in a locked pool.
     """
 
     def __init__(self, connection):
@@ -35,6 +45,36 @@ class BaseTransport(object):
 
         return self.connection._endpoint
 
+    def get_timeout(self, timeout=None):
+        """
+        Works out the timeouts for a request, from the connection's
+        ``timeout``, cut down to the time left before the current
+        :py:class:`Deadline <route53.deadline.Deadline>`, if there is one.
+
+        :keyword timeout: Use this instead of the connection's timeout.
+        :rtype: tuple
+        :returns: A ``(connect, read)`` tuple of timeouts in seconds, or
+            ``None`` for no timeouts.
+        """
+
+        if timeout is None:
+            timeout = getattr(self.connection, '_timeout', None)
+        if timeout is not None and not isinstance(timeout, tuple):
+            timeout = (timeout, timeout)
+
+        deadline = get_current_deadline()
+        if deadline is None:
+            return timeout
+
+        remaining = max(deadline.remaining(), MIN_TIMEOUT)
+        if timeout is None:
+            return remaining, remaining
+        connect_timeout, read_timeout = timeout
+        return (
+            _min_timeout(connect_timeout, remaining),
+            _min_timeout(read_timeout, remaining),
+        )
+
     def _hmac_sign_string(self, string_to_sign):
         """
         Route53 uses AWS an HMAC-based authentication scheme, involving the
@@ -52,40 +92,20 @@ class BaseTransport(object):
         :returns: An HMAC signed string.
         """
 
-        # Just use SHA256, since we're all running modern versions
-        # of Python (right?).
-        new_hmac = hmac.new(
-            self.connection._aws_secret_access_key.encode('utf-8'),
-            digestmod=hashlib.sha256
-        )
-        new_hmac.update(string_to_sign.encode('utf-8'))
-        # The HMAC digest str is done at this point.
-        digest = new_hmac.digest()
-        # Now we have to Base64 encode it, and we're done.
-        return base64.b64encode(digest).decode('utf-8')
+        return AWS3Signer(self.connection).sign_string(string_to_sign)
 
-    def get_request_headers(self):
+    def get_request_headers(self, method='GET', path='', data=None):
         """
-        Determine the headers to send along with the request. These are
-        pretty much the same for every request, with Route53.
-        """
-
-        date_header = time.asctime(time.gmtime())
-        # We sign the time string above with the user's AWS secret access key
-        # in order to authenticate our request.
-        signing_key = self._hmac_sign_string(date_header)
+        Determine the headers to send along with the request. The
+        connection's signer works out the authentication headers.
 
-        # Amazon's super fun auth token.
-        auth_header = "AWS3-HTTPS AWSAccessKeyId=%s,Algorithm=HmacSHA256,Signature=%s" % (
-            self.connection._aws_access_key_id,
-            signing_key,
-        )
+        :keyword str method: One of 'GET', 'POST', or 'DELETE'.
+        :keyword str path: The path to tack on to the endpoint URL.
+        :keyword data: The params or body being sent.
+        :rtype: dict
+        """
 
-        return {
-            'X-Amzn-Authorization': auth_header,
-            'x-amz-date': date_header,
-            'Host': 'route53.amazonaws.com',
-        }
+        return self.connection._signer.get_headers(method, path, data)
 
     def send_request(self, path, data, method):
         """
@@ -102,7 +122,7 @@ class BaseTransport(object):
         :returns: The body of the response.
         """
 
-        headers = self.get_request_headers()
+        headers = self.get_request_headers(method, path, data)
 
         if method == 'GET':
             return self._send_get_request(path, data, headers)
@@ -167,9 +187,39 @@ class RequestsTransport(BaseTransport):
     A requests-based transport. More details may be found on the
     `requests webpage`_.
 
+    Each thread gets its own :py:class:`requests.Session`, so that
+    connections to the endpoint are kept alive and re-used between
+    requests without sharing a session across threads.
+
     .. _requests webpage: http://docs.python-requests.org/en/latest/
     """
 
+    def __init__(self, connection):
+        """
+        :param Route53Connection connection: The connection being used with
+            the transport. The connection contains their AWS credentials
+            and a few other settings.
+        """
+
+        super(RequestsTransport, self).__init__(connection)
+        # Holds a per-thread requests.Session.
+        self._local = threading.local()
+
+    @property
+    def session(self):
+        """
+        :rtype: requests.Session
+        :returns: The calling thread's session, created on first use.
+        """
+
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            # requests is only loaded once it's needed, since it's slow to
+            # import.
+            import requests
+            session = self._local.session = requests.Session()
+        return session
+
     def _send_get_request(self, path, params, headers):
         """
         Sends the GET request to the Route53 endpoint.
@@ -182,8 +232,15 @@ class RequestsTransport(BaseTransport):
         :returns: The body of the response.
         """
 
-        r = requests.get(self.endpoint + path, params=params, headers=headers)
-        r.raise_for_status()
+        # The query is encoded the same way it was signed.
+        r = self.session.get(
+            self.endpoint + path, params=encode_query(params), headers=headers,
+            timeout=self.get_timeout(),
+        )
+        if r.status_code >= 400:
+            # Raised as our own error type, like the other transports, so
+            # that callers (and cassettes) don't need to know about requests.
+            raise Route53HTTPError(r.status_code, r.reason, r.text)
         return r.text
 
     def _send_post_request(self, path, data, headers):
@@ -199,7 +256,10 @@ class RequestsTransport(BaseTransport):
         :returns: The body of the response.
         """
 
-        r = requests.post(self.endpoint + path, data=data, headers=headers)
+        r = self.session.post(
+            self.endpoint + path, data=data, headers=headers,
+            timeout=self.get_timeout(),
+        )
         return r.text
 
     def _send_delete_request(self, path, headers):
@@ -213,5 +273,246 @@ class RequestsTransport(BaseTransport):
         :returns: The body of the response.
         """
 
-        r = requests.delete(self.endpoint + path, headers=headers)
+        r = self.session.delete(
+            self.endpoint + path, headers=headers, timeout=self.get_timeout()
+        )
         return r.text
+
+
+try:
+    # These mean a kept-alive connection was closed at the other end while
+    # it sat idle.
+    _STALE_CONNECTION_ERRORS = (BrokenPipeError, ConnectionResetError)
+except NameError:
+    # Python 2.x.
+    import socket
+    _STALE_CONNECTION_ERRORS = (socket.error,)
+
+
+def _is_connection_dropped(http_connection):
+    """
+    Checks whether an idle HTTP connection has been closed by the other end.
+    The server never sends anything unprompted, so a readable socket means
+    it has hung up.
+
+    :rtype: bool
+    """
+
+    import select
+
+    sock = http_connection.sock
+    if sock is None:
+        # Not connected yet (or closed by http.client), which it will sort
+        # out by itself.
+        return False
+    try:
+        readable, _, _ = select.select([sock], [], [], 0)
+    except (ValueError, select.error):
+        return True
+    return bool(readable)
+
+
+class HTTPClientTransport(BaseTransport):
+    """
+    A transport built directly on the standard library's persistent
+    HTTP connections (:py:mod:`http.client`). It skips the per-request
+    overhead of requests' hooks, adapters and charset detection, and needs
+    no third party packages.
+
+    Each thread keeps its own connection to the endpoint alive between
+    requests. Select it with::
+
+        conn = route53.connect(..., transport=HTTPClientTransport)
+
+    Like every transport, it honors the connection's ``timeout`` and any
+    :py:class:`Deadline <route53.deadline.Deadline>` in effect.
+    """
+
+    def __init__(self, connection, timeout=None):
+        """
+        :param Route53Connection connection: The connection being used with
+            the transport. The connection contains their AWS credentials
+            and a few other settings.
+        :keyword timeout: The socket timeout, in seconds, for connecting
+            and for each read, or a ``(connect, read)`` tuple. Defaults to
+            the connection's ``timeout``.
+        """
+
+        super(HTTPClientTransport, self).__init__(connection)
+        self.timeout = timeout
+        # Holds a per-thread HTTP(S)Connection.
+        self._local = threading.local()
+
+        scheme, _, location = self.endpoint.partition('://')
+        self._is_https = scheme == 'https'
+        self._host, _, base_path = location.partition('/')
+        self._base_path = '/' + base_path
+
+    def _get_http_connection(self):
+        """
+        :rtype: tuple
+        :returns: A tuple in the form of ``(http_connection, is_reused)``,
+            for the calling thread.
+        """
+
+        http_connection = getattr(self._local, 'http_connection', None)
+        if http_connection is not None:
+            if not _is_connection_dropped(http_connection):
+                return http_connection, True
+            # The other end closed it while it sat idle. Start afresh.
+            self._close_http_connection()
+
+        try:
+            import http.client as http_client
+        except ImportError:
+            # Python 2.x.
+            import httplib as http_client
+
+        if self._is_https:
+            connection_class = http_client.HTTPSConnection
+        else:
+            connection_class = http_client.HTTPConnection
+        http_connection = connection_class(self._host)
+        self._local.http_connection = http_connection
+        return http_connection, False
+
+    def _close_http_connection(self):
+        """
+        Closes and forgets the calling thread's connection, if it has one.
+        """
+
+        http_connection = getattr(self._local, 'http_connection', None)
+        if http_connection is not None:
+            http_connection.close()
+            self._local.http_connection = None
+
+    def _request(self, method, path, body, headers, raise_for_status=False):
+        """
+        Sends a request over the calling thread's connection, reconnecting
+        if the connection turns out to have gone stale while it was idle.
+
+        :rtype: str
+        :returns: The body of the response.
+        """
+
+        try:
+            import http.client as http_client
+        except ImportError:
+            # Python 2.x.
+            import httplib as http_client
+
+        url = self._base_path + path
+
+        while True:
+            # Worked out for each attempt, as a deadline gets closer.
+            connect_timeout, read_timeout = self.get_timeout(self.timeout) or (None, None)
+            http_connection, is_reused = self._get_http_connection()
+            sent = False
+            try:
+                if http_connection.sock is None:
+                    http_connection.timeout = connect_timeout
+                    http_connection.connect()
+                http_connection.sock.settimeout(read_timeout)
+                http_connection.request(method, url, body=body, headers=headers)
+                sent = True
+                response = http_connection.getresponse()
+                # The whole body has to be read before the connection can
+                # be re-used.
+                response_body = response.read()
+            except (http_client.BadStatusLine,) + _STALE_CONNECTION_ERRORS:
+                self._close_http_connection()
+                # A connection that was kept alive may have been closed by
+                # the other end. Trying again is safe if the request never
+                # made it out, or if it's a GET.
+                if is_reused and (not sent or method == 'GET'):
+                    continue
+                raise
+            except Exception:
+                self._close_http_connection()
+                raise
+            break
+
+        if response.getheader('connection', '').lower() == 'close':
+            self._close_http_connection()
+
+        text = response_body.decode('utf-8')
+        if raise_for_status and response.status >= 400:
+            raise Route53HTTPError(response.status, response.reason, text)
+        return text
+
+    def _send_get_request(self, path, params, headers):
+        """
+        Sends the GET request to the Route53 endpoint.
+
+        :param str path: The path to tack on to the endpoint URL for
+            the query.
+        :param dict params: Key/value pairs to send.
+        :param dict headers: A dict of headers to send with the request.
+        :rtype: str
+        :returns: The body of the response.
+        """
+
+        if params:
+            # The query is encoded the same way it was signed.
+            path += '?' + encode_query(params)
+        return self._request('GET', path, None, headers, raise_for_status=True)
+
+    def _send_post_request(self, path, data, headers):
+        """
+        Sends the POST request to the Route53 endpoint.
+
+        :param str path: The path to tack on to the endpoint URL for
+            the query.
+        :param data: Either a dict, or bytes.
+        :type data: dict or bytes
+        :param dict headers: A dict of headers to send with the request.
+        :rtype: str
+        :returns: The body of the response.
+        """
+
+        if isinstance(data, dict):
+            data = encode_query(data)
+            headers = dict(headers)
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        if not isinstance(data, bytes):
+            data = data.encode('utf-8')
+        return self._request('POST', path, data, headers)
+
+    def _send_delete_request(self, path, headers):
+        """
+        Sends the DELETE request to the Route53 endpoint.
+
+        :param str path: The path to tack on to the endpoint URL for
+            the query.
+        :param dict headers: A dict of headers to send with the request.
+        :rtype: str
+        :returns: The body of the response.
+        """
+
+        return self._request('DELETE', path, None, headers)
+
+
+class CountingTransport(BaseTransport):
+    """
+    Sends requests through another transport, and counts them. Handy for
+    reporting how many requests an operation took.
+    """
+
+    def __init__(self, connection, transport):
+        """
+        :param Route53Connection connection: The connection being used with
+            the transport.
+        :param BaseTransport transport: The transport instance to send
+            requests through.
+        """
+
+        super(CountingTransport, self).__init__(connection)
+        self.transport = transport
+        #: The number of requests sent so far.
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def send_request(self, path, data, method):
+        with self._lock:
+            self.count += 1
+        return self.transport.send_request(path, data, method)
@@ -4,12 +4,53 @@ Various utility stuff that is useful across the codebase.
 
 import datetime
 import re
+import threading
 
-import pytz
-from lxml import etree
+try:
+    # This can be used as a tzinfo arg to the datetime functions/methods.
+    UTC_TIMEZONE = datetime.timezone.utc
+except AttributeError:
+    # Python 2.x has no UTC tzinfo in the standard library.
+    import pytz
+    UTC_TIMEZONE = pytz.utc
 
-# This can be used as a tzinfo arg to the datetime functions/methods.
-UTC_TIMEZONE = pytz.utc
+# The most recently parsed timestamps. Polling changes tends to parse the
+# same few timestamps over and over.
+_ISO_8601_CACHE = {}
+_ISO_8601_CACHE_SIZE = 1024
+
+def _parse_iso_8601_time_str_fast(time_str):
+    """
+    Parses the two timestamp formats the Route53 API uses,
+    ``2013-07-28T01:00:01Z`` and ``2013-07-28T01:00:01.001Z``, by slicing
+    them apart. This is a good deal quicker than strptime.
+
+    :rtype: datetime.datetime
+    :returns: A timezone aware (UTC) datetime.datetime instance, or ``None``
+        if ``time_str`` isn't in one of the expected formats.
+    """
+
+    length = len(time_str)
+    if length == 20:
+        microsecond = 0
+    elif length == 24 and time_str[19] == '.' and time_str[20:23].isdigit():
+        microsecond = int(time_str[20:23]) * 1000
+    else:
+        return None
+
+    if time_str[4] != '-' or time_str[7] != '-' or time_str[10] != 'T' or \
+       time_str[13] != ':' or time_str[16] != ':' or time_str[-1] != 'Z':
+        return None
+    digits = time_str[0:4] + time_str[5:7] + time_str[8:10] + \
+        time_str[11:13] + time_str[14:16] + time_str[17:19]
+    if not digits.isdigit():
+        return None
+
+    return datetime.datetime(
+        int(digits[0:4]), int(digits[4:6]), int(digits[6:8]),
+        int(digits[8:10]), int(digits[10:12]), int(digits[12:14]),
+        microsecond, UTC_TIMEZONE,
+    )
 
 def parse_iso_8601_time_str(time_str):
     """
@@ -20,14 +61,199 @@ def parse_iso_8601_time_str(time_str):
     :rtype: datetime.datetime
     :returns: A timezone aware (UTC) datetime.datetime instance.
     """
-    if re.search('\.\d{3}Z$', time_str):
-        submitted_at = datetime.datetime.strptime(time_str, \
-            '%Y-%m-%dT%H:%M:%S.%fZ')
-    else:
-        submitted_at = datetime.datetime.strptime(time_str, \
-            '%Y-%m-%dT%H:%M:%SZ')
-    # Parse the string, and make it explicitly UTC.
-    return submitted_at.replace(tzinfo=UTC_TIMEZONE)
+
+    try:
+        return _ISO_8601_CACHE[time_str]
+    except KeyError:
+        pass
+
+    submitted_at = _parse_iso_8601_time_str_fast(time_str)
+    if submitted_at is None:
+        # Not one of the usual formats. Let strptime have a go at it (and
+        # raise the usual ValueError if it's garbage).
+        if re.search(r'\.\d{3}Z$', time_str):
+            submitted_at = datetime.datetime.strptime(time_str, \
+                '%Y-%m-%dT%H:%M:%S.%fZ')
+        else:
+            submitted_at = datetime.datetime.strptime(time_str, \
+                '%Y-%m-%dT%H:%M:%SZ')
+        # Parse the string, and make it explicitly UTC.
+        submitted_at = submitted_at.replace(tzinfo=UTC_TIMEZONE)
+
+    if len(_ISO_8601_CACHE) >= _ISO_8601_CACHE_SIZE:
+        _ISO_8601_CACHE.clear()
+    _ISO_8601_CACHE[time_str] = submitted_at
+    return submitted_at
+
+# Record set types that every hosted zone has its own of, at its apex.
+# Route53 manages these, so they're never copied between zones or deleted.
+APEX_RECORD_TYPES = ('SOA', 'NS')
+
+# Octal character escapes in names, as Route53 hands them back.
+DNS_NAME_ESCAPE_RE = re.compile(r'\\([0-7]{3})')
+
+def normalize_dns_name(name):
+    """
+    Normalizes a DNS name for comparison purposes. Route53 always hands back
+    fully qualified, lowercase names with a trailing dot, and escapes some
+    characters as octal codes (``*.example.com.`` comes back as
+    ``\\052.example.com.``).
+
+    :param str name: A DNS name, with or without the trailing dot. Empty
+        values (like a missing alias target) are passed through.
+    :rtype: str
+    :returns: The lowercased, unescaped name, with a trailing dot.
+    """
+
+    if not name:
+        return name
+    if '\\' in name:
+        name = DNS_NAME_ESCAPE_RE.sub(lambda match: chr(int(match.group(1), 8)), name)
+    name = name.lower()
+    if not name.endswith('.'):
+        name += '.'
+    return name
+
+def is_apex_record_set(rrset_type, name, zone_name):
+    """
+    :param str rrset_type: The record set's type.
+    :param str name: The record set's name.
+    :param str zone_name: The name of the hosted zone it's in.
+    :rtype: bool
+    :returns: ``True`` for the zone's own SOA and NS record sets. NS record
+        sets that delegate sub-domains aren't included.
+    """
+
+    return rrset_type in APEX_RECORD_TYPES and \
+        normalize_dns_name(name) == normalize_dns_name(zone_name)
+
+def canonical_name_key(name):
+    """
+    Returns a sort key that orders DNS names the way Route53 orders record
+    set listings: by name, with the labels reversed, compared as a string.
+    For example, ``www.example.com.`` sorts as ``com.example.www.``. Since
+    the dots are compared as characters, ``a-b.example.com.`` sorts before
+    ``a.example.com.``.
+
+    :param str name: A DNS name, with or without the trailing dot.
+    :rtype: str
+    :returns: The lowercased name, with its labels reversed.
+    """
+
+    labels = name.lower().rstrip('.').split('.')
+    labels.reverse()
+    return '.'.join(labels) + '.'
+
+class StringInterner(object):
+    """
+    A bounded de-duplication table for values parsed out of API responses.
+    Large zones repeat the same TTLs, regions, alias targets and record
+    values thousands of times over. Passing each parsed value through
+    :py:meth:`intern` makes all of the copies share a single object.
+
+    Once ``max_size`` distinct values have been seen, new values are
+    passed through untouched, so memory use stays bounded on zones with
+    mostly unique values.
+    """
+
+    def __init__(self, max_size=100000):
+        """
+        :keyword int max_size: The maximum number of distinct values to keep.
+        """
+
+        self.max_size = max_size
+        self._table = {}
+
+    def __len__(self):
+        return len(self._table)
+
+    def intern(self, value):
+        """
+        :param value: A hashable value (typically a str or int).
+        :returns: A previously seen value equal to ``value``, if there is
+            one, or ``value`` itself.
+        """
+
+        try:
+            return self._table[value]
+        except KeyError:
+            if len(self._table) >= self.max_size:
+                return value
+            # setdefault() keeps this safe between threads, since the
+            # first value stored wins.
+            return self._table.setdefault(value, value)
+
+
+class _Flight(object):
+    """
+    A call that's in progress, as shared by :py:class:`SingleFlight`.
+    """
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight(object):
+    """
+    Coalesces concurrent calls with the same key. The first caller for a
+    key makes the call. Anyone else asking for the same key while it's in
+    progress waits for it, and gets the same result (or exception)
+    instead of making the call again. Once the call finishes, the next
+    caller for the key starts afresh.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Key -> _Flight, for the calls in progress.
+        self._flights = {}
+        # How many calls were served by another caller's call.
+        self.coalesced_count = 0
+
+    def do(self, key, func, deadline=None):
+        """
+        :param key: A hashable key. Calls with equal keys are coalesced.
+        :param callable func: Makes the call, if no call with this key is
+            in progress.
+        :keyword Deadline deadline: How long to wait for a call made by
+            someone else.
+        :returns: The result of ``func``, or of the call in progress.
+        :raises: Whatever ``func`` raised, or DeadlineExceededError if the
+            deadline passes while waiting.
+        """
+
+        with self._lock:
+            flight = self._flights.get(key)
+            is_leader = flight is None
+            if is_leader:
+                flight = self._flights[key] = _Flight()
+            else:
+                self.coalesced_count += 1
+
+        if not is_leader:
+            # A wait can time out a little before the deadline has passed,
+            # so keep waiting until either the call finishes or the
+            # deadline check raises.
+            while True:
+                timeout = deadline.remaining() if deadline is not None else None
+                if flight.done.wait(None if timeout is None else max(timeout, 0)):
+                    break
+                deadline.check()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = func()
+        except Exception as exc:
+            flight.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+        return flight.result
 
 def prettyprint_xml(element):
     """
@@ -38,4 +264,6 @@ def prettyprint_xml(element):
     :returns: A prettyprinted representation of the element.
     """
 
+    from lxml import etree
+
     return etree.tostring(element, pretty_print=True).decode('utf-8')
@@ -0,0 +1,357 @@
+"""
+Local pre-flight checks for change sets. Route53 rejects a change batch as
+a whole if anything in it is invalid, which costs a full round trip (and
+usually a retry). Most of the reasons it does so can be checked locally,
+and all of the problems reported at once.
+
+Some checks need to know what is currently in the zone, such as whether a
+DELETE matches the existing record set. Those are only made when a
+:py:class:`ZoneSnapshot` is given.
+"""
+
+import socket
+import time
+from route53.util import normalize_dns_name
+from route53.xml_generators.change_resource_record_set import get_change_values
+
+# The fields that make up a record set's values, as found in change values.
+SNAPSHOT_FIELDS = (
+    'name', 'ttl', 'records', 'weight', 'region', 'set_identifier',
+    'failover', 'geolocation', 'health_check_id',
+    'alias_hosted_zone_id', 'alias_dns_name', 'alias_evaluate_target_health',
+)
+
+# Route53's limits.
+MAX_TTL = 2147483647
+MAX_WEIGHT = 255
+MAX_SET_IDENTIFIER_LENGTH = 128
+FAILOVER_VALUES = ('PRIMARY', 'SECONDARY')
+# Record set types that can only hold a single value.
+SINGLE_VALUE_RECORD_TYPES = ('CNAME', 'SOA')
+
+def get_record_set_key(name, rrset_type, set_identifier):
+    """
+    :rtype: tuple
+    :returns: The key that identifies a record set within a zone.
+    """
+
+    return normalize_dns_name(name), rrset_type, set_identifier
+
+def get_comparable_values(values):
+    """
+    Puts a set of record set values in a form where equivalent values
+    compare equal.
+    """
+
+    ttl = values.get('ttl')
+    weight = values.get('weight')
+    return (
+        int(ttl) if ttl is not None else None,
+        str(weight) if weight is not None else None,
+        values.get('region'),
+        values.get('failover'),
+        sorted((values.get('geolocation') or {}).items()),
+        values.get('health_check_id'),
+        values.get('alias_hosted_zone_id'),
+        normalize_dns_name(values.get('alias_dns_name')),
+        bool(values.get('alias_evaluate_target_health')),
+        sorted(values.get('records') or []),
+    )
+
+
+class ZoneSnapshot(object):
+    """
+    A point-in-time copy of a hosted zone's record sets, used for the
+    checks that depend on what is already in the zone. A snapshot can be
+    kept up to date by applying change sets to it as they are sent,
+    rather than listing the zone again.
+    """
+
+    def __init__(self, record_sets=()):
+        """
+        :param iterable record_sets: The zone's ResourceRecordSet sub-class
+            instances.
+        """
+
+        # Record set key -> dict of values (including 'type').
+        self._record_sets = {}
+        # Normalized name -> set of record set keys with that name.
+        self._names = {}
+        self.taken_at = time.time()
+
+        for rrset in record_sets:
+            values = get_change_values(('DELETE', rrset))
+            self._add(rrset.rrset_type, values)
+
+    @classmethod
+    def from_hosted_zone(cls, hosted_zone):
+        """
+        Takes a snapshot of a hosted zone's current record sets.
+
+        :param HostedZone hosted_zone: The zone to snapshot.
+        :rtype: ZoneSnapshot
+        """
+
+        return cls(hosted_zone.list_record_sets())
+
+    @classmethod
+    def from_values(cls, values_list):
+        """
+        Builds a snapshot from record set values, such as those held by
+        another snapshot, or read back from a dump.
+
+        :param iterable values_list: Dicts of record set values, each with a
+            ``type`` key.
+        :rtype: ZoneSnapshot
+        """
+
+        snapshot = cls()
+        for values in values_list:
+            snapshot._add(values['type'], values)
+        return snapshot
+
+    def __len__(self):
+        return len(self._record_sets)
+
+    def __contains__(self, key):
+        return key in self._record_sets
+
+    def __iter__(self):
+        return iter(self._record_sets)
+
+    def _add(self, rrset_type, values):
+        snapshot_values = dict(
+            (field, values.get(field)) for field in SNAPSHOT_FIELDS
+        )
+        snapshot_values['records'] = list(snapshot_values['records'] or [])
+        snapshot_values['type'] = rrset_type
+        key = get_record_set_key(values['name'], rrset_type, values.get('set_identifier'))
+        self._record_sets[key] = snapshot_values
+        self._names.setdefault(key[0], set()).add(key)
+
+    def _remove(self, key):
+        self._record_sets.pop(key, None)
+        keys = self._names.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._names[key[0]]
+
+    def get(self, key):
+        """
+        :param tuple key: A record set key, from
+            :py:func:`get_record_set_key`.
+        :rtype: dict
+        :returns: The record set's values, or ``None`` if it isn't in the
+            snapshot.
+        """
+
+        return self._record_sets.get(key)
+
+    def get_types_at(self, name):
+        """
+        :param str name: A record set name.
+        :rtype: set
+        :returns: The record types present at ``name``.
+        """
+
+        return set(key[1] for key in self._names.get(normalize_dns_name(name), ()))
+
+    def copy(self):
+        """
+        :rtype: ZoneSnapshot
+        :returns: An independent copy of this snapshot.
+        """
+
+        snapshot = ZoneSnapshot()
+        snapshot.taken_at = self.taken_at
+        for values in self._record_sets.values():
+            snapshot._add(values['type'], values)
+        return snapshot
+
+    def apply_change_set(self, change_set):
+        """
+        Updates the snapshot with a change set that has been sent.
+
+        :param ChangeSet change_set: The change set to apply.
+        """
+
+        for change in change_set.get_changes():
+            action, rrset = change
+            values = get_change_values(change)
+            key = get_record_set_key(values['name'], rrset.rrset_type, values.get('set_identifier'))
+            if action == 'DELETE':
+                self._remove(key)
+            else:
+                self._add(rrset.rrset_type, values)
+
+
+def _is_ip_address(family, value):
+    try:
+        socket.inet_pton(family, value)
+    except (socket.error, ValueError, TypeError):
+        return False
+    return True
+
+def _is_int_in_range(value, lower, upper):
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        return False
+    return lower <= value <= upper
+
+def _check_record_value(rrset_type, value):
+    """
+    :rtype: str
+    :returns: A description of what's wrong with a record value, or
+        ``None`` if it looks fine.
+    """
+
+    if rrset_type == 'A':
+        if not _is_ip_address(socket.AF_INET, value):
+            return "%r is not a valid IPv4 address" % value
+    elif rrset_type == 'AAAA':
+        if not _is_ip_address(socket.AF_INET6, value):
+            return "%r is not a valid IPv6 address" % value
+    elif rrset_type == 'MX':
+        parts = value.split()
+        if len(parts) != 2 or not _is_int_in_range(parts[0], 0, 65535):
+            return "%r is not in the form 'priority mail-server'" % value
+    elif rrset_type == 'SRV':
+        parts = value.split()
+        if len(parts) != 4 or not all(
+            _is_int_in_range(part, 0, 65535) for part in parts[:3]
+        ):
+            return "%r is not in the form 'priority weight port target'" % value
+    return None
+
+def _check_values(rrset_type, values):
+    """
+    Runs the checks that only need the change itself.
+
+    :rtype: list
+    :returns: A list of problem descriptions.
+    """
+
+    problems = []
+    records = values.get('records') or []
+    is_alias = bool(values.get('alias_dns_name') or values.get('alias_hosted_zone_id'))
+
+    if is_alias:
+        if not (values.get('alias_dns_name') and values.get('alias_hosted_zone_id')):
+            problems.append("alias record sets need both a DNS name and a hosted zone ID")
+        if records:
+            problems.append("alias record sets can't have record values")
+    else:
+        if not records:
+            problems.append("at least one record value is required")
+        if values.get('ttl') is None:
+            problems.append("a TTL is required")
+        elif not _is_int_in_range(values['ttl'], 0, MAX_TTL):
+            problems.append("TTL %r is out of range (0-%d)" % (values['ttl'], MAX_TTL))
+        if rrset_type in SINGLE_VALUE_RECORD_TYPES and len(records) > 1:
+            problems.append("%s record sets can only have one value" % rrset_type)
+        for record in records:
+            problem = _check_record_value(rrset_type, record)
+            if problem:
+                problems.append(problem)
+
+    weight = values.get('weight')
+    failover = values.get('failover')
+    geolocation = values.get('geolocation')
+    set_identifier = values.get('set_identifier')
+    if weight is not None and not _is_int_in_range(weight, 0, MAX_WEIGHT):
+        problems.append("weight %r is out of range (0-%d)" % (weight, MAX_WEIGHT))
+    if failover and failover not in FAILOVER_VALUES:
+        problems.append("failover must be one of %s" % ', '.join(FAILOVER_VALUES))
+    if geolocation:
+        if geolocation.get('continent_code') and geolocation.get('country_code'):
+            problems.append("a geolocation can't have both a continent and a country")
+        if geolocation.get('subdivision_code') and not geolocation.get('country_code'):
+            problems.append("a geolocation subdivision requires a country")
+
+    routing_policies = [
+        policy for policy, is_set in (
+            ('weighted', weight is not None),
+            ('latency-based', bool(values.get('region'))),
+            ('failover', bool(failover)),
+            ('geolocation', bool(geolocation)),
+        ) if is_set
+    ]
+    if len(routing_policies) > 1:
+        problems.append(
+            "a record set can only have one routing policy (%s)" % ', '.join(routing_policies)
+        )
+    if routing_policies and not set_identifier:
+        problems.append("%s record sets need a set_identifier" % routing_policies[0])
+    if set_identifier and not routing_policies:
+        problems.append(
+            "a set_identifier requires a weight, region, failover or geolocation"
+        )
+    if set_identifier and len(set_identifier) > MAX_SET_IDENTIFIER_LENGTH:
+        problems.append(
+            "set_identifier is longer than %d characters" % MAX_SET_IDENTIFIER_LENGTH
+        )
+
+    return problems
+
+def validate_change_set(change_set, snapshot=None):
+    """
+    Checks a change set for problems that would get it rejected by
+    Route53.
+
+    :param ChangeSet change_set: The change set to check.
+    :keyword ZoneSnapshot snapshot: The zone's current contents. If given,
+        DELETEs are checked against the existing record sets, CREATEs
+        against record sets that already exist, and CNAMEs against the
+        other record sets at the same name. Without one, these checks only
+        consider the changes within the change set.
+    :rtype: list
+    :returns: A list of problem descriptions. Empty if no problems were
+        found.
+    """
+
+    problems = []
+    state = snapshot.copy() if snapshot is not None else ZoneSnapshot()
+    touched_names = set()
+
+    # Changes are checked in the order Route53 applies them.
+    for change in change_set.get_changes():
+        action, rrset = change
+        rrset_type = rrset.rrset_type
+        values = get_change_values(change)
+        key = get_record_set_key(values['name'], rrset_type, values.get('set_identifier'))
+        label = '%s %s %s' % (action, values['name'], rrset_type)
+        if values.get('set_identifier'):
+            label += ' (%s)' % values['set_identifier']
+
+        for problem in _check_values(rrset_type, values):
+            problems.append('%s: %s' % (label, problem))
+
+        existing = state.get(key)
+        if action == 'DELETE':
+            if snapshot is not None:
+                if existing is None:
+                    problems.append('%s: no such record set' % label)
+                elif get_comparable_values(existing) != get_comparable_values(values):
+                    problems.append(
+                        "%s: values don't match the existing record set" % label
+                    )
+            state._remove(key)
+            continue
+
+        if action == 'CREATE' and existing is not None:
+            problems.append('%s: record set already exists' % label)
+        state._add(rrset_type, values)
+        touched_names.add(key[0])
+
+    for name in sorted(touched_names):
+        types = state.get_types_at(name)
+        if 'CNAME' in types and len(types) > 1:
+            problems.append(
+                '%s: a CNAME can\'t coexist with other record types (%s)' % (
+                    name, ', '.join(sorted(types - set(['CNAME'])))
+                )
+            )
+
+    return problems
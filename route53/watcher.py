@@ -0,0 +1,323 @@
+"""
+Watches hosted zones for changes made outside of your own code (the AWS
+console, other tools, etc), and reports them as record-level diffs.
+
+Fully listing every zone on every poll gets expensive quickly. Instead,
+each poll lists the hosted zones (which includes their record set
+counts), and fetches a small first page of each zone's record sets as a
+content fingerprint. Only zones whose count or fingerprint changed are
+fully listed and diffed.
+
+.. note:: A fingerprint only covers the start of a zone, so an edit that
+    leaves the record set count alone and falls outside of the first page
+    isn't noticed until the zone is next fully listed. Use
+    ``full_resync_every`` to bound how long that can take.
+"""
+
+import hashlib
+import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from route53.deadline import bind_deadline
+from route53.validation import ZoneSnapshot, get_comparable_values
+from route53.xml_generators.change_resource_record_set import get_change_values
+
+logger = logging.getLogger(__name__)
+
+
+class ZoneDiff(object):
+    """
+    The record-level differences found in a hosted zone between two polls.
+
+    Record sets are represented as dicts of their values, with ``name``,
+    ``type``, ``ttl``, ``records``, ``weight``, ``region``,
+    ``set_identifier``, ``alias_hosted_zone_id`` and ``alias_dns_name``
+    keys.
+    """
+
+    def __init__(self, zone, added=None, removed=None, changed=None):
+        """
+        :param HostedZone zone: The hosted zone that changed.
+        :keyword list added: Record sets that are new.
+        :keyword list removed: Record sets that are gone.
+        :keyword list changed: ``(old, new)`` tuples for record sets whose
+            values changed.
+        """
+
+        self.zone = zone
+        self.added = added or []
+        self.removed = removed or []
+        self.changed = changed or []
+
+    def __repr__(self):
+        return '<ZoneDiff: %s, %d added, %d removed, %d changed>' % (
+            self.zone.name, len(self.added), len(self.removed), len(self.changed)
+        )
+
+    def __bool__(self):
+        return bool(self.added or self.removed or self.changed)
+
+    # Python 2.x compatibility.
+    __nonzero__ = __bool__
+
+    @classmethod
+    def from_snapshots(cls, zone, old, new):
+        """
+        Computes the differences between two snapshots of a zone.
+
+        :param HostedZone zone: The zone the snapshots are of.
+        :param ZoneSnapshot old: The earlier snapshot.
+        :param ZoneSnapshot new: The later snapshot.
+        :rtype: ZoneDiff
+        """
+
+        diff = cls(zone)
+        for key in new:
+            values = new.get(key)
+            old_values = old.get(key)
+            if old_values is None:
+                diff.added.append(values)
+            elif get_comparable_values(old_values) != get_comparable_values(values):
+                diff.changed.append((old_values, values))
+        for key in old:
+            if key not in new:
+                diff.removed.append(old.get(key))
+        return diff
+
+
+def _get_fingerprint(zone, rrsets):
+    """
+    Fingerprints a zone by its record set count, and a digest of the given
+    record sets (the start of its listing).
+
+    :rtype: tuple
+    """
+
+    digest = hashlib.sha1()
+    for rrset in rrsets:
+        values = get_change_values(('DELETE', rrset))
+        entry = [rrset.rrset_type, values['name'], values.get('set_identifier')]
+        entry.extend(get_comparable_values(values))
+        digest.update(json.dumps(entry).encode('utf-8'))
+    return zone.resource_record_set_count, digest.hexdigest()
+
+
+class ZoneWatcher(object):
+    """
+    Polls hosted zones for changes, and hands a :py:class:`ZoneDiff` to
+    each callback for every zone that changed.
+
+    The first poll takes a baseline of every zone, and reports nothing.
+    After that, zones that appear are reported with all of their record
+    sets added, and zones that disappear with all of them removed.
+    Callbacks are called from the polling thread, one zone at a time.
+
+    A zone that can't be checked (it was deleted part way through a poll,
+    or its listing was throttled, say) doesn't hold up the others. The
+    error is handed to ``error_callback``, and the zone is checked again on
+    the next poll.
+    """
+
+    def __init__(self, connection, callbacks=None, interval=60, max_workers=4,
+                 fingerprint_page_size=10, full_resync_every=None,
+                 page_chunks=100, error_callback=None):
+        """
+        :param Route53Connection connection: The connection to poll with.
+        :keyword list callbacks: Callables to hand each :py:class:`ZoneDiff`
+            to. More can be added with :py:meth:`add_callback`.
+        :keyword int interval: Seconds between polls, when using
+            :py:meth:`run` or :py:meth:`start`.
+        :keyword int max_workers: The maximum number of zones to
+            fingerprint or list at once.
+        :keyword int fingerprint_page_size: The number of record sets to
+            fingerprint each zone by. With ``0``, only the record set count
+            is compared, which saves a request per zone per poll. An edit
+            past the first this many record sets that leaves the count alone
+            is only noticed by a full resync.
+        :keyword int full_resync_every: If set, every zone is fully listed
+            every this many polls, regardless of its fingerprint. Without
+            it, edits missed by the fingerprint may never be reported.
+        :keyword int page_chunks: The maximum number of record sets per
+            request when fully listing a zone.
+        :keyword callable error_callback: Called with the
+            :py:class:`HostedZone <route53.hosted_zone.HostedZone>` and the
+            exception, for each zone that couldn't be checked. By default,
+            these are logged.
+        """
+
+        self.connection = connection
+        self.callbacks = list(callbacks or [])
+        self.interval = interval
+        self.max_workers = max_workers
+        self.fingerprint_page_size = fingerprint_page_size
+        self.full_resync_every = full_resync_every
+        self.page_chunks = page_chunks
+        self.error_callback = error_callback
+
+        # Zone ID -> (zone, fingerprint, snapshot), as of the last poll.
+        self._zones = {}
+        # IDs of zones that couldn't be checked for the baseline, and so
+        # still need one.
+        self._missing_baseline = set()
+        self._poll_count = 0
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def add_callback(self, callback):
+        """
+        :param callable callback: Called with a :py:class:`ZoneDiff` for each
+            zone that changed.
+        """
+
+        self.callbacks.append(callback)
+
+    def _check_zone(self, zone, full_resync):
+        """
+        Fingerprints a zone, and lists it if it looks different.
+
+        :rtype: tuple
+        :returns: A tuple in the form of ``(fingerprint, snapshot)``. The
+            snapshot is ``None`` if the zone looks unchanged.
+        """
+
+        previous = self._zones.get(zone.id)
+        page_size = self.fingerprint_page_size
+        if previous is not None and not full_resync and \
+           previous[0].resource_record_set_count == zone.resource_record_set_count:
+            if page_size:
+                page = next(zone.iter_record_set_pages(page_chunks=page_size))
+                fingerprint = _get_fingerprint(zone, page)
+            else:
+                fingerprint = _get_fingerprint(zone, [])
+            if fingerprint == previous[1]:
+                return fingerprint, None
+
+        rrsets = list(zone.list_record_sets(page_chunks=self.page_chunks))
+        # The full listing starts with the same record sets as the
+        # fingerprint page would, so there's no need to fetch that too.
+        fingerprint = _get_fingerprint(zone, rrsets[:page_size])
+        return fingerprint, ZoneSnapshot(rrsets)
+
+    def _check_zone_safely(self, zone, full_resync):
+        """
+        Like :py:meth:`_check_zone`, but returns the exception instead of
+        raising it, so one zone can't stop the others.
+        """
+
+        try:
+            return self._check_zone(zone, full_resync)
+        except Exception as exc:
+            return exc
+
+    def _report_error(self, zone, exc):
+        if self.error_callback is not None:
+            self.error_callback(zone, exc)
+        else:
+            logger.warning(
+                "Couldn't check hosted zone %s (%s): %s", zone.name, zone.id, exc
+            )
+
+    def poll_once(self):
+        """
+        Polls every hosted zone once, and calls the callbacks for each zone
+        that changed.
+
+        :rtype: list
+        :returns: A list of :py:class:`ZoneDiff` instances, one per zone
+            that changed.
+        """
+
+        is_baseline = self._poll_count == 0
+        self._poll_count += 1
+        full_resync = bool(
+            self.full_resync_every and
+            self._poll_count % self.full_resync_every == 0
+        )
+
+        zones = list(self.connection.list_hosted_zones())
+
+        executor = ThreadPoolExecutor(max_workers=max(1, self.max_workers))
+        try:
+            results = list(executor.map(
+                bind_deadline(lambda zone: self._check_zone_safely(zone, full_resync)),
+                zones
+            ))
+        finally:
+            executor.shutdown(wait=True)
+
+        diffs = []
+        seen = set()
+        for zone, result in zip(zones, results):
+            seen.add(zone.id)
+            previous = self._zones.get(zone.id)
+            if isinstance(result, Exception):
+                # What we knew of the zone stands until it can be checked.
+                if is_baseline:
+                    self._missing_baseline.add(zone.id)
+                self._report_error(zone, result)
+                continue
+
+            fingerprint, snapshot = result
+            if snapshot is None:
+                self._zones[zone.id] = (zone, fingerprint, previous[2])
+                continue
+
+            self._zones[zone.id] = (zone, fingerprint, snapshot)
+            if is_baseline or zone.id in self._missing_baseline:
+                self._missing_baseline.discard(zone.id)
+                continue
+            old_snapshot = previous[2] if previous is not None else ZoneSnapshot()
+            diff = ZoneDiff.from_snapshots(zone, old_snapshot, snapshot)
+            if diff:
+                diffs.append(diff)
+
+        self._missing_baseline &= seen
+        for zone_id in list(self._zones):
+            if zone_id not in seen:
+                zone, _, snapshot = self._zones.pop(zone_id)
+                diffs.append(ZoneDiff.from_snapshots(zone, snapshot, ZoneSnapshot()))
+
+        for diff in diffs:
+            for callback in self.callbacks:
+                callback(diff)
+        return diffs
+
+    def run(self):
+        """
+        Polls every ``interval`` seconds, until :py:meth:`stop` is called.
+        Errors checking individual zones are reported, and polling carries
+        on. Other exceptions (including those raised by callbacks, and
+        failures listing the zones) stop the loop and are raised to the
+        caller.
+        """
+
+        self._stop_event.clear()
+        while not self._stop_event.is_set():
+            self.poll_once()
+            self._stop_event.wait(self.interval)
+
+    def start(self):
+        """
+        Runs :py:meth:`run` in a background (daemon) thread.
+
+        :rtype: threading.Thread
+        :returns: The polling thread.
+        """
+
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self.run)
+        self._thread.daemon = True
+        self._thread.start()
+        return self._thread
+
+    def stop(self):
+        """
+        Stops polling after the current poll (if any) finishes.
+        """
+
+        self._stop_event.set()
+        if self._thread is not None and \
+           self._thread is not threading.current_thread():
+            self._thread.join()
+            self._thread = None
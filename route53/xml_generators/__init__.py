@@ -1,2 +1,33 @@
-from .created_hosted_zone import create_hosted_zone_writer
-from .change_resource_record_set import change_resource_record_set_writer
\ No newline at end of file
+"""
+Writers for the Route53 API's request bodies. Each writer is imported the
+first time it's used, so that importing this package doesn't load lxml.
+"""
+
+import importlib
+import sys
+
+# Writer name -> the module it lives in.
+_WRITER_MODULES = {
+    'create_hosted_zone_writer': 'created_hosted_zone',
+    'change_resource_record_set_writer': 'change_resource_record_set',
+}
+
+__all__ = sorted(_WRITER_MODULES)
+
+def __getattr__(name):
+    try:
+        module_name = _WRITER_MODULES[name]
+    except KeyError:
+        raise AttributeError("module %r has no attribute %r" % (__name__, name))
+    writer = getattr(importlib.import_module('.' + module_name, __name__), name)
+    # Cache it, so that we don't come back through here next time.
+    globals()[name] = writer
+    return writer
+
+def __dir__():
+    return sorted(set(globals()) | set(_WRITER_MODULES))
+
+if sys.version_info < (3, 7):
+    # No module-level __getattr__ support (PEP 562), so import everything.
+    for _name in _WRITER_MODULES:
+        __getattr__(_name)
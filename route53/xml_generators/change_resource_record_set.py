@@ -2,11 +2,20 @@ from io import BytesIO
 from lxml import etree
 from route53.util import prettyprint_xml
 
+# GeoLocation subtag names, and the geolocation dict keys they map to, in
+# the order the API expects them.
+GEOLOCATION_TAGS = (
+    ('ContinentCode', 'continent_code'),
+    ('CountryCode', 'country_code'),
+    ('SubdivisionCode', 'subdivision_code'),
+)
+
 def get_change_values(change):
     """
     In the case of deletions, we pull the change values for the XML request
     from the ResourceRecordSet._initial_vals dict, since we want the original
-    values. For creations, we pull from the attributes on ResourceRecordSet.
+    values. For creations and upserts, we pull from the attributes on
+    ResourceRecordSet.
 
     Since we're dealing with attributes vs. dict key/vals, we'll abstract
     this part away here and just always pass a dict to write_change.
@@ -18,19 +27,22 @@ def get_change_values(change):
 
     action, rrset = change
 
-    if action == 'CREATE':
+    # We always hand back a copy, so that callers can't change the record
+    # set's initial values (or its records) behind its back.
+    values = dict(rrset._initial_vals)
+    if action in ('CREATE', 'UPSERT'):
         # For creations, we want the current values, since they don't need to
-        # match an existing record set.
-        values = dict()
-        for key, val in rrset._initial_vals.items():
-            # Pull from the record set's attributes, which are the current
-            # values.
+        # match an existing record set. Only the modified fields differ from
+        # the initial values, so those are all we need to look up.
+        for key in rrset._dirty:
             values[key] = getattr(rrset, key)
-        return values
-    else:
-        # We can look at the initial values dict for deletions, since we
-        # have to match against the values currently in Route53.
-        return rrset._initial_vals
+    # For deletions, the initial values are what we want, since we have to
+    # match against the values currently in Route53.
+    if values.get('records') is not None:
+        values['records'] = list(values['records'])
+    if values.get('geolocation') is not None:
+        values['geolocation'] = dict(values['geolocation'])
+    return values
 
 def write_change(change):
     """
@@ -63,9 +75,24 @@ def write_change(change):
         e_set_id = etree.SubElement(e_rrset, "SetIdentifier")
         e_set_id.text = change_vals['set_identifier']
 
-    if change_vals.get('weight'):
+    if change_vals.get('weight') is not None:
         e_weight = etree.SubElement(e_rrset, "Weight")
-        e_weight.text = change_vals['weight']
+        e_weight.text = str(change_vals['weight'])
+
+    if change_vals.get('region'):
+        e_weight = etree.SubElement(e_rrset, "Region")
+        e_weight.text = change_vals['region']
+
+    if change_vals.get('geolocation'):
+        e_geolocation = etree.SubElement(e_rrset, "GeoLocation")
+        for tag_name, key in GEOLOCATION_TAGS:
+            if change_vals['geolocation'].get(key):
+                e_code = etree.SubElement(e_geolocation, tag_name)
+                e_code.text = change_vals['geolocation'][key]
+
+    if change_vals.get('failover'):
+        e_failover = etree.SubElement(e_rrset, "Failover")
+        e_failover.text = change_vals['failover']
 
     if change_vals.get('alias_hosted_zone_id') or change_vals.get('alias_dns_name'):
         e_alias_target = etree.SubElement(e_rrset, "AliasTarget")
@@ -74,24 +101,27 @@ def write_change(change):
         e_hosted_zone_id.text = change_vals['alias_hosted_zone_id']
         e_dns_name = etree.SubElement(e_alias_target, "DNSName")
         e_dns_name.text = change_vals['alias_dns_name']
+        # Required as of the 2013-04-01 API.
+        e_evaluate = etree.SubElement(e_alias_target, "EvaluateTargetHealth")
+        if change_vals.get('alias_evaluate_target_health'):
+            e_evaluate.text = 'true'
+        else:
+            e_evaluate.text = 'false'
+        # Record sets in Alias mode have no TTL or resource records.
+    else:
+        e_ttl = etree.SubElement(e_rrset, "TTL")
+        e_ttl.text = str(change_vals['ttl'])
 
-    if change_vals.get('region'):
-        e_weight = etree.SubElement(e_rrset, "Region")
-        e_weight.text = change_vals['region']
-
-    e_ttl = etree.SubElement(e_rrset, "TTL")
-    e_ttl.text = str(change_vals['ttl'])
-
-    if rrset.is_alias_record_set():
-        # A record sets in Alias mode don't have any resource records.
-        return e_change
+        e_resource_records = etree.SubElement(e_rrset, "ResourceRecords")
 
-    e_resource_records = etree.SubElement(e_rrset, "ResourceRecords")
+        for value in change_vals['records']:
+            e_resource_record = etree.SubElement(e_resource_records, "ResourceRecord")
+            e_value = etree.SubElement(e_resource_record, "Value")
+            e_value.text = value
 
-    for value in change_vals['records']:
-        e_resource_record = etree.SubElement(e_resource_records, "ResourceRecord")
-        e_value = etree.SubElement(e_resource_record, "Value")
-        e_value.text = value
+    if change_vals.get('health_check_id'):
+        e_health_check_id = etree.SubElement(e_rrset, "HealthCheckId")
+        e_health_check_id.text = change_vals['health_check_id']
 
     return e_change
 
@@ -121,7 +151,7 @@ def change_resource_record_set_writer(connection, change_set, comment=None):
     e_changes = etree.SubElement(e_change_batch, "Changes")
 
     # Deletions need to come first in the change sets.
-    for change in change_set.deletions + change_set.creations:
+    for change in change_set.get_changes():
         e_changes.append(write_change(change))
 
     e_tree = etree.ElementTree(element=e_root)
@@ -1,5 +1,38 @@
-from .list_hosted_zones import list_hosted_zones_parser
-from .created_hosted_zone import created_hosted_zone_parser
-from .get_hosted_zone_by_id import get_hosted_zone_by_id_parser
-from .delete_hosted_zone_by_id import delete_hosted_zone_by_id_parser
-from .list_resource_record_sets_by_zone_id import list_resource_record_sets_by_zone_id_parser
\ No newline at end of file
+"""
+Parsers for the Route53 API's responses. Each parser is imported the first
+time it's used, so that importing this package doesn't pull in every
+parser (and the classes they build) up front.
+"""
+
+import importlib
+import sys
+
+# Parser name -> the module it lives in.
+_PARSER_MODULES = {
+    'list_hosted_zones_parser': 'list_hosted_zones',
+    'created_hosted_zone_parser': 'created_hosted_zone',
+    'get_hosted_zone_by_id_parser': 'get_hosted_zone_by_id',
+    'delete_hosted_zone_by_id_parser': 'delete_hosted_zone_by_id',
+    'list_resource_record_sets_by_zone_id_parser': 'list_resource_record_sets_by_zone_id',
+    'get_change_parser': 'get_change',
+}
+
+__all__ = sorted(_PARSER_MODULES)
+
+def __getattr__(name):
+    try:
+        module_name = _PARSER_MODULES[name]
+    except KeyError:
+        raise AttributeError("module %r has no attribute %r" % (__name__, name))
+    parser = getattr(importlib.import_module('.' + module_name, __name__), name)
+    # Cache it, so that we don't come back through here next time.
+    globals()[name] = parser
+    return parser
+
+def __dir__():
+    return sorted(set(globals()) | set(_PARSER_MODULES))
+
+if sys.version_info < (3, 7):
+    # No module-level __getattr__ support (PEP 562), so import everything.
+    for _name in _PARSER_MODULES:
+        __getattr__(_name)
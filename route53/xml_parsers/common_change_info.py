@@ -18,6 +18,9 @@ def parse_change_info(e_change_info):
     if e_change_info is None:
         return e_change_info
 
+    id = e_change_info.find('./{*}Id').text
+    # This comes back with a path prepended. Yank that sillyness.
+    id = id.replace('/change/', '')
     status = e_change_info.find('./{*}Status').text
     submitted_at = e_change_info.find('./{*}SubmittedAt').text
     submitted_at = parse_iso_8601_time_str(submitted_at)
@@ -47,7 +47,10 @@ def parse_hosted_zone(e_zone, connection):
             field_text = field_text.strip('/hostedzone/')
 
         # Map the XML tag name to a kwarg name.
-        kw_name = HOSTED_ZONE_TAG_TO_KWARG_MAP[tag_name]
+        kw_name = HOSTED_ZONE_TAG_TO_KWARG_MAP.get(tag_name)
+        if kw_name is None:
+            # A tag we don't support yet.
+            continue
         # This will be the key/val pair used to instantiate the
         # HostedZone instance.
         kwargs[kw_name] = field_text
@@ -61,8 +64,12 @@ def parse_delegation_set(zone, e_delegation_set):
 
     :param HostedZone zone: An existing HostedZone instance to populate.
     :param lxml.etree._Element e_delegation_set: A DelegationSet element.
+        Private hosted zones have none, in which case this is ``None``.
     """
 
+    if e_delegation_set is None:
+        return
+
     e_nameservers = e_delegation_set.find('./{*}NameServers')
 
     nameservers = []
@@ -1,4 +1,5 @@
 from route53.exceptions import Route53Error
+from route53.xml_generators.change_resource_record_set import GEOLOCATION_TAGS
 from route53.resource_record_set import AResourceRecordSet, AAAAResourceRecordSet, CNAMEResourceRecordSet, MXResourceRecordSet, NSResourceRecordSet, PTRResourceRecordSet, SOAResourceRecordSet, SPFResourceRecordSet, SRVResourceRecordSet, TXTResourceRecordSet
 
 # Maps ResourceRecordSet subtag names to kwargs in RRSet subclasses.
@@ -8,8 +9,13 @@ RRSET_TAG_TO_KWARG_MAP = {
     'Weight': 'weight',
     'Region': 'region',
     'SetIdentifier': 'set_identifier',
+    'Failover': 'failover',
+    'HealthCheckId': 'health_check_id',
 }
 
+# Maps GeoLocation subtag names to keys in the geolocation dict.
+GEOLOCATION_TAG_TO_KEY_MAP = dict(GEOLOCATION_TAGS)
+
 # Maps the various ResourceRecordSet Types to various RRSet subclasses.
 RRSET_TYPE_TO_RSET_SUBCLASS_MAP = {
     'A': AResourceRecordSet,
@@ -24,27 +30,69 @@ RRSET_TYPE_TO_RSET_SUBCLASS_MAP = {
     'TXT': TXTResourceRecordSet,
 }
 
-def parse_rrset_alias(e_alias):
+# Tags whose values repeat a lot across a zone, and are worth interning.
+# Names are left out, since they are mostly unique.
+INTERNED_RRSET_TAGS = set(['Weight', 'Region', 'SetIdentifier', 'Failover', 'HealthCheckId'])
+
+def _no_intern(value):
+    """
+    Stand-in for StringInterner.intern when no interner is in use.
+    """
+
+    return value
+
+def parse_rrset_alias(e_alias, intern=_no_intern):
     """
-    Parses an Alias tag beneath a ResourceRecordSet, spitting out the two values
+    Parses an Alias tag beneath a ResourceRecordSet, spitting out the values
     found within. This is specific to A records that are set to Alias.
 
     :param lxml.etree._Element e_alias: An Alias tag beneath a ResourceRecordSet.
+    :keyword callable intern: Used to de-duplicate the parsed values.
+    :rtype: tuple
+    :returns: A tuple in the form of ``(alias_hosted_zone_id, alias_dns_name,
+        alias_evaluate_target_health)``.
+    """
+
+    alias_hosted_zone_id = intern(e_alias.find('./{*}HostedZoneId').text)
+    alias_dns_name = intern(e_alias.find('./{*}DNSName').text)
+    e_evaluate = e_alias.find('./{*}EvaluateTargetHealth')
+    alias_evaluate_target_health = e_evaluate is not None and e_evaluate.text == 'true'
+    return alias_hosted_zone_id, alias_dns_name, alias_evaluate_target_health
+
+def parse_rrset_geolocation(e_geolocation, intern=_no_intern):
+    """
+    Parses a GeoLocation tag beneath a ResourceRecordSet.
+
+    :param lxml.etree._Element e_geolocation: A GeoLocation tag beneath a
+        ResourceRecordSet.
+    :keyword callable intern: Used to de-duplicate the parsed values.
     :rtype: tuple
-    :returns: A tuple in the form of ``(alias_hosted_zone_id, alias_dns_name)``.
+    :returns: A tuple in the form of ``(geolocation, unrecognized_tags)``,
+        where ``geolocation`` is a dict of the location codes, and
+        ``unrecognized_tags`` lists any subtags that weren't parsed.
     """
 
-    alias_hosted_zone_id = e_alias.find('./{*}HostedZoneId').text
-    alias_dns_name = e_alias.find('./{*}DNSName').text
-    return alias_hosted_zone_id, alias_dns_name
+    geolocation = {}
+    unrecognized_tags = []
+
+    for e_code in e_geolocation:
+        tag_name = e_code.tag.split('}')[1]
+        key = GEOLOCATION_TAG_TO_KEY_MAP.get(tag_name)
+        if key is None:
+            unrecognized_tags.append('GeoLocation/' + tag_name)
+            continue
+        geolocation[key] = intern(e_code.text)
+
+    return geolocation, unrecognized_tags
 
-def parse_rrset_record_values(e_resource_records):
+def parse_rrset_record_values(e_resource_records, intern=_no_intern):
     """
     Used to parse the various Values from the ResourceRecords tags on
     most rrset types.
 
     :param lxml.etree._Element e_resource_records: A ResourceRecords tag
         beneath a ResourceRecordSet.
+    :keyword callable intern: Used to de-duplicate the parsed values.
     :rtype: list
     :returns: A list of resource record strings.
     """
@@ -53,11 +101,11 @@ def parse_rrset_record_values(e_resource_records):
 
     for e_record in e_resource_records:
         for e_value in e_record:
-            records.append(e_value.text)
+            records.append(intern(e_value.text))
 
     return records
 
-def parse_rrset(e_rrset, connection, zone_id):
+def parse_rrset(e_rrset, connection, zone_id, interner=None):
     """
     This a parser that allows the passing of any valid ResourceRecordSet
     tag. It will spit out the appropriate ResourceRecordSet object for the tag.
@@ -67,16 +115,23 @@ def parse_rrset(e_rrset, connection, zone_id):
     :param Route53Connection connection: The connection instance used to
         query the API.
     :param str zone_id: The zone ID of the HostedZone these rrsets belong to.
+    :keyword StringInterner interner: If specified, repeated values (TTLs,
+        record values, alias targets, and so on) are de-duplicated through
+        this :py:class:`StringInterner <route53.util.StringInterner>`.
     :rtype: ResourceRecordSet
     :returns: An instantiated ResourceRecordSet object.
     """
 
+    intern = interner.intern if interner is not None else _no_intern
+
     # This dict will be used to instantiate a ResourceRecordSet instance to yield.
     kwargs = {
         'connection': connection,
         'zone_id': zone_id,
     }
     rrset_type = None
+    # Tags for features we don't support yet, which newer API versions add.
+    unrecognized_tags = []
 
     for e_field in e_rrset:
         # Cheesy way to strip off the namespace.
@@ -90,18 +145,34 @@ def parse_rrset(e_rrset, connection, zone_id):
             continue
         elif tag_name == 'AliasTarget':
             # A records have some special field values we need.
-            alias_hosted_zone_id, alias_dns_name = parse_rrset_alias(e_field)
+            alias_hosted_zone_id, alias_dns_name, alias_evaluate_target_health = \
+                parse_rrset_alias(e_field, intern)
             kwargs['alias_hosted_zone_id'] = alias_hosted_zone_id
             kwargs['alias_dns_name'] = alias_dns_name
+            kwargs['alias_evaluate_target_health'] = alias_evaluate_target_health
             # Alias A entries have no TTL.
             kwargs['ttl'] = None
             continue
+        elif tag_name == 'GeoLocation':
+            geolocation, geolocation_unrecognized = parse_rrset_geolocation(e_field, intern)
+            kwargs['geolocation'] = geolocation
+            unrecognized_tags.extend(geolocation_unrecognized)
+            continue
         elif tag_name == 'ResourceRecords':
-            kwargs['records'] = parse_rrset_record_values(e_field)
+            kwargs['records'] = parse_rrset_record_values(e_field, intern)
+            continue
+        elif tag_name == 'TTL':
+            # Converting here lets equal TTLs share one int object.
+            kwargs['ttl'] = intern(int(field_text))
             continue
+        elif tag_name in INTERNED_RRSET_TAGS:
+            field_text = intern(field_text)
 
         # Map the XML tag name to a kwarg name.
-        kw_name = RRSET_TAG_TO_KWARG_MAP[tag_name]
+        kw_name = RRSET_TAG_TO_KWARG_MAP.get(tag_name)
+        if kw_name is None:
+            unrecognized_tags.append(tag_name)
+            continue
         # This will be the key/val pair used to instantiate the
         # ResourceRecordSet instance.
         kwargs[kw_name] = field_text
@@ -114,9 +185,15 @@ def parse_rrset(e_rrset, connection, zone_id):
         kwargs['records'] = []
 
     RRSetSubclass = RRSET_TYPE_TO_RSET_SUBCLASS_MAP[rrset_type]
-    return RRSetSubclass(**kwargs)
-
-def list_resource_record_sets_by_zone_id_parser(e_root, connection, zone_id):
+    rrset = RRSetSubclass(**kwargs)
+    if unrecognized_tags:
+        # Writing this record set back would drop these settings, so
+        # ChangeSet refuses to create or upsert it.
+        rrset._unrecognized_tags = frozenset(unrecognized_tags)
+    return rrset
+
+def list_resource_record_sets_by_zone_id_parser(e_root, connection, zone_id,
+                                                interner=None):
     """
     Parses the API responses for the
     :py:meth:`route53.connection.Route53Connection.list_resource_record_sets_by_zone_id`
@@ -127,6 +204,8 @@ def list_resource_record_sets_by_zone_id_parser(e_root, connection, zone_id):
     :param Route53Connection connection: The connection instance used to
         query the API.
     :param str zone_id: The zone ID of the HostedZone these rrsets belong to.
+    :keyword StringInterner interner: If specified, used to de-duplicate
+        repeated values across the parsed record sets.
     :rtype: ResourceRecordSet
     :returns: A generator of fully formed ResourceRecordSet instances.
     """
@@ -137,4 +216,4 @@ def list_resource_record_sets_by_zone_id_parser(e_root, connection, zone_id):
     e_rrsets = e_root.find('./{*}ResourceRecordSets')
 
     for e_rrset in e_rrsets:
-        yield parse_rrset(e_rrset, connection, zone_id)
+        yield parse_rrset(e_rrset, connection, zone_id, interner)
@@ -0,0 +1,155 @@
+"""
+An in-memory index of hosted zones, keyed by DNS name. Names are stored in
+a trie of reversed labels (``api.example.com.`` is stored as
+``com -> example -> api``), which makes finding the zone that owns an
+arbitrary FQDN a handful of dict lookups, regardless of how many zones
+are in the account.
+"""
+
+import threading
+
+def _reversed_labels(name):
+    """
+    :param str name: A DNS name, with or without the trailing dot.
+    :rtype: list
+    :returns: The name's labels, most significant (TLD) first.
+    """
+
+    labels = name.lower().rstrip('.').split('.')
+    labels.reverse()
+    return labels
+
+
+class _SuffixNode(object):
+    """
+    A single node in the suffix trie. ``zones`` holds any zones whose name
+    ends at this node.
+    """
+
+    __slots__ = ('children', 'zones')
+
+    def __init__(self):
+        self.children = {}
+        self.zones = []
+
+
+class ZoneSuffixIndex(object):
+    """
+    Maps DNS names to :py:class:`HostedZone <route53.hosted_zone.HostedZone>`
+    instances. Route53 allows several zones with the same name to exist at
+    once. When that happens, lookups return the zone that was added to the
+    index first.
+
+    Instances are thread-safe. Writes are serialized with a lock, and
+    lookups never see a partially added or removed zone.
+    """
+
+    def __init__(self, zones=None):
+        """
+        :keyword iterable zones: An optional iterable of HostedZone instances
+            to populate the index with.
+        """
+
+        self._root = _SuffixNode()
+        # Maps zone IDs to the trie node holding them, for fast removal.
+        self._nodes_by_id = {}
+        self._lock = threading.RLock()
+
+        if zones:
+            for zone in zones:
+                self.add(zone)
+
+    def __len__(self):
+        return len(self._nodes_by_id)
+
+    def __contains__(self, zone_id):
+        return zone_id in self._nodes_by_id
+
+    def add(self, zone):
+        """
+        Adds a zone to the index. Adding a zone whose ID is already in the
+        index replaces the existing entry.
+
+        :param HostedZone zone: The zone to add.
+        """
+
+        with self._lock:
+            if zone.id in self._nodes_by_id:
+                self.remove(zone.id)
+
+            node = self._root
+            for label in _reversed_labels(zone.name):
+                child = node.children.get(label)
+                if child is None:
+                    child = node.children[label] = _SuffixNode()
+                node = child
+
+            # Swap in a new list rather than appending, so that lock-free
+            # readers always see a complete list.
+            node.zones = node.zones + [zone]
+            self._nodes_by_id[zone.id] = node
+
+    def remove(self, zone_id):
+        """
+        Removes a zone from the index. Unknown IDs are ignored.
+
+        :param str zone_id: The ID of the zone to remove.
+        """
+
+        with self._lock:
+            node = self._nodes_by_id.pop(zone_id, None)
+            if node is None:
+                return
+
+            node.zones = [zone for zone in node.zones if zone.id != zone_id]
+
+    def _find_node(self, name):
+        """
+        :param str name: A DNS name.
+        :rtype: _SuffixNode
+        :returns: The node matching the exact name, or ``None``.
+        """
+
+        node = self._root
+        for label in _reversed_labels(name):
+            node = node.children.get(label)
+            if node is None:
+                return None
+        return node
+
+    def get(self, name):
+        """
+        Looks up a zone by its exact name.
+
+        :param str name: The zone's DNS name. The trailing dot is optional.
+        :rtype: HostedZone
+        :returns: The matching zone, or ``None`` if there is no match.
+        """
+
+        node = self._find_node(name)
+        if node is None:
+            return None
+        zones = node.zones
+        return zones[0] if zones else None
+
+    def longest_match(self, fqdn):
+        """
+        Finds the zone that owns the given name. This is the zone with the
+        longest name that is a suffix of ``fqdn`` (on label boundaries).
+
+        :param str fqdn: A fully qualified DNS name.
+        :rtype: HostedZone
+        :returns: The owning zone, or ``None`` if no zone in the index is
+            a suffix of ``fqdn``.
+        """
+
+        best = None
+        node = self._root
+        for label in _reversed_labels(fqdn):
+            node = node.children.get(label)
+            if node is None:
+                break
+            zones = node.zones
+            if zones:
+                best = zones[0]
+        return best
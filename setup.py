@@ -29,6 +29,14 @@ setup(
     description=DESCRIPTION,
     long_description=LONG_DESCRIPTION,
     platforms=['any'],
+    entry_points={
+        'console_scripts': ['route53 = route53.cli:main'],
+    },
     classifiers=CLASSIFIERS,
-    install_requires=['requests', 'lxml', 'pytz'],
+    install_requires=[
+        'requests',
+        'lxml',
+        'pytz; python_version < "3"',
+        'futures; python_version < "3"',
+    ],
 )
@@ -0,0 +1,521 @@
+"""
+An in-memory stand-in for the Route53 API, used to exercise the library
+without network access or AWS credentials. Only the handful of calls
+python-route53 makes are implemented, and only closely enough to mirror
+the response documents and pagination behavior of the real service.
+"""
+
+import datetime
+import itertools
+import threading
+import time
+from lxml import etree
+from route53.transport import BaseTransport
+
+GEOLOCATION_TAGS = (
+    ('ContinentCode', 'continent_code'),
+    ('CountryCode', 'country_code'),
+    ('SubdivisionCode', 'subdivision_code'),
+)
+
+def _name_sort_key(name):
+    """
+    Route53 sorts record set listings by DNS name with the labels reversed,
+    compared as a string (``www.example.com.`` sorts as
+    ``com.example.www.``).
+    """
+
+    return '.'.join(reversed(name.lower().rstrip('.').split('.'))) + '.'
+
+def _record_sort_key(rrset):
+    return (
+        _name_sort_key(rrset['name']),
+        rrset['type'],
+        rrset.get('set_identifier') or '',
+    )
+
+
+class FakeRoute53Error(Exception):
+    """
+    Raised internally to turn into an ErrorResponse document.
+    """
+
+    def __init__(self, code, message):
+        super(FakeRoute53Error, self).__init__(message)
+        self.code = code
+        self.message = message
+
+
+class FakeRoute53Backend(object):
+    """
+    Holds the state of a fake Route53 account. Several connections (and
+    therefore transports) may share a backend.
+    """
+
+    def __init__(self, latency=0):
+        """
+        :keyword float latency: Seconds to sleep on every request, handy
+            for exercising concurrency.
+        """
+
+        self.latency = latency
+        self.zones = {}
+        self.zone_order = []
+        self.changes = {}
+        self.request_log = []
+        self._injected_errors = []
+        self._ids = itertools.count(1)
+        self._lock = threading.RLock()
+
+    def _next_id(self, prefix):
+        return '%s%08d' % (prefix, next(self._ids))
+
+    def add_zone(self, name, caller_reference=None, comment=None):
+        """
+        Creates a zone directly in the backend, bypassing the API.
+
+        :rtype: str
+        :returns: The new zone's ID.
+        """
+
+        with self._lock:
+            zone_id = self._next_id('Z')
+            self.zones[zone_id] = {
+                'id': zone_id,
+                'name': name,
+                'caller_reference': caller_reference or zone_id,
+                'comment': comment,
+                'nameservers': [
+                    'ns-%d.awsdns-%s.com' % (i, zone_id[-2:]) for i in range(4)
+                ],
+                'rrsets': {},
+            }
+            self.zone_order.append(zone_id)
+            self.add_rrset(zone_id, name, 'SOA', ['ns-0.awsdns-00.com. 1 7200 900 1209600 86400'], ttl=900)
+            self.add_rrset(zone_id, name, 'NS', self.zones[zone_id]['nameservers'], ttl=172800)
+            return zone_id
+
+    def add_rrset(self, zone_id, name, rrset_type, records, ttl=60,
+                  set_identifier=None, weight=None, region=None,
+                  alias_hosted_zone_id=None, alias_dns_name=None,
+                  evaluate_target_health=False, failover=None,
+                  geolocation=None, health_check_id=None,
+                  multi_value_answer=None):
+        """
+        Creates a record set directly in the backend, bypassing the API.
+        ``multi_value_answer`` stands in for the settings python-route53
+        doesn't support.
+        """
+
+        if alias_dns_name:
+            evaluate_target_health = 'true' if evaluate_target_health else 'false'
+        else:
+            evaluate_target_health = None
+        rrset = {
+            'name': name,
+            'type': rrset_type,
+            'ttl': None if alias_dns_name else str(ttl),
+            'records': list(records),
+            'set_identifier': set_identifier,
+            'weight': None if weight is None else str(weight),
+            'region': region,
+            'alias_hosted_zone_id': alias_hosted_zone_id,
+            'alias_dns_name': alias_dns_name,
+            'evaluate_target_health': evaluate_target_health,
+            'failover': failover,
+            'geolocation': dict(geolocation) if geolocation else None,
+            'health_check_id': health_check_id,
+            'multi_value_answer': multi_value_answer,
+        }
+        with self._lock:
+            self.zones[zone_id]['rrsets'][self._rrset_key(rrset)] = rrset
+
+    def inject_error(self, kind, code='Throttling', after=0):
+        """
+        Makes a future request of the given kind fail, once.
+
+        :param str kind: The kind of request to fail (the handler name).
+        :keyword str code: The error code to respond with.
+        :keyword int after: Let this many requests of this kind succeed first.
+        """
+
+        with self._lock:
+            self._injected_errors.append([kind, after, code])
+
+    def _pop_injected_error(self, kind):
+        for injected in self._injected_errors:
+            if injected[0] != kind:
+                continue
+            if injected[1] > 0:
+                injected[1] -= 1
+                return None
+            self._injected_errors.remove(injected)
+            return FakeRoute53Error(injected[2], 'Injected failure.')
+        return None
+
+    def request_count(self, method=None, kind=None):
+        """
+        :keyword str method: Only count requests with this HTTP method.
+        :keyword str kind: Only count requests of this kind (the handler name).
+        :rtype: int
+        """
+
+        with self._lock:
+            return len([
+                r for r in self.request_log
+                if (method is None or r[0] == method) and
+                   (kind is None or r[1] == kind)
+            ])
+
+    @staticmethod
+    def _rrset_key(rrset):
+        return (
+            rrset['name'].lower(),
+            rrset['type'],
+            rrset.get('set_identifier'),
+        )
+
+    def _get_zone(self, zone_id):
+        try:
+            return self.zones[zone_id]
+        except KeyError:
+            raise FakeRoute53Error('NoSuchHostedZone', 'No hosted zone found with ID: %s' % zone_id)
+
+    def _new_change(self):
+        change_id = self._next_id('C')
+        submitted_at = datetime.datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + 'Z'
+        self.changes[change_id] = {
+            'id': change_id,
+            'status': 'INSYNC',
+            'submitted_at': submitted_at,
+        }
+        return self.changes[change_id]
+
+
+class FakeTransport(BaseTransport):
+    """
+    A transport that answers requests from a :py:class:`FakeRoute53Backend`
+    instead of the network.
+    """
+
+    def __init__(self, connection, backend=None):
+        super(FakeTransport, self).__init__(connection)
+        self.backend = backend or FakeRoute53Backend()
+
+    @property
+    def namespace(self):
+        return self.connection._xml_namespace
+
+    def _send_get_request(self, path, params, headers):
+        return self._dispatch('GET', path, params)
+
+    def _send_post_request(self, path, data, headers):
+        return self._dispatch('POST', path, data)
+
+    def _send_delete_request(self, path, headers):
+        return self._dispatch('DELETE', path, None)
+
+    def _dispatch(self, method, path, data):
+        parts = path.strip('/').split('/')
+        if parts[0] == 'hostedzone' and len(parts) == 1:
+            kind = 'list_hosted_zones' if method == 'GET' else 'create_hosted_zone'
+        elif parts[0] == 'hostedzone' and len(parts) == 2:
+            kind = 'get_hosted_zone' if method == 'GET' else 'delete_hosted_zone'
+        elif parts[0] == 'hostedzone' and len(parts) == 3:
+            kind = 'list_rrsets' if method == 'GET' else 'change_rrsets'
+        elif parts[0] == 'change':
+            kind = 'get_change'
+        else:
+            raise AssertionError('Unexpected request: %s %s' % (method, path))
+
+        if self.backend.latency:
+            time.sleep(self.backend.latency)
+
+        with self.backend._lock:
+            self.backend.request_log.append((method, kind, path, data))
+            try:
+                injected = self.backend._pop_injected_error(kind)
+                if injected:
+                    raise injected
+                e_root = getattr(self, '_handle_' + kind)(parts, data)
+            except FakeRoute53Error as exc:
+                e_root = self._error_response(exc)
+
+        return etree.tostring(e_root, encoding='unicode')
+
+    # Document building helpers.
+
+    def _element(self, tag, parent=None, text=None):
+        qualified = '{%s}%s' % (self.namespace, tag)
+        if parent is None:
+            element = etree.Element(qualified, nsmap={None: self.namespace})
+        else:
+            element = etree.SubElement(parent, qualified)
+        if text is not None:
+            element.text = text
+        return element
+
+    def _error_response(self, exc):
+        e_root = self._element('ErrorResponse')
+        e_error = self._element('Error', e_root)
+        self._element('Type', e_error, 'Sender')
+        self._element('Code', e_error, exc.code)
+        self._element('Message', e_error, exc.message)
+        self._element('RequestId', e_root, 'fake-request-id')
+        return e_root
+
+    def _write_zone(self, parent, zone):
+        e_zone = self._element('HostedZone', parent)
+        self._element('Id', e_zone, '/hostedzone/%s' % zone['id'])
+        self._element('Name', e_zone, zone['name'])
+        self._element('CallerReference', e_zone, zone['caller_reference'])
+        e_config = self._element('Config', e_zone)
+        if zone['comment']:
+            self._element('Comment', e_config, zone['comment'])
+        self._element('ResourceRecordSetCount', e_zone, str(len(zone['rrsets'])))
+        return e_zone
+
+    def _write_delegation_set(self, parent, zone):
+        e_delegation_set = self._element('DelegationSet', parent)
+        e_nameservers = self._element('NameServers', e_delegation_set)
+        for nameserver in zone['nameservers']:
+            self._element('NameServer', e_nameservers, nameserver)
+
+    def _write_change_info(self, parent, change):
+        e_change_info = self._element('ChangeInfo', parent)
+        self._element('Id', e_change_info, '/change/%s' % change['id'])
+        self._element('Status', e_change_info, change['status'])
+        self._element('SubmittedAt', e_change_info, change['submitted_at'])
+
+    def _write_rrset(self, parent, rrset):
+        e_rrset = self._element('ResourceRecordSet', parent)
+        # Route53 hands back wildcards (and other special characters) as
+        # octal escapes.
+        self._element('Name', e_rrset, rrset['name'].replace('*', '\\052'))
+        self._element('Type', e_rrset, rrset['type'])
+        if rrset.get('set_identifier'):
+            self._element('SetIdentifier', e_rrset, rrset['set_identifier'])
+        if rrset.get('weight') is not None:
+            self._element('Weight', e_rrset, rrset['weight'])
+        if rrset.get('region'):
+            self._element('Region', e_rrset, rrset['region'])
+        if rrset.get('geolocation'):
+            e_geolocation = self._element('GeoLocation', e_rrset)
+            for tag, key in GEOLOCATION_TAGS:
+                if key in rrset['geolocation']:
+                    self._element(tag, e_geolocation, rrset['geolocation'][key])
+        if rrset.get('failover'):
+            self._element('Failover', e_rrset, rrset['failover'])
+        if rrset.get('multi_value_answer'):
+            self._element('MultiValueAnswer', e_rrset, rrset['multi_value_answer'])
+        if rrset.get('alias_dns_name'):
+            e_alias = self._element('AliasTarget', e_rrset)
+            self._element('HostedZoneId', e_alias, rrset['alias_hosted_zone_id'])
+            self._element('DNSName', e_alias, rrset['alias_dns_name'])
+            self._element('EvaluateTargetHealth', e_alias, rrset['evaluate_target_health'])
+        else:
+            self._element('TTL', e_rrset, rrset['ttl'])
+            e_records = self._element('ResourceRecords', e_rrset)
+            for value in rrset['records']:
+                e_record = self._element('ResourceRecord', e_records)
+                self._element('Value', e_record, value)
+        if rrset.get('health_check_id'):
+            self._element('HealthCheckId', e_rrset, rrset['health_check_id'])
+
+    # Request handlers.
+
+    def _handle_list_hosted_zones(self, parts, params):
+        backend = self.backend
+        maxitems = int(params.get('maxitems') or 100)
+        marker = params.get('marker')
+
+        zone_ids = backend.zone_order
+        start = zone_ids.index(marker) if marker else 0
+        page = zone_ids[start:start + maxitems]
+
+        e_root = self._element('ListHostedZonesResponse')
+        e_zones = self._element('HostedZones', e_root)
+        for zone_id in page:
+            self._write_zone(e_zones, backend.zones[zone_id])
+
+        is_truncated = start + maxitems < len(zone_ids)
+        self._element('IsTruncated', e_root, 'true' if is_truncated else 'false')
+        if is_truncated:
+            self._element('NextMarker', e_root, zone_ids[start + maxitems])
+        self._element('MaxItems', e_root, str(maxitems))
+        return e_root
+
+    def _handle_create_hosted_zone(self, parts, body):
+        e_request = etree.fromstring(body.encode('utf-8'))
+        name = e_request.find('./{*}Name').text
+        caller_reference = e_request.find('./{*}CallerReference').text
+        e_comment = e_request.find('./{*}HostedZoneConfig/{*}Comment')
+
+        for zone in self.backend.zones.values():
+            if zone['caller_reference'] == caller_reference:
+                raise FakeRoute53Error(
+                    'HostedZoneAlreadyExists',
+                    'A hosted zone has already been created with the specified caller reference.',
+                )
+
+        zone_id = self.backend.add_zone(
+            name, caller_reference,
+            e_comment.text if e_comment is not None else None,
+        )
+        zone = self.backend.zones[zone_id]
+
+        e_root = self._element('CreateHostedZoneResponse')
+        self._write_zone(e_root, zone)
+        self._write_change_info(e_root, self.backend._new_change())
+        self._write_delegation_set(e_root, zone)
+        return e_root
+
+    def _handle_get_hosted_zone(self, parts, params):
+        zone = self.backend._get_zone(parts[1])
+
+        e_root = self._element('GetHostedZoneResponse')
+        self._write_zone(e_root, zone)
+        self._write_delegation_set(e_root, zone)
+        return e_root
+
+    def _handle_delete_hosted_zone(self, parts, data):
+        zone = self.backend._get_zone(parts[1])
+        for rrset in zone['rrsets'].values():
+            if rrset['type'] not in ('SOA', 'NS') or \
+               rrset['name'].lower() != zone['name'].lower():
+                raise FakeRoute53Error(
+                    'HostedZoneNotEmpty',
+                    'The specified hosted zone contains non-required resource record sets.',
+                )
+
+        del self.backend.zones[zone['id']]
+        self.backend.zone_order.remove(zone['id'])
+
+        e_root = self._element('DeleteHostedZoneResponse')
+        self._write_change_info(e_root, self.backend._new_change())
+        return e_root
+
+    def _handle_list_rrsets(self, parts, params):
+        zone = self.backend._get_zone(parts[1])
+        maxitems = int(params.get('maxitems') or 100)
+
+        rrsets = sorted(zone['rrsets'].values(), key=_record_sort_key)
+
+        start_name = params.get('name')
+        if start_name:
+            start_key = (
+                _name_sort_key(start_name),
+                params.get('type') or '',
+                params.get('identifier') or '',
+            )
+            rrsets = [r for r in rrsets if _record_sort_key(r) >= start_key]
+
+        page = rrsets[:maxitems]
+
+        e_root = self._element('ListResourceRecordSetsResponse')
+        e_rrsets = self._element('ResourceRecordSets', e_root)
+        for rrset in page:
+            self._write_rrset(e_rrsets, rrset)
+
+        is_truncated = len(rrsets) > maxitems
+        self._element('IsTruncated', e_root, 'true' if is_truncated else 'false')
+        if is_truncated:
+            next_rrset = rrsets[maxitems]
+            self._element('NextRecordName', e_root, next_rrset['name'])
+            self._element('NextRecordType', e_root, next_rrset['type'])
+            if next_rrset.get('set_identifier'):
+                self._element('NextRecordIdentifier', e_root, next_rrset['set_identifier'])
+        self._element('MaxItems', e_root, str(maxitems))
+        return e_root
+
+    def _parse_change(self, e_change):
+        e_rrset = e_change.find('./{*}ResourceRecordSet')
+
+        def text(xpath):
+            element = e_rrset.find(xpath)
+            return element.text if element is not None else None
+
+        geolocation = {}
+        for tag, key in GEOLOCATION_TAGS:
+            value = text('./{*}GeoLocation/{*}' + tag)
+            if value is not None:
+                geolocation[key] = value
+
+        return e_change.find('./{*}Action').text, {
+            'name': text('./{*}Name'),
+            'type': text('./{*}Type'),
+            'ttl': text('./{*}TTL'),
+            'records': [e.text for e in e_rrset.findall('./{*}ResourceRecords/{*}ResourceRecord/{*}Value')],
+            'set_identifier': text('./{*}SetIdentifier'),
+            'weight': text('./{*}Weight'),
+            'region': text('./{*}Region'),
+            'alias_hosted_zone_id': text('./{*}AliasTarget/{*}HostedZoneId'),
+            'alias_dns_name': text('./{*}AliasTarget/{*}DNSName'),
+            'evaluate_target_health': text('./{*}AliasTarget/{*}EvaluateTargetHealth'),
+            'failover': text('./{*}Failover'),
+            'geolocation': geolocation or None,
+            'health_check_id': text('./{*}HealthCheckId'),
+            'multi_value_answer': text('./{*}MultiValueAnswer'),
+        }
+
+    def _handle_change_rrsets(self, parts, body):
+        zone = self.backend._get_zone(parts[1])
+        e_request = etree.fromstring(body.encode('utf-8'))
+        e_changes = e_request.findall('./{*}ChangeBatch/{*}Changes/{*}Change')
+
+        # Changes are applied atomically, so work on a copy.
+        rrsets = dict(zone['rrsets'])
+        for e_change in e_changes:
+            action, rrset = self._parse_change(e_change)
+            key = self.backend._rrset_key(rrset)
+            if action == 'CREATE':
+                if key in rrsets:
+                    raise FakeRoute53Error(
+                        'InvalidChangeBatch',
+                        "Tried to create resource record set %s type %s but it already exists" % key[:2],
+                    )
+                rrsets[key] = rrset
+            elif action == 'DELETE':
+                if rrsets.get(key) != rrset:
+                    raise FakeRoute53Error(
+                        'InvalidChangeBatch',
+                        "Tried to delete resource record set %s type %s but it was not found" % key[:2],
+                    )
+                del rrsets[key]
+            elif action == 'UPSERT':
+                rrsets[key] = rrset
+            else:
+                raise FakeRoute53Error('InvalidInput', 'Invalid action: %s' % action)
+        zone['rrsets'] = rrsets
+
+        e_root = self._element('ChangeResourceRecordSetsResponse')
+        self._write_change_info(e_root, self.backend._new_change())
+        return e_root
+
+    def _handle_get_change(self, parts, params):
+        try:
+            change = self.backend.changes[parts[1]]
+        except KeyError:
+            raise FakeRoute53Error('NoSuchChange', 'Could not find resource with ID: %s' % parts[1])
+
+        e_root = self._element('GetChangeResponse')
+        self._write_change_info(e_root, change)
+        return e_root
+
+
+def get_fake_connection(backend=None, **kwargs):
+    """
+    Returns a Route53Connection wired up to a :py:class:`FakeTransport`.
+
+    :keyword FakeRoute53Backend backend: An existing backend to share.
+    :rtype: Route53Connection
+    """
+
+    import route53
+    conn = route53.connect(
+        aws_access_key_id='BLAHBLAH',
+        aws_secret_access_key='wJalrXUtnFEMI/K7MDENG/bPxRfiCYEXAMPLEKEY',
+        **kwargs
+    )
+    conn._transport = FakeTransport(conn, backend)
+    return conn
@@ -0,0 +1,129 @@
+import unittest
+import route53
+from route53.auth import AWS3Signer, SigV4Signer, encode_query
+
+# From the AWS SigV4 test suite.
+TEST_SUITE_KEY_ID = 'AKIDEXAMPLE'
+TEST_SUITE_SECRET = 'wJalrXUtnFEMI/K7MDENG+bPxRfiCYEXAMPLEKEY'
+TEST_SUITE_TIMESTAMP = 1440938160  # 20150830T123600Z
+
+
+class SigV4SignerTestCase(unittest.TestCase):
+    """
+    Tests for AWS Signature Version 4 signing.
+    """
+
+    def setUp(self):
+        self.conn = route53.connect(TEST_SUITE_KEY_ID, TEST_SUITE_SECRET)
+        self.signer = SigV4Signer(
+            self.conn, region='us-east-1', service='service', host='example.amazonaws.com'
+        )
+
+    def test_aws_test_suite_get_vanilla(self):
+        headers = self.signer.sign('GET', '/', '', b'', timestamp=TEST_SUITE_TIMESTAMP)
+        self.assertEqual(headers['x-amz-date'], '20150830T123600Z')
+        self.assertEqual(
+            headers['Authorization'],
+            'AWS4-HMAC-SHA256 Credential=AKIDEXAMPLE/20150830/us-east-1/service/aws4_request, '
+            'SignedHeaders=host;x-amz-date, '
+            'Signature=5fa00fa31553b73ebf1942676e86291e8372ff2a2260956d9b8aae1d763fbf31',
+        )
+
+    def test_signing_key_cached_per_date(self):
+        self.signer.sign('GET', '/', '', b'', timestamp=TEST_SUITE_TIMESTAMP)
+        date_stamp, key = self.signer._signing_key
+        self.assertEqual(date_stamp, '20150830')
+
+        self.signer.sign('GET', '/', '', b'', timestamp=TEST_SUITE_TIMESTAMP + 3600)
+        self.assertIs(self.signer._signing_key[1], key)
+
+        self.signer.sign('GET', '/', '', b'', timestamp=TEST_SUITE_TIMESTAMP + 86400)
+        self.assertEqual(self.signer._signing_key[0], '20150831')
+        self.assertNotEqual(self.signer._signing_key[1], key)
+
+    def test_session_token(self):
+        conn = route53.connect('AKID', 'SECRET', aws_session_token='TOKEN')
+        self.assertIsInstance(conn._signer, SigV4Signer)
+
+        headers = conn._transport.get_request_headers('GET', 'hostedzone', {'maxitems': 10})
+        self.assertEqual(headers['x-amz-security-token'], 'TOKEN')
+        self.assertEqual(headers['Host'], 'route53.amazonaws.com')
+        self.assertIn('SignedHeaders=host;x-amz-date;x-amz-security-token', headers['Authorization'])
+        self.assertIn('/us-east-1/route53/aws4_request', headers['Authorization'])
+
+    def test_request_contents_are_signed(self):
+        def signature(method, path, data):
+            headers = self.signer.get_headers(method, path, data)
+            return headers['Authorization']
+
+        get = signature('GET', 'hostedzone', {'maxitems': 10})
+        self.assertNotEqual(get, signature('GET', 'hostedzone', {'maxitems': 11}))
+        self.assertNotEqual(
+            signature('POST', 'hostedzone', '<a/>'),
+            signature('POST', 'hostedzone', '<b/>'),
+        )
+
+    def test_encode_query(self):
+        self.assertEqual(
+            encode_query({'type': 'A', 'name': 'a b.example.com.', 'identifier': 'x/y+z'}),
+            'identifier=x%2Fy%2Bz&name=a%20b.example.com.&type=A',
+        )
+        self.assertEqual(encode_query({}), '')
+
+
+class AWS3SignerTestCase(unittest.TestCase):
+
+    def test_default_signer(self):
+        conn = route53.connect('BLAHBLAH', 'wJalrXUtnFEMI/K7MDENG/bPxRfiCYEXAMPLEKEY')
+        self.assertIsInstance(conn._signer, AWS3Signer)
+        # Matches the legacy signing test in test_basic.
+        self.assertEqual(
+            conn._signer.sign_string('Thu, 14 Aug 2008 17:08:48 GMT'),
+            conn._transport._hmac_sign_string('Thu, 14 Aug 2008 17:08:48 GMT'),
+        )
+        headers = conn._transport.get_request_headers()
+        self.assertTrue(headers['X-Amzn-Authorization'].startswith('AWS3-HTTPS AWSAccessKeyId=BLAHBLAH,'))
+
+    def test_custom_signer(self):
+        conn = route53.connect(
+            'AKID', 'SECRET', signer=lambda conn: SigV4Signer(conn, region='us-west-2')
+        )
+        self.assertEqual(conn._signer.region, 'us-west-2')
+
+
+class AWS3HeaderCacheTestCase(unittest.TestCase):
+    """
+    Tests for re-using AWS3 headers within the same second.
+    """
+
+    def setUp(self):
+        self.conn = route53.connect('BLAHBLAH', 'SECRET')
+        self.signer = self.conn._signer
+        self.sign_count = 0
+        sign_string = self.signer.sign_string
+
+        def counting_sign_string(string_to_sign):
+            self.sign_count += 1
+            return sign_string(string_to_sign)
+
+        self.signer.sign_string = counting_sign_string
+
+    def test_same_second(self):
+        self.signer._cached_headers = (None, None)
+        headers = [self.signer.get_headers() for _ in range(50)]
+        dates = set(h['x-amz-date'] for h in headers)
+        # At most one second boundary can have been crossed.
+        self.assertEqual(self.sign_count, len(dates))
+        self.assertLessEqual(self.sign_count, 2)
+
+        # Callers get their own copy.
+        headers[0]['X-Amzn-Authorization'] = 'mangled'
+        self.assertNotEqual(self.signer.get_headers()['X-Amzn-Authorization'], 'mangled')
+
+    def test_new_second_or_credentials(self):
+        self.signer.get_headers()
+        self.signer._cached_headers = (('BLAHBLAH', 0), {})
+        self.assertIn('X-Amzn-Authorization', self.signer.get_headers())
+
+        self.conn._aws_access_key_id = 'OTHER'
+        self.assertIn('AWSAccessKeyId=OTHER,', self.signer.get_headers()['X-Amzn-Authorization'])
@@ -0,0 +1,129 @@
+import gzip
+import os
+import shutil
+import tempfile
+import time
+import unittest
+import route53
+from route53.cassette import RecordingTransport, ReplayTransport, read_cassette
+from route53.exceptions import CassetteMissError, Route53HTTPError
+from tests.fake_transport import FakeRoute53Backend, FakeTransport
+
+
+class CassetteTestCase(unittest.TestCase):
+    """
+    Tests for recording requests to a cassette, and replaying them.
+    """
+
+    def setUp(self):
+        self.backend = FakeRoute53Backend()
+        self.zone_id = self.backend.add_zone('example.com.')
+        for i in range(25):
+            self.backend.add_rrset(
+                self.zone_id, 'host%02d.example.com.' % i, 'A', ['10.0.0.%d' % i]
+            )
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'cassette.jsonl.gz')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def connect(self, transport):
+        return route53.connect('BLAHBLAH', 'SECRET', transport=transport)
+
+    def record(self, conn_func):
+        conn = self.connect(lambda conn: RecordingTransport(
+            conn, self.path,
+            transport=lambda conn: FakeTransport(conn, self.backend),
+        ))
+        result = conn_func(conn)
+        conn._transport.close()
+        return result
+
+    def replay(self, conn_func, **kwargs):
+        conn = self.connect(lambda conn: ReplayTransport(conn, self.path, **kwargs))
+        return conn_func(conn)
+
+    def list_zone(self, conn):
+        zone = conn.get_hosted_zone_by_id(self.zone_id)
+        return [
+            (rrset.name, rrset.rrset_type, list(rrset.records))
+            for rrset in zone.list_record_sets(page_chunks=10)
+        ]
+
+    def test_replay(self):
+        recorded = self.record(self.list_zone)
+        self.assertEqual(len(recorded), 27)
+        request_count = len(self.backend.request_log)
+        self.assertEqual(len(read_cassette(self.path)), request_count)
+
+        self.assertEqual(self.replay(self.list_zone), recorded)
+        # Nothing was sent to the backend.
+        self.assertEqual(len(self.backend.request_log), request_count)
+
+    def test_repeated_requests(self):
+        def create_and_delete(conn):
+            zone, _ = conn.create_hosted_zone('example.org.')
+            zone.create_a_record('www.example.org.', ['10.0.0.1'])
+            zone.create_a_record('api.example.org.', ['10.0.0.2'])
+            return [zone.id] + [
+                rrset.name for rrset in conn.get_hosted_zone_by_id(zone.id).record_sets
+            ]
+
+        recorded = self.record(create_and_delete)
+        # The POSTs come back in the order they were sent, even though
+        # their bodies (with a fresh caller reference) don't match.
+        self.assertEqual(self.replay(create_and_delete), recorded)
+
+    def test_errors(self):
+        self.backend.inject_error('get_hosted_zone', code='NoSuchHostedZone')
+
+        def get_zone(conn):
+            return conn._transport.send_request('hostedzone/%s' % self.zone_id, {}, 'GET')
+
+        recorded = self.record(get_zone)
+        self.assertIn('NoSuchHostedZone', recorded)
+        self.assertEqual(self.replay(get_zone), recorded)
+        self.assertRaises(
+            CassetteMissError, self.replay,
+            lambda conn: conn._transport.send_request('hostedzone/Z1', {}, 'GET'),
+        )
+
+    def test_http_errors(self):
+        class NotFoundTransport(FakeTransport):
+            def _send_get_request(self, path, params, headers):
+                raise Route53HTTPError(404, 'Not Found', 'gone')
+
+        conn = self.connect(lambda conn: RecordingTransport(
+            conn, self.path, transport=NotFoundTransport,
+        ))
+        self.assertRaises(Route53HTTPError, conn._transport.send_request, 'missing', {}, 'GET')
+        conn._transport.close()
+
+        conn = self.connect(lambda conn: ReplayTransport(conn, self.path))
+        try:
+            conn._transport.send_request('missing', {}, 'GET')
+        except Route53HTTPError as exc:
+            self.assertEqual((exc.status_code, exc.reason, exc.body), (404, 'Not Found', 'gone'))
+        else:
+            self.fail("The recorded error should be raised again.")
+
+    def test_realtime(self):
+        self.backend.latency = 0.02
+        self.record(self.list_zone)
+        started_at = time.time()
+        self.replay(self.list_zone)
+        fast = time.time() - started_at
+        started_at = time.time()
+        self.replay(self.list_zone, realtime=True)
+        self.assertGreater(time.time() - started_at, 0.08)
+        self.assertLess(fast, 0.08)
+
+    def test_truncated_cassette(self):
+        self.record(self.list_zone)
+        with gzip.open(self.path, 'rb') as cassette:
+            data = cassette.read()
+        with open(self.path, 'wb') as cassette:
+            cassette.write(gzip.compress(data)[:-30])
+        entries = read_cassette(self.path)
+        self.assertTrue(0 < len(entries) < 4)
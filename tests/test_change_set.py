@@ -0,0 +1,219 @@
+import threading
+import time
+import unittest
+from route53.change_set import ChangeSet, batch_changes, send_change_sets
+from route53.resource_record_set import AResourceRecordSet, CNAMEResourceRecordSet, \
+    TXTResourceRecordSet
+from tests.fake_transport import FakeRoute53Backend, get_fake_connection
+
+
+class NormalizeTestCase(unittest.TestCase):
+    """
+    Tests for cancelling and merging redundant changes.
+    """
+
+    def setUp(self):
+        self.backend = FakeRoute53Backend()
+        self.zone_id = self.backend.add_zone('example.com.')
+        self.conn = get_fake_connection(self.backend)
+        self.cset = ChangeSet(connection=self.conn, hosted_zone_id=self.zone_id)
+
+    def a_record(self, name, records, ttl=60, **kwargs):
+        return AResourceRecordSet(
+            connection=self.conn, zone_id=self.zone_id, name=name,
+            ttl=ttl, records=records, **kwargs
+        )
+
+    def summarize(self):
+        return [
+            (action, rrset.name, sorted(rrset.records))
+            for action, rrset in self.cset.get_changes()
+        ]
+
+    def test_create_then_delete_cancels(self):
+        rrset = self.a_record('www.example.com.', ['10.0.0.1'])
+        self.cset.add_change('CREATE', rrset)
+        self.cset.add_change('DELETE', rrset)
+        self.assertEqual(self.cset.normalize(), 2)
+        self.assertEqual(len(self.cset), 0)
+
+    def test_delete_then_identical_create_is_dropped(self):
+        rrset = self.a_record('www.example.com.', ['10.0.0.1'])
+        self.cset.add_change('DELETE', rrset)
+        self.cset.add_change('CREATE', self.a_record('WWW.example.com', ['10.0.0.1']))
+        self.cset.normalize()
+        self.assertEqual(len(self.cset), 0)
+
+    def test_delete_then_create_becomes_upsert(self):
+        self.cset.add_change('DELETE', self.a_record('www.example.com.', ['10.0.0.1']))
+        self.cset.add_change('CREATE', self.a_record('www.example.com.', ['10.0.0.2']))
+        self.assertEqual(self.cset.normalize(), 1)
+        self.assertEqual(self.summarize(), [('UPSERT', 'www.example.com.', ['10.0.0.2'])])
+
+    def test_creates_are_merged(self):
+        first = self.a_record('www.example.com.', ['10.0.0.1'])
+        self.cset.add_change('CREATE', first)
+        self.cset.add_change('CREATE', self.a_record('www.example.com.', ['10.0.0.2', '10.0.0.1']))
+        self.cset.add_change('CREATE', self.a_record('mail.example.com.', ['10.0.1.1']))
+        self.cset.normalize()
+        self.assertEqual(self.summarize(), [
+            ('CREATE', 'www.example.com.', ['10.0.0.1', '10.0.0.2']),
+            ('CREATE', 'mail.example.com.', ['10.0.1.1']),
+        ])
+        # The record sets that were added are left alone.
+        self.assertEqual(first.records, ['10.0.0.1'])
+
+        # The merged batch is accepted.
+        self.conn._change_resource_record_sets(self.cset)
+        self.assertEqual(
+            self.backend.zones[self.zone_id]['rrsets'][('www.example.com.', 'A', None)]['records'],
+            ['10.0.0.1', '10.0.0.2'],
+        )
+
+    def test_mismatched_creates_are_kept(self):
+        self.cset.add_change('CREATE', self.a_record('www.example.com.', ['10.0.0.1'], ttl=60))
+        self.cset.add_change('CREATE', self.a_record('www.example.com.', ['10.0.0.2'], ttl=300))
+        self.assertEqual(self.cset.normalize(), 0)
+        self.assertEqual(len(self.cset), 2)
+
+    def test_weighted_record_sets_are_distinct(self):
+        for identifier in ('a', 'b'):
+            rrset = self.a_record(
+                'www.example.com.', ['10.0.0.1'], weight=10, set_identifier=identifier
+            )
+            self.cset.add_change('CREATE', rrset)
+        self.assertEqual(self.cset.normalize(), 0)
+
+    def test_upserts(self):
+        self.cset.add_change('UPSERT', self.a_record('www.example.com.', ['10.0.0.1']))
+        self.cset.add_change('UPSERT', self.a_record('www.example.com.', ['10.0.0.2']))
+        self.cset.add_change('CREATE', self.a_record('mail.example.com.', ['10.0.1.1']))
+        self.cset.add_change('UPSERT', self.a_record('mail.example.com.', ['10.0.1.2']))
+        self.cset.normalize()
+        self.assertEqual(self.summarize(), [
+            ('UPSERT', 'www.example.com.', ['10.0.0.2']),
+            ('CREATE', 'mail.example.com.', ['10.0.1.2']),
+        ])
+
+    def test_aliases_are_not_merged(self):
+        for dns_name in ('lb1.example.net.', 'lb2.example.net.'):
+            self.cset.add_change('CREATE', CNAMEResourceRecordSet(
+                connection=self.conn, zone_id=self.zone_id, name='www.example.com.',
+                ttl=None, records=[], alias_hosted_zone_id='Z1',
+                alias_dns_name=dns_name,
+            ))
+        self.assertEqual(self.cset.normalize(), 0)
+
+    def test_single_value_types_are_not_merged(self):
+        for target in ('a.example.net.', 'b.example.net.'):
+            self.cset.add_change('CREATE', CNAMEResourceRecordSet(
+                connection=self.conn, zone_id=self.zone_id, name='www.example.com.',
+                ttl=60, records=[target],
+            ))
+        self.assertEqual(self.cset.normalize(), 0)
+        self.assertEqual(
+            self.summarize(),
+            [('CREATE', 'www.example.com.', ['a.example.net.']),
+             ('CREATE', 'www.example.com.', ['b.example.net.'])],
+        )
+
+    def test_invalid_merges_are_skipped(self):
+        """
+        CREATEs aren't merged if the merged record set would be invalid.
+        """
+
+        self.cset.add_change('CREATE', self.a_record('www.example.com.', ['10.0.0.1']))
+        self.cset.add_change('CREATE', self.a_record('www.example.com.', ['not-an-ip']))
+        self.assertEqual(self.cset.normalize(), 0)
+
+
+class SendChangeSetsTestCase(unittest.TestCase):
+    """
+    Tests for sending change sets with several in flight.
+    """
+
+    def setUp(self):
+        self.conn = get_fake_connection(FakeRoute53Backend())
+        self.change_sets = [
+            ChangeSet(connection=self.conn, hosted_zone_id='Z%d' % i)
+            for i in range(10)
+        ]
+
+    def test_finished_in_order(self):
+        lock = threading.Lock()
+        active = [0, 0]
+
+        def send(change_set):
+            with lock:
+                active[0] += 1
+                active[1] = max(active)
+            # Later batches finish first.
+            time.sleep(0.02 * (10 - int(change_set.hosted_zone_id[1:])) / 10)
+            with lock:
+                active[0] -= 1
+            return change_set.hosted_zone_id
+
+        finished = []
+        count = send_change_sets(
+            self.conn, iter(self.change_sets), max_workers=3, send=send,
+            callback=lambda change_set, result: finished.append(result),
+        )
+        self.assertEqual(count, 10)
+        self.assertEqual(finished, ['Z%d' % i for i in range(10)])
+        self.assertTrue(1 < active[1] <= 3)
+
+    def test_failure_stops_sending(self):
+        sent = []
+
+        def send(change_set):
+            sent.append(change_set.hosted_zone_id)
+            if change_set.hosted_zone_id == 'Z2':
+                raise ValueError('rejected')
+
+        self.assertRaises(
+            ValueError, send_change_sets,
+            self.conn, iter(self.change_sets), max_workers=2, send=send,
+        )
+        # Batches already in flight when Z2 fails may still go out, but no
+        # more are sent after that.
+        self.assertTrue(len(sent) <= 5)
+
+
+class BatchChangesTestCase(unittest.TestCase):
+    """
+    Tests for splitting changes into batches within Route53's limits.
+    """
+
+    def setUp(self):
+        self.conn = get_fake_connection(FakeRoute53Backend())
+
+    def txt_record(self, name, records):
+        return TXTResourceRecordSet(
+            connection=self.conn, zone_id='Z1', name=name, ttl=60, records=records,
+        )
+
+    def batch_sizes(self, changes):
+        return [len(change_set) for change_set in batch_changes(self.conn, 'Z1', changes)]
+
+    def test_value_characters(self):
+        """
+        Batches stay under 32,000 characters of values, with UPSERTs
+        counted twice.
+        """
+
+        value = '"%s"' % ('x' * 4998)
+        creates = [('CREATE', self.txt_record('t%d.example.com.' % i, [value])) for i in range(13)]
+        self.assertEqual(self.batch_sizes(creates), [6, 6, 1])
+        upserts = [('UPSERT', rrset) for action, rrset in creates]
+        self.assertEqual(self.batch_sizes(upserts), [3, 3, 3, 3, 1])
+
+    def test_deletes_count_initial_values(self):
+        """
+        DELETEs send the record set's initial values, so those are what
+        count, even if the records have since been changed.
+        """
+
+        rrsets = [self.txt_record('t%d.example.com.' % i, ['"a"'] * 400) for i in range(3)]
+        for rrset in rrsets:
+            del rrset.records[1:]
+        self.assertEqual(self.batch_sizes([('DELETE', rrset) for rrset in rrsets]), [2, 1])
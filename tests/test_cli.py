@@ -0,0 +1,248 @@
+import contextlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from route53.cli import main
+from tests.fake_transport import FakeRoute53Backend, get_fake_connection
+
+
+class CommandLineTestCase(unittest.TestCase):
+    """
+    Tests for the route53 command line tool.
+    """
+
+    def setUp(self):
+        self.backend = FakeRoute53Backend()
+        self.zone_id = self.backend.add_zone('example.com.')
+        for i in range(40):
+            self.backend.add_rrset(
+                self.zone_id, 'host%02d.example.com.' % i, 'A', ['10.0.0.%d' % i]
+            )
+        self.backend.add_rrset(
+            self.zone_id, 'www.example.com.', 'A', [], weight=10,
+            set_identifier='one', alias_hosted_zone_id='Z2FDTNDATAQYW2',
+            alias_dns_name='lb.example.net.',
+        )
+        self.conn = get_fake_connection(self.backend)
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def run_cli(self, *argv):
+        stdout = io.StringIO()
+        stderr = io.StringIO()
+        with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+            exit_code = main(list(argv), connection=self.conn)
+        return exit_code, stdout.getvalue(), stderr.getvalue()
+
+    def dump(self, *extra_args):
+        path = os.path.join(self.tmpdir, 'dump.jsonl')
+        exit_code, _, _ = self.run_cli('dump', 'example.com.', '-o', path, *extra_args)
+        self.assertEqual(exit_code, 0)
+        with open(path) as dump_file:
+            return [json.loads(line) for line in dump_file]
+
+    def write_dump(self, records):
+        path = os.path.join(self.tmpdir, 'desired.jsonl')
+        with open(path, 'w') as dump_file:
+            for record in records:
+                dump_file.write(json.dumps(record) + '\n')
+        return path
+
+    def test_list(self):
+        self.backend.add_zone('example.org.')
+        exit_code, stdout, stderr = self.run_cli('list')
+        self.assertEqual(exit_code, 0)
+        lines = [line.split('\t') for line in stdout.splitlines()]
+        self.assertEqual(
+            [(line[1], line[2]) for line in lines],
+            [('example.com.', '43'), ('example.org.', '2')]
+        )
+        self.assertIn('list: 2 zones, 1 requests', stderr)
+
+    def test_dump(self):
+        records = self.dump('--page-chunks', '10')
+        self.assertEqual(len(records), 43)
+        self.assertEqual(
+            records[2], {'name': 'host00.example.com.', 'type': 'A', 'ttl': 60,
+                         'records': ['10.0.0.0']}
+        )
+        self.assertEqual(records[-1], {
+            'name': 'www.example.com.', 'type': 'A', 'weight': 10,
+            'set_identifier': 'one', 'alias_hosted_zone_id': 'Z2FDTNDATAQYW2',
+            'alias_dns_name': 'lb.example.net.',
+        })
+
+    def test_partitioned_dump(self):
+        # Hyphenated names sort before the split points they start with.
+        for name in ('i-1.example.com.', 'r-1.example.com.', 'www.r-1.example.com.'):
+            self.backend.add_rrset(self.zone_id, name, 'A', ['10.0.1.1'])
+        serial = self.dump('--page-chunks', '10')
+        partitioned = self.dump('--page-chunks', '10', '--partitions', '4')
+        self.assertEqual(partitioned, serial)
+
+    def test_unknown_zone(self):
+        exit_code, stdout, stderr = self.run_cli('dump', 'example.net.')
+        self.assertEqual(exit_code, 1)
+        self.assertIn('no hosted zone named example.net.', stderr)
+
+    def test_diff(self):
+        desired = [record for record in self.dump() if record['name'] != 'host01.example.com.']
+        desired[3]['records'] = ['10.9.9.9']
+        desired.append({'name': 'new.example.com.', 'type': 'TXT', 'ttl': 300,
+                        'records': ['"hello"']})
+        path = self.write_dump(desired)
+
+        exit_code, stdout, _ = self.run_cli('diff', 'example.com.', path)
+        self.assertEqual(exit_code, 0)
+        changes = [json.loads(line) for line in stdout.splitlines()]
+        self.assertEqual(
+            [(change['action'], change['record']['name']) for change in changes],
+            [('UPSERT', desired[3]['name']), ('UPSERT', 'new.example.com.')]
+        )
+
+        # The removed record is only deleted when pruning.
+        exit_code, stdout, _ = self.run_cli('diff', 'example.com.', path, '--prune', '--exit-code')
+        self.assertEqual(exit_code, 1)
+        changes = [json.loads(line) for line in stdout.splitlines()]
+        self.assertEqual(
+            [(change['action'], change['record']['name']) for change in changes],
+            [('DELETE', 'host01.example.com.'), ('UPSERT', desired[3]['name']),
+             ('UPSERT', 'new.example.com.')]
+        )
+
+    def test_apply(self):
+        desired = [
+            record for record in self.dump()
+            if record['type'] not in ('SOA', 'NS') and record['name'] < 'host20'
+        ]
+        for record in desired:
+            record['ttl'] = 300
+        path = self.write_dump(desired)
+        self.backend.request_log[:] = []
+
+        exit_code, _, stderr = self.run_cli(
+            'apply', 'example.com.', path, '--prune', '--batch-size', '7',
+            '--max-workers', '3',
+        )
+        self.assertEqual(exit_code, 0)
+        # 20 UPSERTs and 21 DELETEs, in 6 batches.
+        self.assertEqual(self.backend.request_count(kind='change_rrsets'), 6)
+        self.assertIn('41 changes in 6 batches', stderr)
+
+        # The apex SOA and NS are left alone.
+        records = self.dump()
+        self.assertEqual(
+            [record['type'] for record in records[:2]], ['NS', 'SOA']
+        )
+        self.assertEqual(records[2:], desired)
+
+        exit_code, stdout, _ = self.run_cli('diff', 'example.com.', path, '--prune')
+        self.assertEqual(stdout, '')
+
+    def test_apply_streams(self):
+        """
+        Batches go out while the zone is still being listed.
+        """
+
+        desired = [record for record in self.dump() if record['type'] not in ('SOA', 'NS')]
+        for record in desired:
+            record['ttl'] = 300
+        path = self.write_dump(desired)
+        self.backend.request_log[:] = []
+
+        exit_code, _, _ = self.run_cli(
+            'apply', 'example.com.', path, '--batch-size', '5', '--page-chunks', '5',
+        )
+        self.assertEqual(exit_code, 0)
+        kinds = [entry[1] for entry in self.backend.request_log]
+        last_listing = len(kinds) - 1 - kinds[::-1].index('list_rrsets')
+        self.assertTrue(kinds.index('change_rrsets') < last_listing)
+
+    def test_apply_dry_run(self):
+        path = self.write_dump([{'name': 'new.example.com.', 'type': 'A', 'ttl': 60,
+                                 'records': ['10.1.1.1']}])
+        exit_code, stdout, _ = self.run_cli('apply', 'example.com.', path, '--dry-run')
+        self.assertEqual(exit_code, 0)
+        self.assertEqual(len(stdout.splitlines()), 1)
+        self.assertEqual(self.backend.request_count(kind='change_rrsets'), 0)
+
+    def test_apply_with_journal(self):
+        path = self.write_dump([{'name': 'new.example.com.', 'type': 'A', 'ttl': 60,
+                                 'records': ['10.1.1.1']}])
+        journal_path = os.path.join(self.tmpdir, 'journal')
+        exit_code, _, _ = self.run_cli(
+            'apply', 'example.com.', path, '--journal', journal_path
+        )
+        self.assertEqual(exit_code, 0)
+        self.assertIn(
+            ('new.example.com.', 'A', None), self.backend.zones[self.zone_id]['rrsets']
+        )
+        with open(journal_path) as journal_file:
+            self.assertEqual(len(journal_file.readlines()), 2)
+
+    def test_invalid_dump(self):
+        path = self.write_dump([])
+        with open(path, 'w') as dump_file:
+            dump_file.write('{"name": "a.example.com."}\n')
+        exit_code, _, stderr = self.run_cli('diff', 'example.com.', path)
+        self.assertEqual(exit_code, 1)
+        self.assertIn('line 1 is not a valid record', stderr)
+
+    def test_routing_policies_round_trip(self):
+        self.backend.add_rrset(
+            self.zone_id, 'fo.example.com.', 'A', ['10.0.1.1'],
+            set_identifier='primary', failover='PRIMARY', health_check_id='hc-1234',
+        )
+        self.backend.add_rrset(
+            self.zone_id, 'geo.example.com.', 'A', [], set_identifier='eu',
+            geolocation={'continent_code': 'EU'}, alias_hosted_zone_id='Z2FDTNDATAQYW2',
+            alias_dns_name='eu.lb.example.net.', evaluate_target_health=True,
+        )
+        records = dict((record['name'], record) for record in self.dump())
+        self.assertEqual(records['fo.example.com.'], {
+            'name': 'fo.example.com.', 'type': 'A', 'ttl': 60, 'records': ['10.0.1.1'],
+            'set_identifier': 'primary', 'failover': 'PRIMARY', 'health_check_id': 'hc-1234',
+        })
+        self.assertEqual(records['geo.example.com.'], {
+            'name': 'geo.example.com.', 'type': 'A', 'set_identifier': 'eu',
+            'geolocation': {'continent_code': 'EU'}, 'alias_hosted_zone_id': 'Z2FDTNDATAQYW2',
+            'alias_dns_name': 'eu.lb.example.net.', 'alias_evaluate_target_health': True,
+        })
+
+        # Applying the dump after changing the TTL keeps the other settings.
+        stored = dict(self.backend.zones[self.zone_id]['rrsets'][('fo.example.com.', 'A', 'primary')])
+        records['fo.example.com.']['ttl'] = 300
+        path = self.write_dump(records.values())
+        exit_code, _, _ = self.run_cli('apply', 'example.com.', path)
+        self.assertEqual(exit_code, 0)
+        stored['ttl'] = '300'
+        self.assertEqual(
+            self.backend.zones[self.zone_id]['rrsets'][('fo.example.com.', 'A', 'primary')],
+            stored,
+        )
+        exit_code, stdout, _ = self.run_cli('diff', 'example.com.', path)
+        self.assertEqual(stdout, '')
+
+    def test_unsupported_settings(self):
+        """
+        Record sets with settings the dump format can't hold stop the
+        command, rather than being silently written without them.
+        """
+
+        self.backend.add_rrset(
+            self.zone_id, 'mv.example.com.', 'A', ['10.0.1.1'],
+            set_identifier='one', multi_value_answer='true',
+        )
+        exit_code, _, stderr = self.run_cli('dump', 'example.com.', '-o', os.path.join(self.tmpdir, 'x'))
+        self.assertEqual(exit_code, 1)
+        self.assertIn("mv.example.com. A has settings that dumps don't support (MultiValueAnswer)", stderr)
+
+        path = self.write_dump([{'name': 'a.example.com.', 'type': 'A', 'multi_value_answer': True}])
+        exit_code, _, stderr = self.run_cli('diff', 'example.com.', path)
+        self.assertEqual(exit_code, 1)
+        self.assertIn('line 1 has unsupported fields: multi_value_answer', stderr)
@@ -0,0 +1,184 @@
+import threading
+import time
+import unittest
+import route53
+from route53.deadline import Deadline
+from route53.exceptions import DeadlineExceededError
+from tests.fake_transport import FakeRoute53Backend, get_fake_connection
+
+
+class NameserverHydrationTestCase(unittest.TestCase):
+    """
+    Tests for filling in nameservers on zones from ListHostedZones.
+    """
+
+    def setUp(self):
+        self.backend = FakeRoute53Backend()
+        for i in range(5):
+            self.backend.add_zone('zone%d.example.com.' % i)
+        self.conn = get_fake_connection(self.backend)
+
+    def test_list_with_nameservers(self):
+        """
+        Every zone comes back hydrated, with one GetHostedZone per zone and
+        no further requests when reading the nameservers.
+        """
+
+        zones = list(self.conn.list_hosted_zones(page_chunks=2, with_nameservers=True))
+        self.assertEqual(len(zones), 5)
+        for zone in zones:
+            self.assertEqual(len(zone._nameservers), 4)
+        self.assertEqual(self.backend.request_count(kind='get_hosted_zone'), 5)
+
+        for zone in zones:
+            zone.nameservers
+        self.assertEqual(self.backend.request_count(kind='get_hosted_zone'), 5)
+
+    def test_hydrate_skips_hydrated_zones(self):
+        zones = list(self.conn.list_hosted_zones())
+        self.assertEqual(zones[0]._nameservers, [])
+        zones[0].nameservers
+
+        self.conn.hydrate_hosted_zones(zones, max_workers=3)
+        self.assertEqual(self.backend.request_count(kind='get_hosted_zone'), 5)
+        self.assertNotEqual(zones[4]._nameservers, [])
+
+
+class ThreadSafetyTestCase(unittest.TestCase):
+    """
+    Drives a single shared connection from many threads at once.
+    """
+
+    thread_count = 16
+    iterations = 10
+
+    def test_shared_connection_stress(self):
+        backend = FakeRoute53Backend()
+        backend.add_zone('example.com.')
+        conn = get_fake_connection(backend)
+        errors = []
+
+        def worker(thread_num):
+            try:
+                for i in range(self.iterations):
+                    name = 't%d-%d.example.com.' % (thread_num, i)
+                    zone, change_info = conn.create_hosted_zone(name)
+                    owner = conn.find_owning_zone('www.' + name)
+                    assert owner.id == zone.id, (owner.id, zone.id)
+
+                    zone.create_a_record('www.' + name, ['10.0.0.%d' % i])
+                    rrsets = list(zone.record_sets)
+                    assert len(rrsets) == 3, len(rrsets)
+
+                    zone.delete(force=True)
+                    owner = conn.find_owning_zone('www.' + name)
+                    assert owner.name == 'example.com.', owner.name
+            except Exception as exc:
+                errors.append(exc)
+
+        threads = [
+            threading.Thread(target=worker, args=(num,))
+            for num in range(self.thread_count)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        # Only one thread should have listed the zones to build the index.
+        self.assertEqual(backend.request_count(kind='list_hosted_zones'), 1)
+        self.assertEqual(len(backend.zones), 1)
+
+    def test_requests_sessions_are_per_thread(self):
+        conn = route53.connect('BLAHBLAH', 'SECRET')
+        sessions = []
+
+        def worker():
+            sessions.append(conn._transport.session)
+            sessions.append(conn._transport.session)
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # Each thread re-uses its own session.
+        self.assertEqual(len(set(id(session) for session in sessions)), 4)
+
+
+class RequestCoalescingTestCase(unittest.TestCase):
+    """
+    Tests for sharing identical GETs that are in flight at the same time.
+    """
+
+    def setUp(self):
+        self.backend = FakeRoute53Backend(latency=0.1)
+        self.zone_id = self.backend.add_zone('example.com.')
+
+    def run_threads(self, conn, func, count=8):
+        barrier = threading.Barrier(count)
+        results = [None] * count
+
+        def worker(i):
+            barrier.wait()
+            try:
+                results[i] = func(i)
+            except Exception as exc:
+                results[i] = exc
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_identical_gets_are_shared(self):
+        conn = get_fake_connection(self.backend)
+        zones = self.run_threads(conn, lambda i: conn.get_hosted_zone_by_id(self.zone_id))
+        self.assertEqual(set(zone.name for zone in zones), set(['example.com.']))
+        self.assertEqual(self.backend.request_count(kind='get_hosted_zone'), 1)
+        self.assertEqual(conn._single_flight.coalesced_count, 7)
+
+        # Once the request is done, the next one is sent afresh.
+        conn.get_hosted_zone_by_id(self.zone_id)
+        self.assertEqual(self.backend.request_count(kind='get_hosted_zone'), 2)
+
+    def test_different_gets_are_not_shared(self):
+        conn = get_fake_connection(self.backend)
+        self.run_threads(
+            conn, lambda i: list(conn.list_hosted_zones(page_chunks=i + 1)),
+            count=4,
+        )
+        self.assertEqual(self.backend.request_count(kind='list_hosted_zones'), 4)
+
+    def test_errors_are_shared(self):
+        conn = get_fake_connection(self.backend)
+        self.backend.inject_error('get_hosted_zone', code='NoSuchHostedZone')
+        results = self.run_threads(conn, lambda i: conn.get_hosted_zone_by_id(self.zone_id))
+        self.assertEqual(self.backend.request_count(kind='get_hosted_zone'), 1)
+        for result in results:
+            self.assertIsInstance(result, Exception)
+
+    def test_waiting_respects_deadline(self):
+        conn = get_fake_connection(self.backend)
+
+        def get_zone(i):
+            if i == 0:
+                return conn.get_hosted_zone_by_id(self.zone_id)
+            # Let the first thread send the request.
+            time.sleep(0.02)
+            with Deadline(0.03):
+                return conn.get_hosted_zone_by_id(self.zone_id)
+
+        results = self.run_threads(conn, get_zone, count=2)
+        self.assertEqual(results[0].name, 'example.com.')
+        self.assertIsInstance(results[1], DeadlineExceededError)
+        self.assertEqual(self.backend.request_count(kind='get_hosted_zone'), 1)
+
+    def test_disabled(self):
+        conn = get_fake_connection(self.backend, coalesce_requests=False)
+        self.run_threads(conn, lambda i: conn.get_hosted_zone_by_id(self.zone_id))
+        self.assertEqual(self.backend.request_count(kind='get_hosted_zone'), 8)
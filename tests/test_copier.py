@@ -0,0 +1,174 @@
+import unittest
+from route53.change_set import ChangeSet
+from route53.copier import ZoneCopier, copy_zone
+from route53.exceptions import Route53Error
+from tests.fake_transport import FakeRoute53Backend, get_fake_connection
+
+
+class ZoneCopierTestCase(unittest.TestCase):
+    """
+    Tests for copying zones between connections.
+    """
+
+    def setUp(self):
+        self.source_backend = FakeRoute53Backend()
+        self.source_id = self.source_backend.add_zone('example.com.')
+        for i in range(100):
+            self.source_backend.add_rrset(
+                self.source_id, 'host%03d.example.com.' % i, 'A', ['10.0.0.%d' % i]
+            )
+        self.source_backend.add_rrset(
+            self.source_id, 'example.com.', 'MX', ['10 mail.example.com.'], ttl=300,
+        )
+        self.source_backend.add_rrset(
+            self.source_id, 'www.example.com.', 'A', [],
+            alias_hosted_zone_id=self.source_id, alias_dns_name='host001.example.com.',
+        )
+        self.source_backend.add_rrset(
+            self.source_id, 'lb.example.com.', 'CNAME', [],
+            alias_hosted_zone_id='Z2FDTNDATAQYW2', alias_dns_name='d123.cloudfront.net.',
+        )
+        self.source_backend.add_rrset(
+            self.source_id, 'sub.example.com.', 'NS', ['ns1.example.net.'], ttl=3600,
+        )
+        self.source_conn = get_fake_connection(self.source_backend)
+
+        self.destination_backend = FakeRoute53Backend()
+        self.destination_id = self.destination_backend.add_zone('staging.example.org.')
+        self.destination_conn = get_fake_connection(self.destination_backend)
+
+        self.source_zone = self.source_conn.get_hosted_zone_by_id(self.source_id)
+        self.destination_zone = self.destination_conn.get_hosted_zone_by_id(self.destination_id)
+
+    def get_destination_rrsets(self):
+        return self.destination_backend.zones[self.destination_id]['rrsets']
+
+    def test_copy(self):
+        updates = []
+        progress = copy_zone(
+            self.source_zone, self.destination_zone, batch_size=25,
+            max_workers=3, page_chunks=20,
+            callback=lambda progress: updates.append(progress.copied_count),
+        )
+        self.assertTrue(progress.done)
+        self.assertEqual(progress.read_count, 106)
+        self.assertEqual(progress.skipped_count, 2)
+        self.assertEqual(progress.copied_count, 104)
+        self.assertEqual(progress.batch_count, 5)
+        self.assertEqual(updates, [25, 50, 75, 100, 104, 104])
+        self.assertEqual(self.destination_backend.request_count(kind='change_rrsets'), 5)
+
+        rrsets = self.get_destination_rrsets()
+        # 104 copies, plus the destination's own SOA and NS.
+        self.assertEqual(len(rrsets), 106)
+        self.assertEqual(
+            rrsets[('host042.staging.example.org.', 'A', None)]['records'], ['10.0.0.42']
+        )
+        self.assertEqual(
+            rrsets[('staging.example.org.', 'NS', None)]['records'],
+            self.destination_backend.zones[self.destination_id]['nameservers'],
+        )
+        self.assertIn(('staging.example.org.', 'MX', None), rrsets)
+        self.assertIn(('sub.staging.example.org.', 'NS', None), rrsets)
+
+        alias = rrsets[('www.staging.example.org.', 'A', None)]
+        self.assertEqual(alias['alias_hosted_zone_id'], self.destination_id)
+        self.assertEqual(alias['alias_dns_name'], 'host001.staging.example.org.')
+        alias = rrsets[('lb.staging.example.org.', 'CNAME', None)]
+        self.assertEqual(alias['alias_hosted_zone_id'], 'Z2FDTNDATAQYW2')
+        self.assertEqual(alias['alias_dns_name'], 'd123.cloudfront.net.')
+
+    def test_rename_and_zone_id_map(self):
+        copy_zone(
+            self.source_zone, self.destination_zone,
+            rename=lambda name: name.replace('example.com.', 'staging.example.org.'),
+            zone_id_map={'Z2FDTNDATAQYW2': 'ZOTHERACCOUNT'},
+        )
+        rrsets = self.get_destination_rrsets()
+        alias = rrsets[('lb.staging.example.org.', 'CNAME', None)]
+        self.assertEqual(alias['alias_hosted_zone_id'], 'ZOTHERACCOUNT')
+
+    def test_source_record_sets_are_untouched(self):
+        copier = ZoneCopier(self.source_zone, self.destination_zone)
+        rrset = [r for r in self.source_zone.record_sets if r.name == 'www.example.com.'][0]
+        copy = copier._rewrite(rrset)
+        self.assertEqual(copy.name, 'www.staging.example.org.')
+        self.assertEqual(copy.alias_hosted_zone_id, self.destination_id)
+        self.assertEqual(rrset._initial_vals['name'], 'www.example.com.')
+        self.assertEqual(rrset._initial_vals['alias_hosted_zone_id'], self.source_id)
+        self.assertEqual(rrset._initial_vals['alias_dns_name'], 'host001.example.com.')
+        self.assertFalse(rrset.is_modified())
+
+    def test_resume(self):
+        self.destination_backend.inject_error('change_rrsets', code='Throttling', after=2)
+        copier = ZoneCopier(
+            self.source_zone, self.destination_zone, batch_size=10, max_workers=1,
+            page_chunks=15,
+        )
+        self.assertRaises(Route53Error, copier.copy)
+        progress = copier.progress
+        self.assertFalse(progress.done)
+        self.assertEqual(progress.copied_count, 20)
+        self.assertIsNotNone(progress.cursor)
+
+        self.source_backend.request_log[:] = []
+        resumed = copier.copy(cursor=progress.cursor)
+        self.assertTrue(resumed.done)
+        self.assertEqual(resumed.copied_count, 84)
+        self.assertEqual(len(self.get_destination_rrsets()), 106)
+        # Only the rest of the zone was listed again.
+        self.assertEqual(self.source_backend.request_count(kind='list_rrsets'), 6)
+
+    def test_read_errors(self):
+        self.source_backend.inject_error('list_rrsets', code='Throttling', after=1)
+        self.assertRaises(
+            Route53Error, copy_zone, self.source_zone, self.destination_zone,
+            page_chunks=10,
+        )
+
+    def test_routing_policies(self):
+        """
+        Failover, health check and geolocation settings are copied. Record
+        sets with settings that can't be copied are skipped and reported.
+        """
+
+        self.source_backend.add_rrset(
+            self.source_id, 'fo.example.com.', 'A', ['10.0.1.1'],
+            set_identifier='primary', failover='PRIMARY', health_check_id='hc-1234',
+        )
+        self.source_backend.add_rrset(
+            self.source_id, 'geo.example.com.', 'A', [], set_identifier='eu',
+            geolocation={'continent_code': 'EU'}, alias_hosted_zone_id=self.source_id,
+            alias_dns_name='fo.example.com.', evaluate_target_health=True,
+        )
+        self.source_backend.add_rrset(
+            self.source_id, 'mv.example.com.', 'A', ['10.0.1.2'],
+            set_identifier='one', multi_value_answer='true',
+        )
+        progress = copy_zone(
+            self.source_zone, self.destination_zone,
+            health_check_id_map={'hc-1234': 'hc-5678'},
+        )
+        self.assertEqual(progress.copied_count, 106)
+        self.assertEqual(progress.skipped_count, 3)
+        self.assertEqual(progress.unsupported, [('mv.example.com.', 'A', 'one')])
+
+        rrsets = self.get_destination_rrsets()
+        failover = rrsets[('fo.staging.example.org.', 'A', 'primary')]
+        self.assertEqual(
+            (failover['failover'], failover['health_check_id']), ('PRIMARY', 'hc-5678')
+        )
+        geo = rrsets[('geo.staging.example.org.', 'A', 'eu')]
+        self.assertEqual(geo['geolocation'], {'continent_code': 'EU'})
+        self.assertEqual(geo['alias_dns_name'], 'fo.staging.example.org.')
+        self.assertEqual(geo['evaluate_target_health'], 'true')
+        self.assertNotIn(('mv.staging.example.org.', 'A', 'one'), rrsets)
+
+        # The copies pass local validation.
+        copier = ZoneCopier(self.source_zone, self.destination_zone)
+        change_set = ChangeSet(self.destination_conn, self.destination_id)
+        for rrset in self.source_zone.record_sets:
+            if rrset.name in ('fo.example.com.', 'geo.example.com.'):
+                change_set.add_change('UPSERT', copier._rewrite(rrset))
+        self.assertEqual(len(change_set), 2)
+        change_set.validate()
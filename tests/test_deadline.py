@@ -0,0 +1,149 @@
+import threading
+import time
+import unittest
+from route53.deadline import Deadline, bind_deadline, get_current_deadline
+from route53.exceptions import DeadlineExceededError, Route53APIError, \
+    Route53HTTPError
+from route53.util import SingleFlight
+from tests.fake_transport import FakeRoute53Backend, get_fake_connection
+
+
+class DeadlineTestCase(unittest.TestCase):
+    """
+    Tests for bounding whole calls with a deadline.
+    """
+
+    def setUp(self):
+        self.backend = FakeRoute53Backend(latency=0.05)
+        self.zone_id = self.backend.add_zone('example.com.')
+        for i in range(48):
+            self.backend.add_rrset(
+                self.zone_id, 'host%02d.example.com.' % i, 'A', ['10.0.0.%d' % i]
+            )
+        self.conn = get_fake_connection(self.backend)
+
+    def test_nesting(self):
+        self.assertIsNone(get_current_deadline())
+        outer = Deadline(1)
+        with outer:
+            with Deadline(10):
+                # The sooner deadline stays in effect.
+                self.assertIs(get_current_deadline(), outer)
+            inner = Deadline(0.5)
+            with inner:
+                self.assertIs(get_current_deadline(), inner)
+            self.assertIs(get_current_deadline(), outer)
+        self.assertIsNone(get_current_deadline())
+
+    def test_bind_deadline(self):
+        seen = []
+        deadline = Deadline(1)
+        with deadline:
+            func = bind_deadline(lambda: seen.append(get_current_deadline()))
+        thread = threading.Thread(target=func)
+        thread.start()
+        thread.join()
+        self.assertEqual(seen, [deadline])
+
+    def test_wall_clock_changes(self):
+        """
+        Deadlines don't move when the wall clock is stepped.
+        """
+
+        real_time = time.time
+        deadline = Deadline(1)
+        time.time = lambda: real_time() + 3600
+        try:
+            self.assertFalse(deadline.expired)
+            deadline.check()
+        finally:
+            time.time = real_time
+
+    def test_single_flight_waits_for_the_result(self):
+        """
+        A caller waiting on someone else's call never gets a result before
+        the call is done, even if its wait times out before the deadline
+        check raises.
+        """
+
+        class EarlyDeadline(object):
+            # Reports no time left, but hasn't quite expired yet.
+            def remaining(self):
+                return 0
+
+            def check(self):
+                pass
+
+        flight = SingleFlight()
+        started = threading.Event()
+
+        def slow_call():
+            started.set()
+            time.sleep(0.1)
+            return 'result'
+
+        leader = threading.Thread(target=flight.do, args=('key', slow_call))
+        leader.start()
+        started.wait()
+        self.assertEqual(flight.do('key', lambda: 'other', deadline=EarlyDeadline()), 'result')
+        leader.join()
+
+    def test_outcome_unknown(self):
+        """
+        Errors that may come after a request was carried out say so.
+        """
+
+        self.assertTrue(DeadlineExceededError(5).outcome_unknown)
+        self.assertTrue(Route53HTTPError(503, 'Service Unavailable').outcome_unknown)
+        self.assertFalse(Route53HTTPError(403, 'Forbidden').outcome_unknown)
+        self.assertFalse(Route53APIError('InvalidChangeBatch', 'Nope').outcome_unknown)
+
+    def test_transport_timeouts(self):
+        transport = self.conn._transport
+        self.assertIsNone(transport.get_timeout())
+        self.conn._timeout = (3, 10)
+        self.assertEqual(transport.get_timeout(), (3, 10))
+        self.assertEqual(transport.get_timeout(timeout=2), (2, 2))
+        with Deadline(5):
+            connect_timeout, read_timeout = transport.get_timeout()
+        self.assertEqual(connect_timeout, 3)
+        self.assertTrue(4 < read_timeout <= 5)
+
+    def test_listing_is_resumable(self):
+        listing = self.conn._list_resource_record_sets_by_zone_id(
+            self.zone_id, page_chunks=10
+        )
+        names = []
+        started_at = time.time()
+        with Deadline(0.12):
+            try:
+                for rrset in listing:
+                    names.append(rrset.name)
+            except DeadlineExceededError as exc:
+                cursor = exc.cursor
+            else:
+                self.fail("The listing should have run out of time.")
+        self.assertLess(time.time() - started_at, 0.3)
+        self.assertTrue(0 < len(names) < 50)
+        self.assertEqual(cursor, listing.cursor)
+
+        rest = self.conn._list_resource_record_sets_by_zone_id(
+            self.zone_id, page_chunks=10, cursor=cursor
+        )
+        names.extend(rrset.name for rrset in rest)
+        self.assertEqual(len(names), 50)
+        self.assertEqual(len(set(names)), 49)
+
+    def test_listing_keeps_its_deadline(self):
+        with Deadline(0.08):
+            listing = self.conn.list_hosted_zones(page_chunks=1)
+        time.sleep(0.1)
+        self.assertRaises(DeadlineExceededError, list, listing)
+
+    def test_partitioned_listing(self):
+        zone = self.conn.get_hosted_zone_by_id(self.zone_id)
+        with Deadline(0.08):
+            self.assertRaises(
+                DeadlineExceededError, list,
+                zone.list_record_sets_partitioned(['host30.example.com.'], page_chunks=5)
+            )
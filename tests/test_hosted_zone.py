@@ -0,0 +1,236 @@
+import unittest
+from lxml import etree
+from route53.exceptions import Route53Error
+from tests.fake_transport import FakeRoute53Backend, get_fake_connection
+
+
+class ForceDeleteTestCase(unittest.TestCase):
+    """
+    Tests for deleting hosted zones that still have record sets.
+    """
+
+    def setUp(self):
+        self.backend = FakeRoute53Backend()
+        self.zone_id = self.backend.add_zone('example.com.')
+        for i in range(250):
+            self.backend.add_rrset(self.zone_id, 'host%03d.example.com.' % i, 'A', ['10.0.0.1'])
+        # Delegations to sub-domains need to go too.
+        self.backend.add_rrset(self.zone_id, 'sub.example.com.', 'NS', ['ns1.example.net.'])
+        self.conn = get_fake_connection(self.backend)
+        self.zone = self.conn.get_hosted_zone_by_id(self.zone_id)
+
+    def test_batched_delete(self):
+        self.zone.delete(force=True, batch_size=50)
+        self.assertNotIn(self.zone_id, self.backend.zones)
+        # 251 record sets, in batches of 50.
+        self.assertEqual(self.backend.request_count(kind='change_rrsets'), 6)
+
+    def test_concurrent_delete(self):
+        self.zone.delete(force=True, batch_size=20, max_workers=4)
+        self.assertNotIn(self.zone_id, self.backend.zones)
+        self.assertEqual(self.backend.request_count(kind='change_rrsets'), 13)
+
+    def test_resume_after_failure(self):
+        """
+        A failed force delete can simply be re-run.
+        """
+
+        self.backend.inject_error('change_rrsets', code='Throttling', after=2)
+        self.assertRaises(Route53Error, self.zone.delete, force=True, batch_size=50)
+        self.assertIn(self.zone_id, self.backend.zones)
+        self.assertEqual(len(self.backend.zones[self.zone_id]['rrsets']), 2 + 251 - 100)
+
+        self.zone.delete(force=True, batch_size=50)
+        self.assertNotIn(self.zone_id, self.backend.zones)
+
+
+class ModificationTrackingTestCase(unittest.TestCase):
+    """
+    Tests for tracking and saving changes to record sets.
+    """
+
+    def setUp(self):
+        self.backend = FakeRoute53Backend()
+        self.zone_id = self.backend.add_zone('example.com.')
+        self.backend.add_rrset(self.zone_id, 'www.example.com.', 'A', ['10.0.0.1'], ttl=300)
+        self.conn = get_fake_connection(self.backend)
+        self.zone = self.conn.get_hosted_zone_by_id(self.zone_id)
+        self.rrset = [r for r in self.zone.record_sets if r.rrset_type == 'A'][0]
+
+    def test_fetched_record_set_is_clean(self):
+        self.assertFalse(self.rrset.is_modified())
+        self.assertIsNone(self.rrset.save())
+        self.assertEqual(self.backend.request_count(kind='change_rrsets'), 0)
+
+    def test_assignment(self):
+        self.rrset.ttl = 60
+        self.assertTrue(self.rrset.is_modified())
+        self.assertEqual(self.rrset.get_dirty_fields(), frozenset(['ttl']))
+        # Putting the original value back makes it clean again.
+        self.rrset.ttl = 300
+        self.assertFalse(self.rrset.is_modified())
+
+    def test_in_place_modification(self):
+        self.rrset.records.append('10.0.0.2')
+        self.assertTrue(self.rrset.is_modified())
+
+        self.rrset.save()
+        self.assertFalse(self.rrset.is_modified())
+        self.assertEqual(self.rrset._initial_vals['records'], ['10.0.0.1', '10.0.0.2'])
+        stored = self.backend.zones[self.zone_id]['rrsets'][('www.example.com.', 'A', None)]
+        self.assertEqual(stored['records'], ['10.0.0.1', '10.0.0.2'])
+
+        # Saving again is a no-op.
+        self.assertIsNone(self.rrset.save())
+        self.assertEqual(self.backend.request_count(kind='change_rrsets'), 1)
+
+    def test_clear(self):
+        self.rrset.records.clear()
+        self.assertTrue(self.rrset.is_modified())
+        self.assertEqual(self.rrset.get_dirty_fields(), frozenset(['records']))
+
+    def test_change_values_are_copies(self):
+        """
+        Changing the values written for a change leaves the record set's
+        own tracking alone.
+        """
+
+        from route53.xml_generators.change_resource_record_set import get_change_values
+        for action in ('DELETE', 'UPSERT'):
+            values = get_change_values((action, self.rrset))
+            values['name'] = 'other.example.com.'
+            values['records'].append('10.0.0.9')
+        self.assertEqual(self.rrset._initial_vals['name'], 'www.example.com.')
+        self.assertEqual(self.rrset._initial_vals['records'], ['10.0.0.1'])
+        self.assertEqual(self.rrset.records, ['10.0.0.1'])
+        self.assertFalse(self.rrset.is_modified())
+
+    def test_zero_ttl(self):
+        rrset, change_info = self.zone.create_a_record('zero.example.com.', ['10.0.0.5'], ttl=0)
+        self.assertEqual(rrset.ttl, 0)
+        method, kind, path, body = self.backend.request_log[-1]
+        self.assertIn('<TTL>0</TTL>', body)
+
+    def last_change_actions(self):
+        method, kind, path, body = self.backend.request_log[-1]
+        self.assertEqual(kind, 'change_rrsets')
+        e_root = etree.fromstring(body.encode('utf-8'))
+        return [e.text for e in e_root.iter('{*}Action')]
+
+    def test_save_upserts(self):
+        """
+        Value changes go out as a single UPSERT, even if the values in
+        Route53 were changed behind our back.
+        """
+
+        self.backend.zones[self.zone_id]['rrsets'][('www.example.com.', 'A', None)]['ttl'] = '900'
+        self.rrset.records = ['10.0.0.3']
+        self.rrset.save()
+        self.assertEqual(self.last_change_actions(), ['UPSERT'])
+        stored = self.backend.zones[self.zone_id]['rrsets'][('www.example.com.', 'A', None)]
+        self.assertEqual((stored['ttl'], stored['records']), ('300', ['10.0.0.3']))
+
+    def test_rename_replaces(self):
+        self.rrset.name = 'www2.example.com.'
+        self.rrset.save()
+        self.assertEqual(self.last_change_actions(), ['DELETE', 'CREATE'])
+        rrsets = self.backend.zones[self.zone_id]['rrsets']
+        self.assertNotIn(('www.example.com.', 'A', None), rrsets)
+        self.assertIn(('www2.example.com.', 'A', None), rrsets)
+
+    def test_alias_round_trip(self):
+        """
+        Alias record sets are sent without a TTL or resource records.
+        """
+
+        rrset, change_info = self.zone.create_a_record(
+            'alias.example.com.', [],
+            alias_hosted_zone_id='Z2ABCDEF', alias_dns_name='lb.example.com.',
+        )
+        method, kind, path, body = self.backend.request_log[-1]
+        self.assertNotIn('TTL', body)
+        self.assertIn('<EvaluateTargetHealth>false</EvaluateTargetHealth>', body)
+
+        fetched = [r for r in self.zone.record_sets if r.name == 'alias.example.com.'][0]
+        self.assertEqual(fetched.alias_dns_name, 'lb.example.com.')
+        fetched.delete()
+        self.assertNotIn(('alias.example.com.', 'A', None), self.backend.zones[self.zone_id]['rrsets'])
+
+    def test_failover_round_trip(self):
+        """
+        Failover and health check settings survive a save, and the DELETE
+        for a rename still matches what's in Route53.
+        """
+
+        self.backend.add_rrset(
+            self.zone_id, 'fo.example.com.', 'A', ['10.0.1.1'],
+            set_identifier='primary', failover='PRIMARY', health_check_id='hc-1234',
+        )
+        key = ('fo.example.com.', 'A', 'primary')
+        stored = dict(self.backend.zones[self.zone_id]['rrsets'][key])
+        rrset = [r for r in self.zone.record_sets if r.name == 'fo.example.com.'][0]
+        self.assertEqual((rrset.failover, rrset.health_check_id), ('PRIMARY', 'hc-1234'))
+
+        rrset.ttl = 120
+        rrset.save()
+        self.assertEqual(self.last_change_actions(), ['UPSERT'])
+        stored['ttl'] = '120'
+        self.assertEqual(self.backend.zones[self.zone_id]['rrsets'][key], stored)
+
+        rrset.name = 'fo2.example.com.'
+        rrset.save()
+        self.assertEqual(self.last_change_actions(), ['DELETE', 'CREATE'])
+        stored['name'] = 'fo2.example.com.'
+        self.assertEqual(
+            self.backend.zones[self.zone_id]['rrsets'][('fo2.example.com.', 'A', 'primary')],
+            stored,
+        )
+
+    def test_geolocation_round_trip(self):
+        self.backend.add_rrset(
+            self.zone_id, 'geo.example.com.', 'A', ['10.0.2.1'], set_identifier='us-ca',
+            geolocation={'country_code': 'US', 'subdivision_code': 'CA'},
+        )
+        key = ('geo.example.com.', 'A', 'us-ca')
+        stored = dict(self.backend.zones[self.zone_id]['rrsets'][key])
+        rrset = [r for r in self.zone.record_sets if r.name == 'geo.example.com.'][0]
+        self.assertEqual(rrset.geolocation, {'country_code': 'US', 'subdivision_code': 'CA'})
+
+        rrset.records = ['10.0.2.2']
+        rrset.save()
+        stored['records'] = ['10.0.2.2']
+        self.assertEqual(self.backend.zones[self.zone_id]['rrsets'][key], stored)
+
+    def test_evaluate_target_health_round_trip(self):
+        self.backend.add_rrset(
+            self.zone_id, 'lb.example.com.', 'A', [],
+            alias_hosted_zone_id='Z2ABCDEF', alias_dns_name='lb-1.example.net.',
+            evaluate_target_health=True,
+        )
+        key = ('lb.example.com.', 'A', None)
+        rrset = [r for r in self.zone.record_sets if r.name == 'lb.example.com.'][0]
+        self.assertIs(rrset.alias_evaluate_target_health, True)
+
+        rrset.alias_dns_name = 'lb-2.example.net.'
+        rrset.save()
+        stored = self.backend.zones[self.zone_id]['rrsets'][key]
+        self.assertEqual(
+            (stored['alias_dns_name'], stored['evaluate_target_health']),
+            ('lb-2.example.net.', 'true'),
+        )
+
+    def test_unrecognized_settings_block_upserts(self):
+        """
+        Record sets with settings the parser doesn't know about can't be
+        written back, since that would drop those settings.
+        """
+
+        self.backend.add_rrset(
+            self.zone_id, 'mv.example.com.', 'A', ['10.0.3.1'],
+            set_identifier='one', multi_value_answer='true',
+        )
+        rrset = [r for r in self.zone.record_sets if r.name == 'mv.example.com.'][0]
+        rrset.ttl = 120
+        self.assertRaises(Route53Error, rrset.save)
+        self.assertEqual(self.backend.request_count(kind='change_rrsets'), 0)
+        self.assertTrue(rrset.is_modified())
@@ -0,0 +1,54 @@
+import os
+import subprocess
+import sys
+import unittest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+from bench_import_time import measure_import, get_cumulative_us
+
+# Importing route53.connection took around 190ms before its heavy
+# dependencies were made lazy, and takes around 15ms since. This leaves
+# plenty of room for slow machines, while catching an eager import of
+# lxml or requests creeping back in.
+IMPORT_TIME_BUDGET_MS = 60
+
+# Modules that shouldn't be loaded until they're needed.
+LAZY_MODULES = [
+    'lxml', 'requests', 'pytz', 'concurrent.futures',
+    'route53.hosted_zone', 'route53.resource_record_set',
+    'route53.xml_parsers.list_resource_record_sets_by_zone_id',
+    'route53.xml_generators.change_resource_record_set',
+]
+
+
+class ImportTimeTestCase(unittest.TestCase):
+    """
+    Keeps ``import route53`` cheap, for short-lived scripts.
+    """
+
+    def test_heavy_modules_are_lazy(self):
+        script = (
+            'import sys, route53, route53.connection; '
+            'route53.connect("BLAHBLAH", "SECRET"); '
+            'print("\\n".join(sorted(sys.modules)))'
+        )
+        output = subprocess.check_output([sys.executable, '-c', script], cwd=ROOT)
+        loaded = set(output.decode('utf-8').split())
+        self.assertEqual([module for module in LAZY_MODULES if module in loaded], [])
+
+    def test_import_time_budget(self):
+        # Best of a few runs, to smooth over a noisy machine.
+        best_us = min(
+            get_cumulative_us(measure_import('route53.connection'), 'route53.connection')
+            for _ in range(3)
+        )
+        self.assertLess(best_us / 1000.0, IMPORT_TIME_BUDGET_MS)
+
+    def test_lazy_attributes(self):
+        from route53 import xml_parsers, xml_generators
+        self.assertTrue(callable(xml_parsers.get_change_parser))
+        self.assertTrue(callable(xml_generators.create_hosted_zone_writer))
+        self.assertIn('list_hosted_zones_parser', dir(xml_parsers))
+        self.assertRaises(AttributeError, getattr, xml_parsers, 'bogus_parser')
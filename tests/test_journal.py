@@ -0,0 +1,243 @@
+import json
+import os
+import shutil
+import socket
+import tempfile
+import time
+import unittest
+from route53.change_set import ChangeSet
+from route53.deadline import Deadline
+from route53.exceptions import DeadlineExceededError, Route53Error
+from route53.journal import ChangeJournal, BATCH_APPLIED, BATCH_FAILED, \
+    BATCH_PENDING, get_batch_id, serialize_change_set
+from route53.resource_record_set import AResourceRecordSet
+from tests.fake_transport import FakeRoute53Backend, get_fake_connection
+
+
+class ChangeJournalTestCase(unittest.TestCase):
+    """
+    Tests for journaled, resumable change pipelines.
+    """
+
+    def setUp(self):
+        self.backend = FakeRoute53Backend()
+        self.zone_id = self.backend.add_zone('example.com.')
+        self.conn = get_fake_connection(self.backend)
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'changes.journal')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def make_change_sets(self, count=5, per_batch=3):
+        change_sets = []
+        for batch in range(count):
+            cset = ChangeSet(connection=self.conn, hosted_zone_id=self.zone_id)
+            for i in range(per_batch):
+                rrset = AResourceRecordSet(
+                    connection=self.conn, zone_id=self.zone_id,
+                    name='host%d-%d.example.com.' % (batch, i),
+                    ttl=60, records=['10.0.%d.%d' % (batch, i)],
+                )
+                cset.add_change('CREATE', rrset)
+            change_sets.append(cset)
+        return change_sets
+
+    def read_entries(self):
+        with open(self.path) as fobj:
+            return [json.loads(line) for line in fobj]
+
+    def test_records_intent_and_result(self):
+        with ChangeJournal(self.path) as journal:
+            results = self.conn.apply_change_sets(self.make_change_sets(2), journal=journal)
+
+        entries = self.read_entries()
+        self.assertEqual(
+            [entry['event'] for entry in entries],
+            ['intent', 'applied', 'intent', 'applied'],
+        )
+        self.assertEqual(entries[1]['change_info']['request_id'], results[0]['request_id'])
+        self.assertEqual(entries[1]['change_info']['request_status'], 'INSYNC')
+
+    def test_resume_skips_applied_batches(self):
+        self.backend.inject_error('change_rrsets', code='Throttling', after=2)
+        with ChangeJournal(self.path) as journal:
+            self.assertRaises(
+                Route53Error, self.conn.apply_change_sets,
+                self.make_change_sets(), journal=journal,
+            )
+        self.assertEqual(self.backend.request_count(kind='change_rrsets'), 3)
+
+        with ChangeJournal(self.path) as journal:
+            results = self.conn.apply_change_sets(self.make_change_sets(), journal=journal)
+            self.assertEqual(journal.get_pending_batch_ids(), [])
+
+        # The two applied batches were skipped, and the rejected one re-sent.
+        self.assertEqual(self.backend.request_count(kind='change_rrsets'), 6)
+        self.assertEqual(len(results), 5)
+        self.assertTrue(all(result['request_id'] for result in results))
+        self.assertEqual(len(self.backend.zones[self.zone_id]['rrsets']), 2 + 15)
+
+    def test_resume_verifies_uncertain_batches(self):
+        """
+        A crash while a batch is in flight leaves it without a result. On
+        resume, the zone is checked instead of blindly re-sending.
+        """
+
+        change_sets = self.make_change_sets(3)
+        with ChangeJournal(self.path) as journal:
+            self.conn.apply_change_sets(change_sets, journal=journal)
+
+        # Drop the final result, and tear the line before it, as though we
+        # crashed mid-write.
+        with open(self.path) as fobj:
+            lines = fobj.readlines()
+        with open(self.path, 'w') as fobj:
+            fobj.writelines(lines[:-1])
+            fobj.write(lines[-1][:10])
+
+        journal = ChangeJournal(self.path)
+        pending = journal.get_pending_batch_ids()
+        self.assertEqual(len(pending), 1)
+
+        self.backend.request_log[:] = []
+        results = self.conn.apply_change_sets(self.make_change_sets(3), journal=journal)
+        journal.close()
+
+        self.assertEqual(self.backend.request_count(kind='change_rrsets'), 0)
+        # One lookup per record set in the uncertain batch.
+        self.assertEqual(self.backend.request_count(kind='list_rrsets'), 3)
+        self.assertIsNone(results[2])
+        self.assertEqual(ChangeJournal(self.path).get_batch(pending[0])['state'], BATCH_APPLIED)
+
+    def test_resume_resends_unapplied_batches(self):
+        change_sets = self.make_change_sets(2)
+        journal = ChangeJournal(self.path)
+        # Journaled, but the process died before it was sent.
+        changes = serialize_change_set(change_sets[0])
+        batch_id = get_batch_id(self.zone_id, changes)
+        journal.record_intent(batch_id, self.zone_id, changes)
+        journal.close()
+
+        journal = ChangeJournal(self.path)
+        applied, not_applied = journal.verify_pending(self.conn)
+        self.assertEqual((applied, not_applied), ([], [batch_id]))
+
+        self.conn.apply_change_sets(change_sets, journal=journal)
+        journal.close()
+        self.assertEqual(self.backend.request_count(kind='change_rrsets'), 2)
+        self.assertEqual(len(self.backend.zones[self.zone_id]['rrsets']), 2 + 6)
+
+    def test_repeated_batches(self):
+        """
+        A batch that is legitimately sent twice in one pipeline gets its own
+        journal entry each time.
+        """
+
+        rrset = AResourceRecordSet(
+            connection=self.conn, zone_id=self.zone_id,
+            name='www.example.com.', ttl=60, records=['10.0.0.1'],
+        )
+        change_sets = []
+        for action in ('CREATE', 'DELETE', 'CREATE'):
+            cset = ChangeSet(connection=self.conn, hosted_zone_id=self.zone_id)
+            cset.add_change(action, rrset)
+            change_sets.append(cset)
+
+        with ChangeJournal(self.path) as journal:
+            self.conn.apply_change_sets(change_sets, journal=journal)
+        self.assertEqual(self.backend.request_count(kind='change_rrsets'), 3)
+        self.assertIn(('www.example.com.', 'A', None), self.backend.zones[self.zone_id]['rrsets'])
+
+    def test_failed_batches(self):
+        self.backend.inject_error('change_rrsets', code='InvalidChangeBatch')
+        with ChangeJournal(self.path) as journal:
+            self.assertRaises(
+                Route53Error, self.conn.apply_change_sets,
+                self.make_change_sets(1), journal=journal,
+            )
+            batch_id = self.read_entries()[0]['batch_id']
+            self.assertEqual(journal.get_batch(batch_id)['state'], BATCH_FAILED)
+
+    def test_server_errors_leave_batches_pending(self):
+        """
+        Internal failures on Route53's side may come after the batch was
+        applied, so the batch is left to be checked on resume.
+        """
+
+        self.backend.inject_error('change_rrsets', code='ServiceUnavailable')
+        with ChangeJournal(self.path) as journal:
+            self.assertRaises(
+                Route53Error, self.conn.apply_change_sets,
+                self.make_change_sets(1), journal=journal,
+            )
+            batch_id = self.read_entries()[0]['batch_id']
+            self.assertEqual(journal.get_batch(batch_id)['state'], BATCH_PENDING)
+
+    def test_resume_verifies_wildcards(self):
+        """
+        Route53 lists wildcard names as ``\\052``, which still match the
+        journaled ``*``.
+        """
+
+        def make_change_sets():
+            cset = ChangeSet(connection=self.conn, hosted_zone_id=self.zone_id)
+            cset.add_change('CREATE', AResourceRecordSet(
+                connection=self.conn, zone_id=self.zone_id,
+                name='*.Example.com', ttl=60, records=['10.0.0.1'],
+            ))
+            return [cset]
+
+        with ChangeJournal(self.path) as journal:
+            self.conn.apply_change_sets(make_change_sets(), journal=journal)
+        # Drop the result, as though we crashed before writing it.
+        with open(self.path) as fobj:
+            lines = fobj.readlines()
+        with open(self.path, 'w') as fobj:
+            fobj.writelines(lines[:-1])
+
+        self.backend.request_log[:] = []
+        with ChangeJournal(self.path) as journal:
+            results = self.conn.apply_change_sets(make_change_sets(), journal=journal)
+        self.assertIsNone(results[0])
+        self.assertEqual(self.backend.request_count(kind='change_rrsets'), 0)
+
+    def test_timeout_after_send(self):
+        """
+        A batch that times out may still have been applied, so it's left
+        pending rather than journaled as failed, and checked on resume.
+        """
+
+        transport = self.conn._transport
+        send_request = transport.send_request
+
+        def send_then_time_out(path, data, method):
+            response = send_request(path, data, method)
+            if method == 'POST':
+                time.sleep(0.2)
+                raise socket.timeout('timed out')
+            return response
+        transport.send_request = send_then_time_out
+
+        change_sets = self.make_change_sets(1)
+        with ChangeJournal(self.path) as journal:
+            with Deadline(0.1):
+                self.assertRaises(
+                    DeadlineExceededError, self.conn.apply_change_sets,
+                    change_sets, journal=journal,
+                )
+            batch_id = self.read_entries()[0]['batch_id']
+            self.assertEqual(journal.get_batch(batch_id)['state'], BATCH_PENDING)
+        transport.send_request = send_request
+
+        with ChangeJournal(self.path) as journal:
+            results = self.conn.apply_change_sets(self.make_change_sets(1), journal=journal)
+            self.assertEqual(journal.get_batch(batch_id)['state'], BATCH_APPLIED)
+        self.assertIsNone(results[0])
+        self.assertEqual(self.backend.request_count(kind='change_rrsets'), 1)
+
+    def test_get_change(self):
+        change_info = self.conn.apply_change_sets(self.make_change_sets(1))[0]
+        status = self.conn.get_change(change_info['request_id'])
+        self.assertEqual(status['request_id'], change_info['request_id'])
+        self.assertEqual(status['request_status'], 'INSYNC')
@@ -0,0 +1,133 @@
+import unittest
+from route53.pagination import HostedZoneCursor, RecordSetCursor
+from tests.fake_transport import FakeRoute53Backend, get_fake_connection
+
+
+def rrset_key(rrset):
+    return rrset.name, rrset.rrset_type, rrset.set_identifier
+
+
+class RecordSetCursorTestCase(unittest.TestCase):
+    """
+    Tests for resumable record set listings.
+    """
+
+    def setUp(self):
+        self.backend = FakeRoute53Backend()
+        self.zone_id = self.backend.add_zone('example.com.')
+        for i in range(5):
+            self.backend.add_rrset(self.zone_id, 'host%d.example.com.' % i, 'A', ['10.0.0.%d' % i])
+        # Weighted record sets sharing a name and type, which will straddle
+        # page boundaries.
+        for i in range(5):
+            self.backend.add_rrset(
+                self.zone_id, 'www.example.com.', 'CNAME', ['lb%d.example.com.' % i],
+                set_identifier='lb%d' % i, weight=10,
+            )
+        self.conn = get_fake_connection(self.backend)
+        self.zone = self.conn.get_hosted_zone_by_id(self.zone_id)
+
+    def test_identifier_is_forwarded(self):
+        """
+        Weighted record sets split across pages are neither repeated nor
+        skipped.
+        """
+
+        rrsets = list(self.zone.list_record_sets(page_chunks=3))
+        keys = [rrset_key(rrset) for rrset in rrsets]
+        self.assertEqual(len(keys), 12)
+        self.assertEqual(len(set(keys)), 12)
+        self.assertEqual(
+            [rrset.set_identifier for rrset in rrsets if rrset.name == 'www.example.com.'],
+            ['lb0', 'lb1', 'lb2', 'lb3', 'lb4'],
+        )
+
+    def test_resume_from_any_position(self):
+        """
+        A serialized cursor resumes the listing exactly where it stopped,
+        including part way through a page.
+        """
+
+        expected = [rrset_key(rrset) for rrset in self.zone.list_record_sets()]
+
+        for stop_at in range(len(expected)):
+            listing = self.zone.list_record_sets(page_chunks=3)
+            seen = [rrset_key(next(listing)) for _ in range(stop_at)]
+            saved = listing.cursor.serialize()
+
+            cursor = RecordSetCursor.deserialize(saved)
+            resumed = self.zone.list_record_sets(cursor=cursor, page_chunks=3)
+            seen.extend(rrset_key(rrset) for rrset in resumed)
+            self.assertEqual(seen, expected)
+            self.assertIsNone(resumed.cursor)
+
+    def test_cursor_round_trip(self):
+        cursor = RecordSetCursor(name='www.example.com.', rrset_type='CNAME', identifier='lb1')
+        self.assertEqual(RecordSetCursor.deserialize(cursor.serialize()), cursor)
+        self.assertEqual(cursor.to_params(), {
+            'name': 'www.example.com.', 'type': 'CNAME', 'identifier': 'lb1',
+        })
+        self.assertTrue(RecordSetCursor().is_start())
+
+
+class HostedZoneCursorTestCase(unittest.TestCase):
+    """
+    Tests for resumable hosted zone listings.
+    """
+
+    def test_resume(self):
+        backend = FakeRoute53Backend()
+        for i in range(7):
+            backend.add_zone('zone%d.example.com.' % i)
+        conn = get_fake_connection(backend)
+
+        listing = conn.list_hosted_zones(page_chunks=2)
+        first = [next(listing).name for _ in range(3)]
+        cursor = HostedZoneCursor.deserialize(listing.cursor.serialize())
+
+        rest = [zone.name for zone in conn.list_hosted_zones(page_chunks=2, cursor=cursor)]
+        self.assertEqual(first + rest, ['zone%d.example.com.' % i for i in range(7)])
+
+
+class PageIterationTestCase(unittest.TestCase):
+    """
+    Tests for the page-at-a-time listing variants.
+    """
+
+    def setUp(self):
+        self.backend = FakeRoute53Backend()
+        self.zone_id = self.backend.add_zone('example.com.')
+        for i in range(5):
+            self.backend.add_zone('zone%d.example.com.' % i)
+        for i in range(8):
+            self.backend.add_rrset(self.zone_id, 'host%d.example.com.' % i, 'A', ['10.0.0.%d' % i])
+        self.conn = get_fake_connection(self.backend)
+
+    def test_record_set_pages(self):
+        zone = self.conn.get_hosted_zone_by_id(self.zone_id)
+        pages = list(zone.iter_record_set_pages(page_chunks=4))
+
+        self.assertEqual([page.item_count for page in pages], [4, 4, 2])
+        self.assertEqual([page.is_truncated for page in pages], [True, True, False])
+        self.assertIsNone(pages[-1].next_cursor)
+        # Each page's next cursor points at the first item of the next page.
+        self.assertEqual(pages[0].next_cursor, RecordSetCursor.from_item(pages[1].items[0]))
+
+        rrsets = [rrset for page in pages for rrset in page]
+        self.assertEqual(
+            [rrset.name for rrset in rrsets],
+            [rrset.name for rrset in zone.record_sets],
+        )
+
+    def test_hosted_zone_pages(self):
+        pages = list(self.conn.iter_hosted_zone_pages(page_chunks=4, with_nameservers=True))
+        self.assertEqual([len(page) for page in pages], [4, 2])
+        for page in pages:
+            for zone in page:
+                self.assertNotEqual(zone._nameservers, [])
+
+        resumed = list(self.conn.iter_hosted_zone_pages(page_chunks=4, cursor=pages[0].next_cursor))
+        self.assertEqual(
+            [zone.id for zone in resumed[0]],
+            [zone.id for zone in pages[1]],
+        )
@@ -0,0 +1,101 @@
+import time
+import unittest
+from route53.exceptions import Route53Error
+from route53.partitioning import split_points_from_names, split_points_from_prefixes
+from tests.fake_transport import FakeRoute53Backend, get_fake_connection
+
+
+def rrset_key(rrset):
+    return rrset.name, rrset.rrset_type, rrset.set_identifier
+
+
+class PartitionedListingTestCase(unittest.TestCase):
+    """
+    Tests for listing a single zone in concurrent name ranges.
+    """
+
+    def setUp(self):
+        self.backend = FakeRoute53Backend()
+        self.zone_id = self.backend.add_zone('example.com.')
+        for label in 'abcdefghijklmnopqrstuvwxyz':
+            self.backend.add_rrset(self.zone_id, '%s.example.com.' % label, 'A', ['10.0.0.1'])
+            self.backend.add_rrset(self.zone_id, '%s.example.com.' % label, 'TXT', ['"hi"'])
+            self.backend.add_rrset(self.zone_id, 'www.%s.example.com.' % label, 'A', ['10.0.0.2'])
+        self.conn = get_fake_connection(self.backend)
+        self.zone = self.conn.get_hosted_zone_by_id(self.zone_id)
+        self.expected = [rrset_key(rrset) for rrset in self.zone.record_sets]
+
+    def assertPartitionedMatches(self, split_points):
+        rrsets = self.zone.list_record_sets_partitioned(
+            split_points, max_workers=3, page_chunks=7
+        )
+        self.assertEqual([rrset_key(rrset) for rrset in rrsets], self.expected)
+
+    def test_prefix_split_points(self):
+        """
+        Split points that aren't record names, out of order and duplicated.
+        """
+
+        self.assertPartitionedMatches(
+            split_points_from_prefixes('example.com.', ['t', 'g', 'n', 'g'])
+        )
+
+    def test_split_points_matching_records(self):
+        """
+        Split points that are existing names, including ones with several
+        record sets and sub-domains.
+        """
+
+        self.assertPartitionedMatches(['c.example.com.', 'www.c.example.com.', 'm.example.com.'])
+
+    def test_hyphenated_names_at_split_points(self):
+        """
+        Route53 compares the reversed names as strings, so ``a-b`` sorts
+        before ``a``, and belongs to the range before the split point.
+        """
+
+        for name in ('a-b.example.com.', 'm-1.example.com.', 'www.m-1.example.com.', 'm0.example.com.'):
+            self.backend.add_rrset(self.zone_id, name, 'A', ['10.0.0.3'])
+        self.expected = [rrset_key(rrset) for rrset in self.zone.record_sets]
+        names = [name for name, rrset_type, identifier in self.expected]
+        self.assertTrue(names.index('a-b.example.com.') < names.index('a.example.com.'))
+
+        self.assertPartitionedMatches(['a.example.com.', 'm.example.com.'])
+        self.assertPartitionedMatches(split_points_from_prefixes('example.com.', ['a', 'm']))
+        self.assertPartitionedMatches(split_points_from_names(names, 7))
+
+    def test_split_points_outside_zone(self):
+        self.assertPartitionedMatches(['aaa.', 'zzz.'])
+        self.assertPartitionedMatches([])
+
+    def test_learned_split_points(self):
+        names = [name for name, rrset_type, identifier in self.expected]
+        split_points = split_points_from_names(names, 5)
+        self.assertEqual(len(split_points), 4)
+        self.assertPartitionedMatches(split_points)
+
+    def test_streams_ranges(self):
+        """
+        Ranges ahead of the one being yielded only get ``queue_size``
+        record sets ahead, rather than being listed in full.
+        """
+
+        rrsets = self.zone.list_record_sets_partitioned(
+            split_points_from_prefixes('example.com.', ['n']),
+            max_workers=2, page_chunks=2, queue_size=2,
+        )
+        first = next(rrsets)
+        self.assertEqual(rrset_key(first), self.expected[0])
+        time.sleep(0.3)
+        # Each range has fetched about as many pages as fit in its queue,
+        # rather than the 40 or so pages the whole zone takes.
+        self.assertTrue(self.backend.request_count(kind='list_rrsets') < 10)
+        self.assertEqual([rrset_key(first)] + [rrset_key(r) for r in rrsets], self.expected)
+
+    def test_errors_are_raised(self):
+        self.backend.inject_error('list_rrsets', code='Throttling', after=3)
+        rrsets = self.zone.list_record_sets_partitioned(
+            split_points_from_prefixes('example.com.', ['g', 'n', 't']),
+            max_workers=2, page_chunks=2,
+        )
+        self.assertRaises(Route53Error, list, rrsets)
@@ -0,0 +1,109 @@
+import unittest
+from route53.provisioning import ZoneSpec, get_caller_reference, provision_zones
+from tests.fake_transport import FakeRoute53Backend, get_fake_connection
+
+
+class ProvisioningTestCase(unittest.TestCase):
+    """
+    Tests for bulk hosted zone provisioning.
+    """
+
+    def setUp(self):
+        self.backend = FakeRoute53Backend()
+        self.conn = get_fake_connection(self.backend)
+
+    def get_specs(self, count=12):
+        return [
+            ZoneSpec('tenant%02d.example.com' % i, comment='Tenant %d' % i, record_sets=[
+                {'name': '@', 'type': 'MX', 'ttl': 300, 'records': ['10 mx.example.com.']},
+                {'name': 'www', 'type': 'A', 'ttl': 60, 'records': ['10.0.0.%d' % i]},
+                {'name': 'api.tenant%02d.example.com.' % i, 'type': 'CNAME', 'ttl': 60,
+                 'records': ['lb.example.net.']},
+            ])
+            for i in range(count)
+        ]
+
+    def get_rrsets(self, zone_id):
+        return self.backend.zones[zone_id]['rrsets']
+
+    def test_provision(self):
+        finished = []
+        results = provision_zones(
+            self.conn, self.get_specs(), salt='run-1', max_workers=4,
+            callback=finished.append,
+        )
+        self.assertEqual(len(results), 12)
+        self.assertEqual(len(finished), 12)
+        self.assertEqual(len(self.backend.zones), 12)
+
+        for i, result in enumerate(results):
+            self.assertTrue(result.ok, result)
+            self.assertTrue(result.created)
+            self.assertEqual(result.hosted_zone.name, 'tenant%02d.example.com.' % i)
+            self.assertEqual(len(result.change_ids), 2)
+            rrsets = self.get_rrsets(result.hosted_zone.id)
+            self.assertIn(('tenant%02d.example.com.' % i, 'MX', None), rrsets)
+            self.assertIn(('www.tenant%02d.example.com.' % i, 'A', None), rrsets)
+            self.assertIn(('api.tenant%02d.example.com.' % i, 'CNAME', None), rrsets)
+            self.assertEqual(
+                self.backend.zones[result.hosted_zone.id]['caller_reference'],
+                get_caller_reference(result.spec.name, 'run-1'),
+            )
+
+    def test_rerun_is_idempotent(self):
+        first = provision_zones(self.conn, self.get_specs(), salt='run-1')
+        specs = self.get_specs()
+        specs[3].record_sets[1]['records'] = ['10.9.9.9']
+        second = provision_zones(get_fake_connection(self.backend), specs, salt='run-1')
+
+        self.assertEqual(len(self.backend.zones), 12)
+        for before, after in zip(first, second):
+            self.assertTrue(after.ok, after)
+            self.assertFalse(after.created)
+            self.assertEqual(after.hosted_zone.id, before.hosted_zone.id)
+        rrsets = self.get_rrsets(second[3].hosted_zone.id)
+        self.assertEqual(rrsets[('www.tenant03.example.com.', 'A', None)]['records'], ['10.9.9.9'])
+
+    def test_batches(self):
+        spec = ZoneSpec('big.example.com.', record_sets=[
+            {'name': 'host%03d' % i, 'type': 'A', 'ttl': 60, 'records': ['10.0.0.1']}
+            for i in range(250)
+        ])
+        result, = provision_zones(self.conn, [spec], batch_size=100)
+        self.assertTrue(result.ok)
+        self.assertEqual(len(result.record_change_infos), 3)
+        self.assertEqual(len(self.get_rrsets(result.hosted_zone.id)), 252)
+
+    def test_failures_are_per_zone(self):
+        specs = self.get_specs(3)
+        specs[1].record_sets.append({'name': 'bad', 'type': 'BOGUS'})
+        self.backend.inject_error('create_hosted_zone', code='Throttling', after=2)
+
+        results = provision_zones(self.conn, specs, max_workers=1)
+        self.assertEqual([result.ok for result in results], [True, False, False])
+        self.assertIn('BOGUS', str(results[1].error))
+        # The zone was created, but its record sets weren't all sent.
+        self.assertTrue(results[1].created)
+        self.assertEqual(results[2].error.code, 'Throttling')
+        self.assertIsNone(results[2].hosted_zone)
+
+    def test_transport_errors_are_per_zone(self):
+        specs = self.get_specs(3)
+        provision_zones(self.conn, specs[:1], salt='run-1')
+
+        # A fresh connection has to list the zones to find the one that
+        # already exists, and that listing fails.
+        conn = get_fake_connection(self.backend)
+        transport = conn._transport
+        send_request = transport.send_request
+
+        def failing_send_request(path, data, method):
+            if method == 'GET' and path.strip('/') == 'hostedzone':
+                raise IOError('Connection reset by peer')
+            return send_request(path, data, method)
+        transport.send_request = failing_send_request
+
+        results = provision_zones(conn, specs, salt='run-1', max_workers=2)
+        self.assertEqual([result.ok for result in results], [False, True, True])
+        self.assertIsInstance(results[0].error, IOError)
+        self.assertEqual(len(self.backend.zones), 3)
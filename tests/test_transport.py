@@ -0,0 +1,207 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+except ImportError:
+    # Python 2.x.
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+
+import route53
+from route53.cassette import RecordingTransport, ReplayTransport
+from route53.deadline import Deadline
+from route53.exceptions import DeadlineExceededError, Route53HTTPError
+from route53.transport import HTTPClientTransport, RequestsTransport
+
+
+class ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Clients that time out hang up on us, which is expected.
+        pass
+
+
+class RecordingHandler(BaseHTTPRequestHandler):
+    """
+    Answers every request with a canned body, recording what it was sent.
+    """
+
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def respond(self, body):
+        server = self.server
+        server.requests.append((self.command, self.path, body, dict(self.headers)))
+        if '/slow' in self.path:
+            time.sleep(0.5)
+        status = 404 if '/missing' in self.path else 200
+        response = b'<Response>ok</Response>'
+        self.send_response(status)
+        self.send_header('Content-Length', str(len(response)))
+        self.end_headers()
+        self.wfile.write(response)
+        if server.drop_after_response:
+            # Close without saying so, like an idle keep-alive timeout.
+            server.drop_after_response = False
+            self.close_connection = True
+
+    def do_GET(self):
+        self.respond(None)
+
+    def do_DELETE(self):
+        self.respond(None)
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        self.respond(self.rfile.read(length))
+
+    def setup(self):
+        BaseHTTPRequestHandler.setup(self)
+        self.server.connection_count += 1
+
+
+class HTTPClientTransportTestCase(unittest.TestCase):
+    """
+    Tests for the http.client-based transport, against a local server.
+    """
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), RecordingHandler)
+        self.server.requests = []
+        self.server.connection_count = 0
+        self.server.drop_after_response = False
+        self.server_thread = threading.Thread(
+            target=self.server.serve_forever, kwargs={'poll_interval': 0.05}
+        )
+        self.server_thread.daemon = True
+        self.server_thread.start()
+
+        self.conn = route53.connect(
+            'BLAHBLAH', 'SECRET',
+            transport=lambda conn: HTTPClientTransport(conn, timeout=5),
+        )
+        self.conn._endpoint = 'http://127.0.0.1:%d/2013-04-01/' % self.server.server_address[1]
+        self.transport = HTTPClientTransport(self.conn, timeout=5)
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_connect_selects_transport(self):
+        self.assertIsInstance(self.conn._transport, HTTPClientTransport)
+        self.assertIsInstance(route53.connect('BLAHBLAH', 'SECRET')._transport, RequestsTransport)
+
+    def test_requests(self):
+        self.assertEqual(
+            self.transport.send_request('hostedzone', {'maxitems': 10}, 'GET'),
+            '<Response>ok</Response>',
+        )
+        self.transport.send_request('hostedzone', '<Request>é</Request>', 'POST')
+        self.transport.send_request('hostedzone/Z1', {}, 'DELETE')
+
+        (get, post, delete) = self.server.requests
+        self.assertEqual(get[:3], ('GET', '/2013-04-01/hostedzone?maxitems=10', None))
+        self.assertIn('AWS3-HTTPS AWSAccessKeyId=BLAHBLAH', get[3]['X-Amzn-Authorization'])
+        self.assertEqual(post[:3], ('POST', '/2013-04-01/hostedzone', u'<Request>é</Request>'.encode('utf-8')))
+        self.assertEqual(delete[:2], ('DELETE', '/2013-04-01/hostedzone/Z1'))
+
+    def test_keep_alive(self):
+        for _ in range(5):
+            self.transport.send_request('hostedzone', {}, 'GET')
+        self.assertEqual(self.server.connection_count, 1)
+
+    def test_stale_connection_is_replaced(self):
+        self.server.drop_after_response = True
+        self.transport.send_request('hostedzone', {}, 'GET')
+        # Give the server a moment to hang up.
+        time.sleep(0.2)
+        # A POST isn't safe to retry once sent, so the dropped connection
+        # has to be noticed before sending.
+        self.transport.send_request('hostedzone', '<Request/>', 'POST')
+        self.assertEqual(len(self.server.requests), 2)
+        self.assertEqual(self.server.connection_count, 2)
+
+    def test_per_thread_connections(self):
+        def worker():
+            for _ in range(3):
+                self.transport.send_request('hostedzone', {}, 'GET')
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(self.server.requests), 12)
+        self.assertEqual(self.server.connection_count, 4)
+
+    def test_get_errors(self):
+        try:
+            self.transport.send_request('missing', {}, 'GET')
+        except Route53HTTPError as exc:
+            self.assertEqual(exc.status_code, 404)
+        else:
+            self.fail("A 404 on a GET should raise.")
+        # The connection is still usable afterwards.
+        self.transport.send_request('hostedzone', {}, 'GET')
+        self.assertEqual(self.server.connection_count, 1)
+
+    def test_read_timeout(self):
+        transport = HTTPClientTransport(self.conn, timeout=(5, 0.1))
+        started_at = time.time()
+        self.assertRaises(Exception, transport.send_request, 'slow', {}, 'GET')
+        self.assertLess(time.time() - started_at, 0.4)
+        # A timed out connection isn't re-used.
+        transport.send_request('hostedzone', {}, 'GET')
+        self.assertEqual(self.server.connection_count, 2)
+
+    def test_deadline(self):
+        self.conn._transport = self.transport
+        self.conn._send_request('hostedzone', {}, 'GET')
+        started_at = time.time()
+        with Deadline(0.1):
+            self.assertRaises(
+                DeadlineExceededError, self.conn._send_request, 'slow', {}, 'GET'
+            )
+            # Nothing more is sent once the deadline has passed.
+            self.assertRaises(
+                DeadlineExceededError, self.conn._send_request, 'hostedzone', {}, 'GET'
+            )
+        self.assertLess(time.time() - started_at, 0.4)
+        self.assertEqual(len(self.server.requests), 2)
+
+
+class RequestsTransportTestCase(unittest.TestCase):
+    """
+    Tests for the requests-based transport, against a local server.
+    """
+
+    setUp = HTTPClientTransportTestCase.setUp
+    tearDown = HTTPClientTransportTestCase.tearDown
+
+    def test_get_errors(self):
+        """
+        RequestsTransport raises the same error type for HTTP errors, so
+        they can be recorded to (and replayed from) cassettes.
+        """
+
+        path = os.path.join(tempfile.mkdtemp(), 'errors.jsonl.gz')
+        self.addCleanup(shutil.rmtree, os.path.dirname(path))
+        recorder = RecordingTransport(self.conn, path, transport=RequestsTransport)
+        self.assertRaises(Route53HTTPError, recorder.send_request, 'missing', {}, 'GET')
+        recorder.close()
+
+        try:
+            ReplayTransport(self.conn, path).send_request('missing', {}, 'GET')
+        except Route53HTTPError as exc:
+            self.assertEqual(exc.status_code, 404)
+        else:
+            self.fail("The recorded error should be raised again.")
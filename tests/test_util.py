@@ -33,3 +33,33 @@ class UtilTestCase(BaseTestCase):
         self.assertEqual(parse_iso_8601_time_str('2013-07-28T01:00:01.001Z'),
             datetime.datetime(2013, 7, 28, 1, 0, 1, 1000, \
             tzinfo=UTC()))
+
+
+class ISO8601ParsingTestCase(unittest.TestCase):
+    """
+    Tests for the fast timestamp parsing path. These don't need AWS.
+    """
+
+    def test_matches_strptime(self):
+        from route53.util import parse_iso_8601_time_str
+        for time_str, fmt in [
+            ('2013-07-28T01:00:01Z', '%Y-%m-%dT%H:%M:%SZ'),
+            ('2013-12-31T23:59:59.999Z', '%Y-%m-%dT%H:%M:%S.%fZ'),
+            ('2013-07-28T01:00:01.010Z', '%Y-%m-%dT%H:%M:%S.%fZ'),
+        ]:
+            expected = datetime.strptime(time_str, fmt).replace(tzinfo=UTC())
+            parsed = parse_iso_8601_time_str(time_str)
+            self.assertEqual(parsed, expected)
+            self.assertEqual(parsed.utcoffset(), timedelta(0))
+            # Cached results are identical.
+            self.assertIs(parse_iso_8601_time_str(time_str), parsed)
+
+    def test_unusual_formats(self):
+        from route53.util import parse_iso_8601_time_str
+        # Not a format Route53 sends, but strptime copes with it.
+        self.assertEqual(
+            parse_iso_8601_time_str('2013-7-28T01:00:01Z'),
+            datetime(2013, 7, 28, 1, 0, 1, tzinfo=UTC()),
+        )
+        self.assertRaises(ValueError, parse_iso_8601_time_str, '2013-07-28T01:00:61Z')
+        self.assertRaises(ValueError, parse_iso_8601_time_str, 'not a timestamp')
@@ -0,0 +1,128 @@
+import unittest
+from route53.change_set import ChangeSet
+from route53.exceptions import ChangeSetValidationError
+from route53.resource_record_set import AResourceRecordSet, AAAAResourceRecordSet, \
+    CNAMEResourceRecordSet, MXResourceRecordSet
+from route53.validation import ZoneSnapshot, validate_change_set
+from tests.fake_transport import FakeRoute53Backend, get_fake_connection
+
+
+class ValidationTestCase(unittest.TestCase):
+    """
+    Tests for local change set validation.
+    """
+
+    def setUp(self):
+        self.backend = FakeRoute53Backend()
+        self.zone_id = self.backend.add_zone('example.com.')
+        self.backend.add_rrset(self.zone_id, 'www.example.com.', 'A', ['10.0.0.1'], ttl=300)
+        self.conn = get_fake_connection(self.backend)
+        self.zone = self.conn.get_hosted_zone_by_id(self.zone_id)
+        self.cset = ChangeSet(connection=self.conn, hosted_zone_id=self.zone_id)
+
+    def make(self, cls, name, records, ttl=60, **kwargs):
+        return cls(
+            connection=self.conn, zone_id=self.zone_id, name=name,
+            ttl=ttl, records=records, **kwargs
+        )
+
+    def test_valid_change_set(self):
+        self.cset.add_change('CREATE', self.make(AResourceRecordSet, 'api.example.com.', ['10.0.0.2']))
+        self.cset.add_change('CREATE', self.make(MXResourceRecordSet, 'example.com.', ['10 mail.example.com.']))
+        self.cset.add_change('DELETE', self.make(AResourceRecordSet, 'www.example.com.', ['10.0.0.1'], ttl=300))
+        snapshot = ZoneSnapshot.from_hosted_zone(self.zone)
+        self.assertEqual(validate_change_set(self.cset, snapshot), [])
+        self.cset.validate(snapshot)
+
+    def test_all_problems_reported(self):
+        self.cset.add_change('CREATE', self.make(AResourceRecordSet, 'a.example.com.', ['10.0.0.300', 'bogus']))
+        self.cset.add_change('CREATE', self.make(AAAAResourceRecordSet, 'b.example.com.', ['10.0.0.1']))
+        self.cset.add_change('CREATE', self.make(
+            AResourceRecordSet, 'c.example.com.', ['10.0.0.1'], weight=300, set_identifier='c'
+        ))
+        self.cset.add_change('CREATE', self.make(AResourceRecordSet, 'd.example.com.', ['10.0.0.1'], weight=10))
+
+        try:
+            self.cset.validate()
+        except ChangeSetValidationError as exc:
+            problems = exc.problems
+        else:
+            self.fail("Validation should have failed.")
+
+        self.assertEqual(len(problems), 5)
+        self.assertTrue(problems[0].startswith('CREATE a.example.com. A:'))
+        self.assertIn("'bogus' is not a valid IPv4 address", problems[1])
+        self.assertIn('IPv6', problems[2])
+        self.assertIn('weight 300 is out of range', problems[3])
+        self.assertIn('need a set_identifier', problems[4])
+
+    def test_cname_coexistence(self):
+        self.cset.add_change('CREATE', self.make(CNAMEResourceRecordSet, 'www.example.com.', ['lb.example.net.']))
+        # Without a snapshot, we can't know about the existing A record.
+        self.assertEqual(validate_change_set(self.cset), [])
+
+        problems = validate_change_set(self.cset, ZoneSnapshot.from_hosted_zone(self.zone))
+        self.assertEqual(len(problems), 1)
+        self.assertIn("CNAME can't coexist with other record types (A)", problems[0])
+
+        # Replacing the A record with the CNAME is fine.
+        self.cset.add_change('DELETE', self.make(AResourceRecordSet, 'www.example.com.', ['10.0.0.1'], ttl=300))
+        self.assertEqual(validate_change_set(self.cset, ZoneSnapshot.from_hosted_zone(self.zone)), [])
+
+    def test_delete_must_match(self):
+        snapshot = ZoneSnapshot.from_hosted_zone(self.zone)
+        self.cset.add_change('DELETE', self.make(AResourceRecordSet, 'www.example.com.', ['10.0.0.1'], ttl=60))
+        self.cset.add_change('DELETE', self.make(AResourceRecordSet, 'nope.example.com.', ['10.0.0.1']))
+        problems = validate_change_set(self.cset, snapshot)
+        self.assertEqual(len(problems), 2)
+        self.assertIn("values don't match", problems[0])
+        self.assertIn('no such record set', problems[1])
+
+    def test_duplicate_creates(self):
+        self.cset.add_change('CREATE', self.make(AResourceRecordSet, 'api.example.com.', ['10.0.0.2']))
+        self.cset.add_change('CREATE', self.make(AResourceRecordSet, 'api.example.com.', ['10.0.0.3']))
+        problems = validate_change_set(self.cset)
+        self.assertEqual(len(problems), 1)
+        self.assertIn('already exists', problems[0])
+
+    def test_snapshot_tracks_applied_changes(self):
+        snapshot = ZoneSnapshot.from_hosted_zone(self.zone)
+        self.cset.add_change('CREATE', self.make(AResourceRecordSet, 'api.example.com.', ['10.0.0.2']))
+        self.cset.validate(snapshot)
+        self.conn._change_resource_record_sets(self.cset)
+        snapshot.apply_change_set(self.cset)
+
+        self.assertRaises(ChangeSetValidationError, self.cset.validate, snapshot)
+
+    def test_routing_policies(self):
+        """
+        Failover and geolocation record sets use a set_identifier without a
+        weight or region, but can't be combined with other policies.
+        """
+
+        self.cset.add_change('CREATE', self.make(
+            AResourceRecordSet, 'fo.example.com.', ['10.0.0.1'],
+            set_identifier='primary', failover='PRIMARY', health_check_id='hc-1234',
+        ))
+        self.cset.add_change('CREATE', self.make(
+            AResourceRecordSet, 'fo.example.com.', ['10.0.0.2'],
+            set_identifier='secondary', failover='SECONDARY',
+        ))
+        self.cset.add_change('CREATE', self.make(
+            AResourceRecordSet, 'geo.example.com.', ['10.0.0.3'],
+            set_identifier='eu', geolocation={'continent_code': 'EU'},
+        ))
+        self.assertEqual(validate_change_set(self.cset), [])
+
+        self.cset.add_change('CREATE', self.make(
+            AResourceRecordSet, 'bad.example.com.', ['10.0.0.4'],
+            set_identifier='bad', failover='TERTIARY', weight=10,
+        ))
+        self.cset.add_change('CREATE', self.make(
+            AResourceRecordSet, 'nosid.example.com.', ['10.0.0.5'], failover='PRIMARY',
+        ))
+        problems = validate_change_set(self.cset)
+        self.assertEqual(len(problems), 3)
+        self.assertIn('failover must be one of PRIMARY, SECONDARY', problems[0])
+        self.assertIn('only have one routing policy (weighted, failover)', problems[1])
+        self.assertIn('failover record sets need a set_identifier', problems[2])
@@ -0,0 +1,117 @@
+import unittest
+from route53.watcher import ZoneWatcher
+from tests.fake_transport import FakeRoute53Backend, get_fake_connection
+
+
+class ZoneWatcherTestCase(unittest.TestCase):
+    """
+    Tests for polling zones for out-of-band changes.
+    """
+
+    def setUp(self):
+        self.backend = FakeRoute53Backend()
+        self.zone_ids = []
+        for i in range(3):
+            zone_id = self.backend.add_zone('zone%d.example.com.' % i)
+            for j in range(30):
+                self.backend.add_rrset(
+                    zone_id, 'host%02d.zone%d.example.com.' % (j, i), 'A', ['10.0.%d.%d' % (i, j)]
+                )
+            self.zone_ids.append(zone_id)
+        self.conn = get_fake_connection(self.backend)
+        self.diffs = []
+        self.watcher = ZoneWatcher(
+            self.conn, callbacks=[self.diffs.append], max_workers=2,
+            fingerprint_page_size=5, page_chunks=10,
+        )
+        self.watcher.poll_once()
+        self.backend.request_log[:] = []
+
+    def get_rrset(self, zone_id, name):
+        return self.backend.zones[zone_id]['rrsets'][(name, 'A', None)]
+
+    def test_unchanged_zones_are_skipped(self):
+        self.assertEqual(self.watcher.poll_once(), [])
+        self.assertEqual(self.diffs, [])
+        # A listing of the zones, plus one fingerprint page per zone.
+        self.assertEqual(self.backend.request_count(kind='list_hosted_zones'), 1)
+        self.assertEqual(self.backend.request_count(kind='list_rrsets'), 3)
+
+    def test_count_change(self):
+        self.backend.add_rrset(self.zone_ids[1], 'new.zone1.example.com.', 'A', ['10.9.9.9'])
+        self.backend.zones[self.zone_ids[1]]['rrsets'].pop(('host29.zone1.example.com.', 'A', None))
+        self.backend.add_rrset(self.zone_ids[1], 'extra.zone1.example.com.', 'A', ['10.9.9.8'])
+
+        diffs = self.watcher.poll_once()
+        self.assertEqual(len(diffs), 1)
+        diff = diffs[0]
+        self.assertEqual(diff.zone.id, self.zone_ids[1])
+        self.assertEqual(
+            sorted(values['name'] for values in diff.added),
+            ['extra.zone1.example.com.', 'new.zone1.example.com.'],
+        )
+        self.assertEqual([values['name'] for values in diff.removed], ['host29.zone1.example.com.'])
+        self.assertEqual(diff.changed, [])
+        self.assertEqual(self.diffs, diffs)
+
+    def test_fingerprint_change(self):
+        # Same count, but a value in the first page changed.
+        self.get_rrset(self.zone_ids[0], 'host00.zone0.example.com.')['records'] = ['10.8.8.8']
+
+        diffs = self.watcher.poll_once()
+        self.assertEqual(len(diffs), 1)
+        old, new = diffs[0].changed[0]
+        self.assertEqual(old['records'], ['10.0.0.0'])
+        self.assertEqual(new['records'], ['10.8.8.8'])
+
+    def test_full_resync(self):
+        # Outside of the fingerprint page, so only a full resync sees it.
+        self.get_rrset(self.zone_ids[2], 'host20.zone2.example.com.')['ttl'] = '300'
+        self.assertEqual(self.watcher.poll_once(), [])
+
+        self.watcher.full_resync_every = 3
+        diffs = self.watcher.poll_once()
+        self.assertEqual(len(diffs), 1)
+        self.assertEqual(diffs[0].changed[0][1]['ttl'], 300)
+
+    def test_zones_added_and_removed(self):
+        zone_id = self.backend.add_zone('new.example.com.')
+        self.conn.get_hosted_zone_by_id(self.zone_ids[0]).delete(force=True)
+
+        diffs = dict((diff.zone.name, diff) for diff in self.watcher.poll_once())
+        self.assertEqual(len(diffs['new.example.com.'].added), 2)
+        self.assertEqual(len(diffs['zone0.example.com.'].removed), 32)
+
+    def test_zone_errors(self):
+        """
+        A zone that can't be checked is reported, and doesn't stop the
+        others from being checked.
+        """
+
+        errors = []
+        self.watcher.error_callback = lambda zone, exc: errors.append((zone.id, exc.code))
+        for zone_id in self.zone_ids:
+            self.backend.add_rrset(zone_id, 'new.example.com.', 'A', ['10.9.9.9'])
+        self.backend.inject_error('list_rrsets', code='Throttling')
+
+        diffs = self.watcher.poll_once()
+        self.assertEqual(len(errors), 1)
+        self.assertEqual(errors[0][1], 'Throttling')
+        self.assertEqual(len(diffs), 2)
+
+        # The zone that failed is picked up on the next poll.
+        diffs = self.watcher.poll_once()
+        self.assertEqual([diff.zone.id for diff in diffs], [errors[0][0]])
+        self.assertEqual(len(diffs[0].added), 1)
+
+    def test_baseline_errors(self):
+        """
+        A zone that couldn't be checked for the baseline isn't reported as
+        all new once it can be.
+        """
+
+        self.backend.request_log[:] = []
+        watcher = ZoneWatcher(self.conn, error_callback=lambda zone, exc: None)
+        self.backend.inject_error('list_rrsets', code='Throttling')
+        watcher.poll_once()
+        self.assertEqual(watcher.poll_once(), [])
@@ -0,0 +1,49 @@
+import unittest
+from route53.util import StringInterner
+from tests.fake_transport import FakeRoute53Backend, get_fake_connection
+
+
+class StringInterningTestCase(unittest.TestCase):
+    """
+    Tests for value de-duplication in record set listings.
+    """
+
+    def setUp(self):
+        self.backend = FakeRoute53Backend()
+        self.zone_id = self.backend.add_zone('example.com.')
+        for i in range(6):
+            self.backend.add_rrset(
+                self.zone_id, 'host%d.example.com.' % i, 'CNAME',
+                ['lb.us-east-1.elb.amazonaws.com'], ttl=300,
+            )
+
+    def get_cnames(self, conn):
+        zone = conn.get_hosted_zone_by_id(self.zone_id)
+        return [rrset for rrset in zone.list_record_sets(page_chunks=2)
+                if rrset.rrset_type == 'CNAME']
+
+    def test_values_shared_within_listing(self):
+        rrsets = self.get_cnames(get_fake_connection(self.backend))
+        self.assertEqual(len(rrsets), 6)
+        first = rrsets[0]
+        for rrset in rrsets[1:]:
+            # Shared across pages, too.
+            self.assertIs(rrset.records[0], first.records[0])
+            self.assertIs(rrset.ttl, first.ttl)
+        self.assertEqual(first.ttl, 300)
+
+    def test_connection_wide_interner(self):
+        interner = StringInterner(max_size=10)
+        conn = get_fake_connection(self.backend, string_interner=interner)
+        first = self.get_cnames(conn)
+        second = self.get_cnames(conn)
+        self.assertIs(first[0].records[0], second[0].records[0])
+        self.assertLessEqual(len(interner), 10)
+
+    def test_interner_is_bounded(self):
+        interner = StringInterner(max_size=2)
+        interner.intern('a')
+        interner.intern('b')
+        value = ''.join(['c', 'c'])
+        self.assertIs(interner.intern(value), value)
+        self.assertEqual(len(interner), 2)
@@ -0,0 +1,107 @@
+import unittest
+from route53.util import normalize_dns_name
+from route53.zone_index import ZoneSuffixIndex
+from tests.fake_transport import FakeRoute53Backend, get_fake_connection
+
+
+class FakeZone(object):
+    def __init__(self, id, name):
+        self.id = id
+        self.name = name
+
+
+class ZoneSuffixIndexTestCase(unittest.TestCase):
+    """
+    Tests for the in-memory zone name index.
+    """
+
+    def setUp(self):
+        self.index = ZoneSuffixIndex([
+            FakeZone('Z1', 'example.com.'),
+            FakeZone('Z2', 'eu.example.com.'),
+            FakeZone('Z3', 'example.org.'),
+        ])
+
+    def test_exact_lookup(self):
+        """
+        Exact lookups ignore case and the trailing dot.
+        """
+
+        self.assertEqual(self.index.get('example.com.').id, 'Z1')
+        self.assertEqual(self.index.get('EU.Example.com').id, 'Z2')
+        self.assertIsNone(self.index.get('api.example.com.'))
+        self.assertIsNone(self.index.get('com.'))
+
+    def test_longest_match(self):
+        """
+        The most specific zone wins, and matches are on label boundaries.
+        """
+
+        self.assertEqual(self.index.longest_match('api.eu.example.com.').id, 'Z2')
+        self.assertEqual(self.index.longest_match('eu.example.com.').id, 'Z2')
+        self.assertEqual(self.index.longest_match('api.us.example.com.').id, 'Z1')
+        self.assertIsNone(self.index.longest_match('notexample.com.'))
+        self.assertIsNone(self.index.longest_match('example.net.'))
+
+    def test_remove(self):
+        """
+        Removing a zone falls back to the next longest suffix.
+        """
+
+        self.index.remove('Z2')
+        self.assertEqual(len(self.index), 2)
+        self.assertEqual(self.index.longest_match('api.eu.example.com.').id, 'Z1')
+        # Unknown IDs are ignored.
+        self.index.remove('Z2')
+
+    def test_normalize_dns_name(self):
+        self.assertEqual(normalize_dns_name('Example.COM'), 'example.com.')
+        self.assertEqual(normalize_dns_name('example.com.'), 'example.com.')
+        self.assertIsNone(normalize_dns_name(None))
+
+
+class ConnectionZoneLookupTestCase(unittest.TestCase):
+    """
+    Tests for the name-based zone lookups on Route53Connection.
+    """
+
+    def setUp(self):
+        self.backend = FakeRoute53Backend()
+        self.backend.add_zone('example.com.')
+        self.eu_id = self.backend.add_zone('eu.example.com.')
+        self.conn = get_fake_connection(self.backend)
+
+    def test_lookups_share_one_listing(self):
+        """
+        Only the first lookup lists the hosted zones.
+        """
+
+        zone = self.conn.find_owning_zone('api.eu.example.com.')
+        self.assertEqual(zone.id, self.eu_id)
+        self.assertEqual(self.conn.get_hosted_zone_by_name('example.com').name, 'example.com.')
+        self.assertIsNone(self.conn.get_hosted_zone_by_name('example.net.'))
+        self.assertEqual(self.backend.request_count(kind='list_hosted_zones'), 1)
+
+    def test_index_follows_creates_and_deletes(self):
+        """
+        Zones created or deleted through the connection update the index
+        without another listing.
+        """
+
+        self.conn.find_owning_zone('example.com.')
+        new_zone, change_info = self.conn.create_hosted_zone('api.eu.example.com.')
+        self.assertEqual(self.conn.find_owning_zone('www.api.eu.example.com.').id, new_zone.id)
+
+        new_zone.delete()
+        self.assertEqual(self.conn.find_owning_zone('www.api.eu.example.com.').id, self.eu_id)
+        self.assertEqual(self.backend.request_count(kind='list_hosted_zones'), 1)
+
+    def test_refresh(self):
+        """
+        Zones created out-of-band show up after a refresh.
+        """
+
+        self.assertIsNone(self.conn.get_hosted_zone_by_name('example.org.'))
+        self.backend.add_zone('example.org.')
+        self.assertIsNone(self.conn.get_hosted_zone_by_name('example.org.'))
+        self.assertIsNotNone(self.conn.get_hosted_zone_by_name('example.org.', refresh=True))